@@ -1,10 +1,13 @@
-from .core import Datasource, CrudRepository
-from .transactions import TransactionManager, TransactionalMetaclass, transactional
+from .core import Datasource, CrudRepository, AsyncCrudRepository
+from .transactions import Propagation, TransactionManager, AsyncTransactionManager, TransactionalMetaclass, transactional
 
 __all__ = [
     "Datasource",
     "CrudRepository",
+    "AsyncCrudRepository",
     "TransactionalMetaclass",
     "TransactionManager",
-    "transactional"
+    "AsyncTransactionManager",
+    "transactional",
+    "Propagation",
 ]
@@ -6,12 +6,29 @@ from typing import Optional, Callable
 class EngineConfig:
     url: str
     echo: bool = field(default=True)
+    pool_size: Optional[int] = field(default=None)
+    max_overflow: Optional[int] = field(default=None)
+    pool_timeout: Optional[float] = field(default=None)
+    pool_recycle: Optional[int] = field(default=None)
+    pool_pre_ping: bool = field(default=False)
 
     def dict(self):
-        return {k: v for k, v in asdict(self).items()}
+        """Keyword arguments for create_engine, unset pool options are left to the dialect defaults"""
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+
+@dataclass
+class MigrationsConfig:
+    directory: str
+    table: str = field(default="fastdbx_schema_version")
 
 
 @dataclass
 class FastDbxConfig:
     engine: EngineConfig
     create_tables: bool = field(default=True)
+    use_async: bool = field(default=False)
+    replicas: list[EngineConfig] = field(default_factory=list)
+    replica_retry_after: float = field(default=30.0)
+    n_plus_one_threshold: Optional[int] = field(default=None)
+    migrations: Optional[MigrationsConfig] = field(default=None)
@@ -1,7 +1,8 @@
 import importlib
 import os
+from typing import Optional
 
-from fastdbx.config.schemas import FastDbxConfig, EngineConfig
+from fastdbx.config.schemas import FastDbxConfig, EngineConfig, MigrationsConfig
 from fastdbx.core.exception import FastDbxException
 
 SETTINGS_MODULE = os.getenv("FASTAPI_SETTINGS_MODULE", "settings")
@@ -13,7 +14,37 @@ except ImportError:
 except KeyError:
     raise FastDbxException("Improperly configured. create dictionary FASTDBX to store your config")
 
+
+def _engine_config(engine_settings: dict) -> EngineConfig:
+    pool_settings = engine_settings.get("POOL", {})
+
+    return EngineConfig(
+        url=engine_settings["URL"],
+        echo=engine_settings.get("ECHO", True),
+        pool_size=pool_settings.get("SIZE"),
+        max_overflow=pool_settings.get("MAX_OVERFLOW"),
+        pool_timeout=pool_settings.get("TIMEOUT"),
+        pool_recycle=pool_settings.get("RECYCLE"),
+        pool_pre_ping=pool_settings.get("PRE_PING", False),
+    )
+
+
+def _migrations_config(migrations_settings: Optional[dict]) -> Optional[MigrationsConfig]:
+    if migrations_settings is None:
+        return None
+
+    return MigrationsConfig(
+        directory=migrations_settings["DIRECTORY"],
+        table=migrations_settings.get("TABLE", "fastdbx_schema_version"),
+    )
+
+
 Settings = FastDbxConfig(
-    engine=EngineConfig(url=settings["ENGINE"]["URL"], echo=settings["ENGINE"].get("ECHO", True)),
-    create_tables=settings["CREATE_TABLES"]
+    engine=_engine_config(settings["ENGINE"]),
+    create_tables=settings["CREATE_TABLES"],
+    use_async=settings.get("ASYNC", False),
+    replicas=[_engine_config(replica) for replica in settings.get("REPLICAS", [])],
+    replica_retry_after=settings.get("REPLICA_RETRY_AFTER", 30.0),
+    n_plus_one_threshold=settings.get("N_PLUS_ONE_THRESHOLD"),
+    migrations=_migrations_config(settings.get("MIGRATIONS")),
 )
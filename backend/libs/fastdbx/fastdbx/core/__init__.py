@@ -1,6 +1,18 @@
 from .datasource import Datasource
 from .exception import TransactionalException
 from .model import BaseEntity
-from .repo import CrudRepository
+from .pagination import Page, InvalidCursorException
+from .query import PreparedQuery, prepared
+from .repo import CrudRepository, AsyncCrudRepository
 
-__all__ = ["Datasource", "TransactionalException", "BaseEntity", "CrudRepository"]
+__all__ = [
+    "Datasource",
+    "TransactionalException",
+    "BaseEntity",
+    "Page",
+    "InvalidCursorException",
+    "PreparedQuery",
+    "prepared",
+    "CrudRepository",
+    "AsyncCrudRepository",
+]
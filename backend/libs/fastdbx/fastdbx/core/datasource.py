@@ -1,23 +1,47 @@
-from contextlib import contextmanager
+from contextlib import contextmanager, asynccontextmanager
 from contextvars import ContextVar
 from typing import Optional
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import ExceptionContext
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
 
 from fastdbx.config import Settings
-from fastdbx.config.schemas import FastDbxConfig
+from fastdbx.config.schemas import FastDbxConfig, EngineConfig
+from fastdbx.core.exception import FastDbxException, TransactionalException
+from fastdbx.core.lazyload import enable_n_plus_one_detection
+from fastdbx.core.metrics import PoolMetrics, PoolStatistics
 from fastdbx.core.model import BaseEntity
+from fastdbx.core.routing import ReplicaRouter
+from fastdbx.migrations.runner import MigrationRunner
+
+
+@event.listens_for(Session, "before_flush")
+def _reject_writes_in_read_only_session(session: Session, flush_context, instances):
+    if session.info.get("read_only") and (session.new or session.dirty or session.deleted):
+        raise TransactionalException("Can not flush changes inside a read only transaction")
 
 
 class Datasource:
     _instance: Optional["Datasource"] = None
 
     def __init__(self, settings: FastDbxConfig = Settings):
-        self._engine = create_engine(**settings.engine.dict())
-        self._session_factory = sessionmaker(bind=self._engine, expire_on_commit=False)
+        self._is_async = settings.use_async
+        self._engine, self._session_factory = self._create_engine(settings.engine)
+        self._replicas = [self._create_engine(replica) for replica in settings.replicas]
+        self._replica_router = ReplicaRouter(len(self._replicas), settings.replica_retry_after)
+        for index, (engine, _) in enumerate(self._replicas):
+            event.listen(self._sync_engine(engine), "handle_error", self._replica_error_handler(index))
+        self._pool_metrics = PoolMetrics(self._sync_engine(self._engine))
+        self._replica_pool_metrics = [PoolMetrics(self._sync_engine(engine)) for engine, _ in self._replicas]
         self._session_context = ContextVar("db_session", default=None)
         self._should_create_tables = settings.create_tables
+        self._migrations = settings.migrations
+        self._session_info = {"n_plus_one_threshold": settings.n_plus_one_threshold}
+
+        if settings.n_plus_one_threshold is not None:
+            enable_n_plus_one_detection()
 
     @classmethod
     def instance(cls, settings: FastDbxConfig = Settings) -> "Datasource":
@@ -25,31 +49,142 @@ class Datasource:
             cls._instance = Datasource(settings)
         return cls._instance
 
+    @property
+    def is_async(self) -> bool:
+        return self._is_async
+
+    @property
+    def pool_statistics(self) -> PoolStatistics:
+        return self._pool_metrics.snapshot()
+
+    @property
+    def replica_pool_statistics(self) -> list[PoolStatistics]:
+        return [metrics.snapshot() for metrics in self._replica_pool_metrics]
+
     def startup(self):
-        if self._should_create_tables:
+        self._ensure_mode(use_async=False)
+
+        if self._migrations is not None:
+            with self._engine.connect() as connection:
+                MigrationRunner(self._migrations).run(connection, create_tables=self._should_create_tables)
+        elif self._should_create_tables:
             with self._engine.connect() as connection:
                 BaseEntity.metadata.create_all(connection)
 
     def shutdown(self):
+        self._ensure_mode(use_async=False)
         self._engine.dispose()
+
+        for engine, _ in self._replicas:
+            engine.dispose()
+
+        Datasource._instance = None
+
+    async def astartup(self):
+        self._ensure_mode(use_async=True)
+
+        if self._migrations is not None:
+            async with self._engine.connect() as connection:
+                await connection.run_sync(MigrationRunner(self._migrations).run, self._should_create_tables)
+        elif self._should_create_tables:
+            async with self._engine.begin() as connection:
+                await connection.run_sync(BaseEntity.metadata.create_all)
+
+    async def ashutdown(self):
+        self._ensure_mode(use_async=True)
+        await self._engine.dispose()
+
+        for engine, _ in self._replicas:
+            await engine.dispose()
+
         Datasource._instance = None
 
     @contextmanager
-    def session(self):
-        _session = self._session_context.get()
+    def session(self, read_only: bool = False):
+        """Opens a new session and binds it to the current context until the block exits
+
+        The previously bound session, if any, is bound again on exit, so a transaction started inside
+        another one does not end the outer transaction's context
+        """
+        with self.unbound_session(read_only) as _session, self.bind(_session):
+            yield _session
 
-        if _session is None:
-            _session = self._session_factory()
-            self._session_context.set(_session)
+    @contextmanager
+    def unbound_session(self, read_only: bool = False):
+        """Opens a new session without binding it, for sessions used from several contexts, see bind"""
+        self._ensure_mode(use_async=False)
+        _, session_factory = self._route(read_only)
+        _session = session_factory(info={**self._session_info, "read_only": read_only})
 
         try:
             yield _session
         except Exception:
             _session.close()
             raise
+
+    @contextmanager
+    def bind(self, session: Session):
+        """Binds the session to the current context until the block exits, then binds the previous one again"""
+        token = self._session_context.set(session)
+
+        try:
+            yield session
         finally:
-            self._session_context.set(None)
+            self._session_context.reset(token)
+
+    @asynccontextmanager
+    async def async_session(self, read_only: bool = False):
+        self._ensure_mode(use_async=True)
+        _, session_factory = self._route(read_only)
+        _session = session_factory(info={**self._session_info, "read_only": read_only})
+        token = self._session_context.set(_session)
+
+        try:
+            yield _session
+        except Exception:
+            await _session.close()
+            raise
+        finally:
+            self._session_context.reset(token)
 
     @property
     def context(self):
         return self._session_context.get()
+
+    def _create_engine(self, engine_config: EngineConfig):
+        if self._is_async:
+            engine = create_async_engine(**engine_config.dict())
+            return engine, async_sessionmaker(bind=engine, expire_on_commit=False)
+
+        engine = create_engine(**engine_config.dict())
+        return engine, sessionmaker(bind=engine, expire_on_commit=False)
+
+    def _sync_engine(self, engine):
+        return engine.sync_engine if self._is_async else engine
+
+    def _route(self, read_only: bool):
+        """Returns the index of the chosen replica, None for the primary, and its session factory"""
+        if read_only and self._replicas:
+            replica = self._replica_router.pick()
+
+            if replica is not None:
+                return replica, self._replicas[replica][1]
+
+        return None, self._session_factory
+
+    def _replica_error_handler(self, replica: int):
+        """Marks the replica unhealthy on connection errors, errors of a statement (e.g. a lock timeout) do not count"""
+        def handle_error(context: ExceptionContext):
+            # a failed connect has no connection yet, a dropped connection is reported as a disconnect,
+            # a failed pre ping is recovered by the pool opening a new connection
+            if (context.connection is None or context.is_disconnect) and not context.is_pre_ping:
+                self._replica_router.mark_unhealthy(replica)
+
+        return handle_error
+
+    def _ensure_mode(self, use_async: bool):
+        if self._is_async != use_async:
+            mode = "async" if self._is_async else "sync"
+            raise FastDbxException(
+                f"Datasource is configured in {mode} mode, toggle FASTDBX['ASYNC'] to use this operation"
+            )
@@ -0,0 +1,40 @@
+import warnings
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, ORMExecuteState
+
+
+class NPlusOneWarning(UserWarning):
+    pass
+
+
+def enable_n_plus_one_detection() -> None:
+    """Watches lazy loads in sessions opened with info["n_plus_one_threshold"]
+
+    Every lazy load is counted per session by (parent entity, loaded entity), once the same relationship is
+    lazy loaded `threshold` times inside one transaction an NPlusOneWarning is emitted, once per relationship
+    """
+    if not event.contains(Session, "do_orm_execute", _count_lazy_load):
+        event.listen(Session, "do_orm_execute", _count_lazy_load)
+
+
+def _count_lazy_load(orm_execute_state: ORMExecuteState) -> None:
+    threshold = orm_execute_state.session.info.get("n_plus_one_threshold")
+
+    if threshold is None or not orm_execute_state.is_select or orm_execute_state.lazy_loaded_from is None:
+        return
+
+    parent = orm_execute_state.lazy_loaded_from.class_.__name__
+    loaded = orm_execute_state.bind_mapper.class_.__name__
+    key = (parent, loaded)
+
+    lazy_loads = orm_execute_state.session.info.setdefault("lazy_loads", {})
+    lazy_loads[key] = lazy_loads.get(key, 0) + 1
+
+    if lazy_loads[key] == threshold:
+        warnings.warn(
+            f"{loaded} was lazy loaded {threshold} times from {parent} inside one transaction, "
+            f"consider passing selectinload / joinedload options to the query",
+            NPlusOneWarning,
+            stacklevel=2,
+        )
@@ -0,0 +1,97 @@
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+from sqlalchemy import event, Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool
+
+# upper bounds, in seconds, of the connection wait time histogram buckets
+WAIT_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float("inf"))
+
+
+@dataclass
+class PoolStatistics:
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    total_wait_time: float
+    wait_time_histogram: dict[float, int] = field(default_factory=dict)
+
+
+class PoolMetrics:
+    """Collects live statistics of the connection pool of an engine
+
+    The pool events are subscribed on the engine, so they keep firing for the pool the engine creates on dispose().
+    The time spent in pool.connect() is recorded as the wait time of a checkout, it includes the time spent
+    waiting for a free connection and the time needed to open a new one
+    """
+
+    def __init__(self, engine: Engine):
+        self._engine = engine
+        self._lock = threading.Lock()
+        self._checked_out = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total_wait_time = 0.0
+        self._bucket_counts = [0] * len(WAIT_TIME_BUCKETS)
+
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "engine_disposed", self._on_engine_disposed)
+        self._instrument_connect(engine.pool)
+
+    def snapshot(self) -> PoolStatistics:
+        pool = self._engine.pool
+        size = getattr(pool, "size", None)
+        checked_in = getattr(pool, "checkedin", None)
+        overflow = getattr(pool, "overflow", None)
+
+        with self._lock:
+            return PoolStatistics(
+                size=size() if size else 0,
+                checked_in=checked_in() if checked_in else 0,
+                checked_out=self._checked_out,
+                overflow=max(overflow(), 0) if overflow else 0,
+                checkouts=self._checkouts,
+                timeouts=self._timeouts,
+                total_wait_time=self._total_wait_time,
+                wait_time_histogram=dict(zip(WAIT_TIME_BUCKETS, self._bucket_counts)),
+            )
+
+    def _instrument_connect(self, pool: Pool):
+        connect = pool.connect
+
+        def timed_connect():
+            start = time.perf_counter()
+            try:
+                return connect()
+            except PoolTimeoutError:
+                with self._lock:
+                    self._timeouts += 1
+                raise
+            finally:
+                self._observe_wait(time.perf_counter() - start)
+
+        pool.connect = timed_connect
+
+    def _observe_wait(self, elapsed: float):
+        with self._lock:
+            self._total_wait_time += elapsed
+            self._bucket_counts[bisect_left(WAIT_TIME_BUCKETS, elapsed)] += 1
+
+    def _on_engine_disposed(self, engine: Engine):
+        self._instrument_connect(engine.pool)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self._checked_out += 1
+            self._checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self._checked_out -= 1
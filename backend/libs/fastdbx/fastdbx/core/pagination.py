@@ -0,0 +1,39 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from typing import Generic, TypeVar, Optional
+
+from fastdbx.core.exception import FastDbxException
+
+T = TypeVar("T")
+
+
+class InvalidCursorException(FastDbxException):
+    pass
+
+
+@dataclass
+class Page(Generic[T]):
+    items: list[T]
+    next_cursor: Optional[str] = field(default=None)
+
+
+def encode_cursor(position: int, key: str = "after") -> str:
+    """Opaque cursor holding a position, by default the id of the row to continue after"""
+    payload = json.dumps({key: position}).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key: str = "after") -> int:
+    """The position held by a cursor encoded with the same key, a cursor of another kind is invalid"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded))[key]
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorException(f"Invalid cursor: {cursor}") from e
+
+    if not isinstance(position, int) or isinstance(position, bool):
+        raise InvalidCursorException(f"Invalid cursor: {cursor}")
+
+    return position
@@ -0,0 +1,45 @@
+import threading
+from typing import Callable, Optional
+
+from sqlalchemy.sql import Executable
+
+
+class PreparedQuery:
+    """A repository statement built once per process and reused by every call
+
+    The builder returns a statement whose variable parts are bindparam()s, the values are passed when the
+    statement is executed. Reusing the same construct skips building the select and computing its cache key
+    on each call, the engine then finds the compiled form in its compiled cache.
+    """
+
+    def __init__(self, builder: Callable[[], Executable]):
+        self._builder = builder
+        self._statement: Optional[Executable] = None
+        self._lock = threading.Lock()
+        self.__doc__ = builder.__doc__
+
+    def __set_name__(self, owner, name):
+        self.name = f"{owner.__name__}.{name}"
+
+    def __get__(self, instance, owner=None) -> Executable:
+        if self._statement is None:
+            with self._lock:
+                if self._statement is None:
+                    self._statement = self._builder()
+
+        return self._statement
+
+
+def prepared(builder: Callable[[], Executable]) -> PreparedQuery:
+    """Declares a prepared statement on a repository class
+
+    class InventoryRepository(CrudRepository[Inventory]):
+
+        @prepared
+        def _by_pharmacy():
+            return select(Inventory).where(Inventory.pharmacy_id == bindparam("pharmacy_id"))
+
+        def find_by_pharmacy(self, pharmacy_id: int) -> list[Inventory]:
+            return self.session.scalars(self._by_pharmacy, {"pharmacy_id": pharmacy_id}).all()
+    """
+    return PreparedQuery(builder)
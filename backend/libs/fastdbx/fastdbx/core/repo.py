@@ -1,54 +1,188 @@
 from abc import abstractmethod
-from typing import TypeVar, Generic, Optional
+from typing import TypeVar, Generic, Optional, Any, Callable, Mapping, Sequence, Union, Iterable, Iterator, AsyncIterator
 
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, Select
+from sqlalchemy.dialects import postgresql, sqlite, mysql
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.sql.base import ExecutableOption
 
 from fastdbx.core.datasource import Datasource
+from fastdbx.core.exception import FastDbxException
 from fastdbx.core.model import BaseEntity
+from fastdbx.core.pagination import Page, encode_cursor, decode_cursor
 
 T = TypeVar("T", bound=BaseEntity)
 
+UpsertUpdate = Union[Sequence[str], Mapping[str, Callable[[Any], Any]], None]
+
 
 class AbstractRepository(Generic[T]):
 
     @abstractmethod
-    def find_all(self) -> list[T]:
+    def find_all(self, *options: ExecutableOption) -> list[T]:
+        pass
+
+    @abstractmethod
+    def find_by_id(self, id: int, *options: ExecutableOption) -> Optional[T]:
+        pass
+
+    @abstractmethod
+    def find_by_ids(self, ids: Iterable[int], *options: ExecutableOption) -> list[T]:
+        pass
+
+    @abstractmethod
+    def find_page(self, *options: ExecutableOption, limit: int, cursor: Optional[str] = None) -> Page[T]:
         pass
 
     @abstractmethod
-    def find_by_id(self, id: int) -> Optional[T]:
+    def stream(self, *options: ExecutableOption, batch_size: int = 1000) -> Iterator[T]:
         pass
 
     @abstractmethod
     def save(self, instance: T, **data) -> T:
         pass
 
+    @abstractmethod
+    def save_all(self, instances: list[BaseEntity]) -> list[BaseEntity]:
+        pass
+
+    @abstractmethod
+    def upsert_many(
+        self, rows: list[dict[str, Any]], conflict_columns: Sequence[str], update: UpsertUpdate = None
+    ) -> int:
+        pass
+
     @abstractmethod
     def delete_by_id(self, id: int) -> bool:
         pass
 
+    @abstractmethod
+    def delete_by_ids(self, ids: Iterable[int]) -> int:
+        pass
+
 
-class CrudRepository(AbstractRepository[T]):
+class _BaseCrudRepository(AbstractRepository[T]):
+    # loader options applied by the finders when the caller does not pass any, e.g. (selectinload(Item.tags),)
+    load_options: tuple[ExecutableOption, ...] = ()
 
     def __init__(self, entity: T):
         self._datasource = Datasource.instance()
         self.entity = entity
 
+    def _select(self, options: tuple[ExecutableOption, ...]) -> Select:
+        return select(self.entity).options(*(options or self.load_options))
+
+    def _seek(self, statement: Select, limit: int, cursor: Optional[str]) -> Select:
+        """Keyset pagination on the primary key, one extra row is fetched to know whether a next page exists"""
+        if cursor is not None:
+            statement = statement.where(self.entity.id > decode_cursor(cursor))
+
+        return statement.order_by(self.entity.id).limit(limit + 1)
+
+    @staticmethod
+    def _to_page(rows: Sequence[T], limit: int) -> Page[T]:
+        if len(rows) <= limit:
+            return Page(items=list(rows))
+
+        items = list(rows[:limit])
+        return Page(items=items, next_cursor=encode_cursor(items[-1].id))
+
+    def _streamed(self, statement: Select, batch_size: int) -> Select:
+        return statement.order_by(self.entity.id).execution_options(yield_per=batch_size)
+
+    @staticmethod
+    def _set_attributes(instance: T, **data) -> None:
+        for key, value in data.items():
+            if hasattr(instance, key):
+                setattr(instance, key, value)
+            else:
+                raise AttributeError(
+                    f"{type(instance).__name__} has no attribute: {key}"
+                )
+
+    def _upsert_statement(
+        self, dialect_name: str, columns: Iterable[str], conflict_columns: Sequence[str], update: UpsertUpdate
+    ):
+        """Builds an INSERT ... ON CONFLICT (ON DUPLICATE KEY for mysql) statement for the entity table
+
+        update is either the names of the columns to overwrite with the inserted values, or a mapping of column
+        names to callables receiving the inserted values namespace (excluded / inserted) and returning the new value,
+        when None every inserted column that is not part of the conflict target is overwritten
+        """
+        table = self.entity.__table__
+
+        if update is None:
+            update = [c for c in columns if c not in conflict_columns]
+
+        if dialect_name in ("postgresql", "sqlite"):
+            dialect = postgresql if dialect_name == "postgresql" else sqlite
+            statement = dialect.insert(table)
+            inserted = statement.excluded
+
+            if not update:
+                return statement.on_conflict_do_nothing(index_elements=conflict_columns)
+
+            return statement.on_conflict_do_update(
+                index_elements=conflict_columns, set_=self._upsert_values(update, inserted)
+            )
+
+        if dialect_name in ("mysql", "mariadb"):
+            statement = mysql.insert(table)
+
+            if not update:
+                no_op = {conflict_columns[0]: table.c[conflict_columns[0]]}
+                return statement.on_duplicate_key_update(no_op)
+
+            return statement.on_duplicate_key_update(self._upsert_values(update, statement.inserted))
+
+        raise FastDbxException(f"upsert_many is not supported for dialect: {dialect_name}")
+
+    @staticmethod
+    def _upsert_values(update: UpsertUpdate, inserted) -> dict[str, Any]:
+        if isinstance(update, Mapping):
+            return {column: value(inserted) for column, value in update.items()}
+
+        return {column: inserted[column] for column in update}
+
+
+class CrudRepository(_BaseCrudRepository[T]):
+
     @property
     def session(self) -> Session:
         return self._datasource.context
 
-    def find_all(self) -> list[T]:
-        statement = select(self.entity)
-        result = self.session.scalars(statement).all()
+    def find_all(self, *options: ExecutableOption) -> list[T]:
+        statement = self._select(options)
+        result = self.session.scalars(statement).unique().all()
         return result
 
-    def find_by_id(self, id: int) -> Optional[T]:
-        statement = select(self.entity).where(self.entity.id == id)
-        result = self.session.scalars(statement).first()
+    def find_by_id(self, id: int, *options: ExecutableOption) -> Optional[T]:
+        statement = self._select(options).where(self.entity.id == id)
+        result = self.session.scalars(statement).unique().first()
         return result
 
+    def find_by_ids(self, ids: Iterable[int], *options: ExecutableOption) -> list[T]:
+        statement = self._select(options).where(self.entity.id.in_(ids))
+        return self.session.scalars(statement).unique().all()
+
+    def find_page(self, *options: ExecutableOption, limit: int, cursor: Optional[str] = None) -> Page[T]:
+        """At most `limit` entities ordered by id, starting after the cursor of the previous page"""
+        return self.paginate(self._select(options), limit, cursor)
+
+    def paginate(self, statement: Select, limit: int, cursor: Optional[str] = None) -> Page[T]:
+        """Applies keyset pagination to a custom select of the entity"""
+        result = self.session.scalars(self._seek(statement, limit, cursor)).unique().all()
+        return self._to_page(result, limit)
+
+    def stream(self, *options: ExecutableOption, batch_size: int = 1000) -> Iterator[T]:
+        """Yields every entity ordered by id, fetching `batch_size` rows at a time with a server side cursor
+
+        The generator must be consumed inside the transaction, loader options joining collections are not supported
+        """
+        statement = self._streamed(self._select(options), batch_size)
+        yield from self.session.scalars(statement)
+
     def save(self, instance: T, **data) -> T:
         """Insert or update"""
         if not data:
@@ -57,18 +191,112 @@ class CrudRepository(AbstractRepository[T]):
             self.session.refresh(instance)
             return instance
 
-        for key, value in data.items():
-            if hasattr(instance, key):
-                setattr(instance, key, value)
-            else:
-                raise AttributeError(
-                    f"{type(instance).__name__} has no attribute: {key}"
-                )
-
+        self._set_attributes(instance, **data)
         self.session.flush()
         return instance
 
+    def save_all(self, instances: list[BaseEntity]) -> list[BaseEntity]:
+        """Insert new and update modified instances with a single flush, inserts are batched per table"""
+        self.session.add_all(instances)
+        self.session.flush()
+        return instances
+
+    def upsert_many(
+        self, rows: list[dict[str, Any]], conflict_columns: Sequence[str], update: UpsertUpdate = None
+    ) -> int:
+        """Inserts the rows in one statement, rows conflicting on conflict_columns are updated instead
+
+        The statement bypasses the session, instances already loaded in it are not refreshed
+        """
+        if not rows:
+            return 0
+
+        dialect_name = self.session.get_bind().dialect.name
+        statement = self._upsert_statement(dialect_name, rows[0].keys(), conflict_columns, update)
+        result = self.session.execute(statement, rows)
+        return result.rowcount
+
     def delete_by_id(self, id: int) -> bool:
         statement = delete(self.entity).where(self.entity.id == id)
         result = self.session.execute(statement)
         return result.rowcount == 1
+
+    def delete_by_ids(self, ids: Iterable[int]) -> int:
+        statement = delete(self.entity).where(self.entity.id.in_(ids))
+        result = self.session.execute(statement)
+        return result.rowcount
+
+
+class AsyncCrudRepository(_BaseCrudRepository[T]):
+    """CrudRepository counterpart for datasources configured with FASTDBX['ASYNC']"""
+
+    @property
+    def session(self) -> AsyncSession:
+        return self._datasource.context
+
+    async def find_all(self, *options: ExecutableOption) -> list[T]:
+        statement = self._select(options)
+        result = await self.session.scalars(statement)
+        return result.unique().all()
+
+    async def find_by_id(self, id: int, *options: ExecutableOption) -> Optional[T]:
+        statement = self._select(options).where(self.entity.id == id)
+        result = await self.session.scalars(statement)
+        return result.unique().first()
+
+    async def find_by_ids(self, ids: Iterable[int], *options: ExecutableOption) -> list[T]:
+        statement = self._select(options).where(self.entity.id.in_(ids))
+        result = await self.session.scalars(statement)
+        return result.unique().all()
+
+    async def find_page(self, *options: ExecutableOption, limit: int, cursor: Optional[str] = None) -> Page[T]:
+        return await self.paginate(self._select(options), limit, cursor)
+
+    async def paginate(self, statement: Select, limit: int, cursor: Optional[str] = None) -> Page[T]:
+        result = await self.session.scalars(self._seek(statement, limit, cursor))
+        return self._to_page(result.unique().all(), limit)
+
+    async def stream(self, *options: ExecutableOption, batch_size: int = 1000) -> AsyncIterator[T]:
+        statement = self._streamed(self._select(options), batch_size)
+        result = await self.session.stream_scalars(statement)
+
+        async for entity in result:
+            yield entity
+
+    async def save(self, instance: T, **data) -> T:
+        """Insert or update"""
+        if not data:
+            self.session.add(instance)
+            await self.session.flush()
+            await self.session.refresh(instance)
+            return instance
+
+        self._set_attributes(instance, **data)
+        await self.session.flush()
+        return instance
+
+    async def save_all(self, instances: list[BaseEntity]) -> list[BaseEntity]:
+        self.session.add_all(instances)
+        await self.session.flush()
+        return instances
+
+    async def upsert_many(
+        self, rows: list[dict[str, Any]], conflict_columns: Sequence[str], update: UpsertUpdate = None
+    ) -> int:
+        if not rows:
+            return 0
+
+        dialect_name = self.session.get_bind().dialect.name
+        statement = self._upsert_statement(dialect_name, rows[0].keys(), conflict_columns, update)
+        result = await self.session.execute(statement, rows)
+        return result.rowcount
+
+    async def delete_by_id(self, id: int) -> bool:
+        statement = delete(self.entity).where(self.entity.id == id)
+        result = await self.session.execute(statement)
+        return result.rowcount == 1
+
+    async def delete_by_ids(self, ids: Iterable[int]) -> int:
+        statement = delete(self.entity).where(self.entity.id.in_(ids))
+        result = await self.session.execute(statement)
+        return result.rowcount
@@ -0,0 +1,39 @@
+import threading
+import time
+from typing import Optional
+
+
+class ReplicaRouter:
+    """Round-robin selection of read replicas
+
+    A replica that failed with a connection error is skipped for `retry_after` seconds, once the
+    interval elapses it takes part in the rotation again. When no replica is healthy `pick` returns None
+    and the caller falls back to the primary.
+    """
+
+    def __init__(self, replica_count: int, retry_after: float):
+        self._replica_count = replica_count
+        self._retry_after = retry_after
+        self._unhealthy_until = [0.0] * replica_count
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def pick(self) -> Optional[int]:
+        now = time.monotonic()
+
+        with self._lock:
+            for _ in range(self._replica_count):
+                index = self._next
+                self._next = (self._next + 1) % self._replica_count
+
+                if self._unhealthy_until[index] <= now:
+                    return index
+
+        return None
+
+    def mark_unhealthy(self, index: int):
+        with self._lock:
+            self._unhealthy_until[index] = time.monotonic() + self._retry_after
+
+    def is_healthy(self, index: int) -> bool:
+        return self._unhealthy_until[index] <= time.monotonic()
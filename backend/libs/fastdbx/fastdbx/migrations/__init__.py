@@ -0,0 +1,2 @@
+from .runner import Migration, MigrationRunner, MigrationException, load_migrations
+from .operations import create_index, drop_index
@@ -0,0 +1,73 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+from fastdbx.migrations.runner import MigrationException
+
+
+def _index_exists(connection: Connection, name: str, table: str) -> bool:
+    return any(index["name"] == name for index in inspect(connection).get_indexes(table))
+
+
+def _drop_invalid_postgres_index(connection: Connection, name: str):
+    """A concurrent build that failed leaves an invalid index behind, which is dropped so the build can be retried"""
+    is_valid = connection.execute(
+        text("SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"),
+        {"name": name},
+    ).scalar()
+
+    if is_valid is False:
+        connection.exec_driver_sql(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+
+def _require_autocommit(connection: Connection, operation: str):
+    if connection.get_isolation_level() != "AUTOCOMMIT":
+        raise MigrationException(f"{operation} must run in a migration with TRANSACTIONAL = False")
+
+
+def create_index(connection: Connection, name: str, table: str, columns: list[str], unique: bool = False):
+    """Creates an index without blocking writes to the table, does nothing when it already exists
+
+    PostgreSQL builds it CONCURRENTLY and MySQL with ALGORITHM=INPLACE, LOCK=NONE, both only outside of a transaction,
+    so the migration calling it must set TRANSACTIONAL = False. Other databases create it the usual way.
+    """
+    dialect = connection.dialect.name
+    preparer = connection.dialect.identifier_preparer
+    quoted_columns = ", ".join(preparer.quote(column) for column in columns)
+    unique_keyword = "UNIQUE " if unique else ""
+
+    if dialect == "postgresql":
+        _require_autocommit(connection, "create_index")
+        _drop_invalid_postgres_index(connection, name)
+
+    if _index_exists(connection, name, table):
+        return
+
+    statement = f"CREATE {unique_keyword}INDEX {preparer.quote(name)} ON {preparer.quote(table)} ({quoted_columns})"
+
+    if dialect == "postgresql":
+        statement = statement.replace("INDEX", "INDEX CONCURRENTLY", 1)
+    elif dialect in ("mysql", "mariadb"):
+        statement += " ALGORITHM=INPLACE LOCK=NONE"
+
+    connection.exec_driver_sql(statement)
+
+
+def drop_index(connection: Connection, name: str, table: str):
+    """Drops an index without blocking writes to the table, does nothing when it does not exist"""
+    dialect = connection.dialect.name
+    preparer = connection.dialect.identifier_preparer
+
+    if dialect == "postgresql":
+        _require_autocommit(connection, "drop_index")
+        connection.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {preparer.quote(name)}")
+        return
+
+    if not _index_exists(connection, name, table):
+        return
+
+    if dialect in ("mysql", "mariadb"):
+        connection.exec_driver_sql(
+            f"DROP INDEX {preparer.quote(name)} ON {preparer.quote(table)} ALGORITHM=INPLACE LOCK=NONE"
+        )
+    else:
+        connection.exec_driver_sql(f"DROP INDEX {preparer.quote(name)}")
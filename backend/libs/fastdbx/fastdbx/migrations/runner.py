@@ -0,0 +1,210 @@
+import importlib.util
+import logging
+import os
+import re
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import Table, MetaData, Column, String, DateTime, Float, select, insert, inspect, text
+from sqlalchemy.engine import Connection
+
+from fastdbx.config.schemas import MigrationsConfig
+from fastdbx.core.exception import FastDbxException
+from fastdbx.core.model import BaseEntity
+
+logger = logging.getLogger("fastdbx.migrations")
+
+_MIGRATION_FILE = re.compile(r"^(?P<version>\d+)_(?P<name>\w+)\.(?P<kind>sql|py)$")
+_NO_TRANSACTION = "-- fastdbx: no-transaction"
+
+
+class MigrationException(FastDbxException):
+    pass
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: str
+    name: str
+    transactional: bool
+    upgrade: Callable[[Connection], None]
+
+
+def _sql_migration(version: str, name: str, path: str) -> Migration:
+    """Statements are separated by `;`, a first line `-- fastdbx: no-transaction` runs them in autocommit"""
+    with open(path) as file:
+        script = file.read()
+
+    lines = [line for line in script.splitlines() if not line.strip().startswith("--")]
+    statements = [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+    def upgrade(connection: Connection):
+        for statement in statements:
+            connection.exec_driver_sql(statement)
+
+    return Migration(version, name, not script.startswith(_NO_TRANSACTION), upgrade)
+
+
+def _python_migration(version: str, name: str, path: str) -> Migration:
+    """The module defines upgrade(connection), and TRANSACTIONAL = False to run it in autocommit"""
+    spec = importlib.util.spec_from_file_location(f"fastdbx_migration_{version}_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    if not callable(getattr(module, "upgrade", None)):
+        raise MigrationException(f"Migration {path} does not define upgrade(connection)")
+
+    return Migration(version, name, getattr(module, "TRANSACTIONAL", True), module.upgrade)
+
+
+def load_migrations(directory: str) -> list[Migration]:
+    """The migrations of the directory, named <version>_<name>.sql or .py, in ascending version order"""
+    migrations = {}
+
+    for filename in sorted(os.listdir(directory)):
+        match = _MIGRATION_FILE.match(filename)
+        if match is None:
+            continue
+
+        version, name, kind = match.group("version", "name", "kind")
+        if int(version) in migrations:
+            raise MigrationException(f"Migration version {version} is used by more than one file in {directory}")
+
+        path = os.path.join(directory, filename)
+        load = _sql_migration if kind == "sql" else _python_migration
+        migrations[int(version)] = load(version, name, path)
+
+    return [migrations[version] for version in sorted(migrations)]
+
+
+class MigrationRunner:
+    """Brings the schema of a database up to date with the migrations of a directory
+
+    The versions already applied are kept in a version table, every pending migration runs once, in version order,
+    and is recorded in the same transaction as its changes. Migrations that can not run inside a transaction
+    (e.g. CREATE INDEX CONCURRENTLY) run in autocommit and are recorded once they finish.
+
+    An empty database is created from the models instead, when create_tables is set, and every migration is marked
+    as applied, since the models already describe the latest schema.
+    """
+
+    def __init__(self, config: MigrationsConfig, metadata: MetaData = BaseEntity.metadata):
+        self._directory = config.directory
+        self._metadata = metadata
+        self._version_table = Table(
+            config.table,
+            MetaData(),
+            Column("version", String(64), primary_key=True),
+            Column("name", String(255), nullable=False),
+            Column("applied_at", DateTime, nullable=False),
+            Column("duration", Float, nullable=False),
+        )
+
+    def run(self, connection: Connection, create_tables: bool = False) -> list[str]:
+        """Applies the pending migrations, returns their versions"""
+        migrations = load_migrations(self._directory)
+
+        with self._lock(connection):
+            if self._create_version_table(connection, create_tables):
+                self._record(connection, migrations, duration=0.0)
+                connection.commit()
+                logger.info("Created the schema from the models at version %s", self._head(migrations))
+                return []
+
+            applied = set(connection.execute(select(self._version_table.c.version)).scalars())
+            connection.commit()
+
+            pending = [migration for migration in migrations if migration.version not in applied]
+            for migration in pending:
+                self._apply(connection, migration)
+
+        return [migration.version for migration in pending]
+
+    def _create_version_table(self, connection: Connection, create_tables: bool) -> bool:
+        """Creates the version table when missing, returns whether the schema was created from the models"""
+        inspector = inspect(connection)
+
+        if inspector.has_table(self._version_table.name):
+            return False
+
+        is_empty = not set(inspector.get_table_names()) & set(self._metadata.tables)
+        self._version_table.create(connection)
+
+        if create_tables and is_empty:
+            self._metadata.create_all(connection)
+            return True
+
+        connection.commit()
+        return False
+
+    def _apply(self, connection: Connection, migration: Migration):
+        started = time.perf_counter()
+
+        try:
+            if migration.transactional:
+                with connection.begin():
+                    migration.upgrade(connection)
+                    self._record(connection, [migration], duration=time.perf_counter() - started)
+            else:
+                connection.execution_options(isolation_level="AUTOCOMMIT")
+                try:
+                    migration.upgrade(connection)
+                finally:
+                    # ends the transaction object autobegun in autocommit, the driver already committed every statement
+                    connection.commit()
+                    connection.execution_options(isolation_level=connection.default_isolation_level)
+
+                with connection.begin():
+                    self._record(connection, [migration], duration=time.perf_counter() - started)
+        except Exception as e:
+            raise MigrationException(f"Migration {migration.version}_{migration.name} failed: {e}") from e
+
+        duration = time.perf_counter() - started
+        logger.info("Applied migration %s_%s in %.3fs", migration.version, migration.name, duration)
+
+    def _record(self, connection: Connection, migrations: list[Migration], duration: float):
+        if not migrations:
+            return
+
+        applied_at = datetime.now()
+        connection.execute(
+            insert(self._version_table),
+            [
+                {"version": m.version, "name": m.name, "applied_at": applied_at, "duration": duration}
+                for m in migrations
+            ],
+        )
+
+    @contextmanager
+    def _lock(self, connection: Connection):
+        """Serializes the runners of several instances starting at once, where the database has advisory locks"""
+        dialect = connection.dialect.name
+        key = zlib.crc32(self._version_table.name.encode())
+
+        if dialect == "postgresql":
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": key})
+            connection.commit()
+        elif dialect in ("mysql", "mariadb"):
+            connection.execute(text("SELECT GET_LOCK(:key, -1)"), {"key": str(key)})
+            connection.commit()
+
+        try:
+            yield
+        finally:
+            if connection.in_transaction():
+                connection.rollback()
+
+            if dialect == "postgresql":
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                connection.commit()
+            elif dialect in ("mysql", "mariadb"):
+                connection.execute(text("SELECT RELEASE_LOCK(:key)"), {"key": str(key)})
+                connection.commit()
+
+    @staticmethod
+    def _head(migrations: list[Migration]) -> str:
+        return migrations[-1].version if migrations else "0"
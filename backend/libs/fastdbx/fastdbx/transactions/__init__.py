@@ -1,2 +1,3 @@
-from .manager import TransactionManager
+from .manager import Propagation, TransactionManager, AsyncTransactionManager
 from .meta import TransactionalMetaclass, transactional
+from .tracing import TransactionTrace, set_tracer, log_transaction
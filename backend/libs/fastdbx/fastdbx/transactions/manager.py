@@ -1,8 +1,23 @@
+from enum import Enum
 from typing import Union
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 
+class Propagation(Enum):
+    """How a transactional function behaves when it is called inside another transaction
+
+    REQUIRED joins the surrounding transaction, or starts one when there is none
+    REQUIRES_NEW always starts an independent transaction on a new session, suspending the surrounding one
+    NESTED runs inside a savepoint of the surrounding transaction, or starts one when there is none
+    """
+
+    REQUIRED = "REQUIRED"
+    REQUIRES_NEW = "REQUIRES_NEW"
+    NESTED = "NESTED"
+
+
 class TransactionManager:
 
     def __init__(
@@ -12,6 +27,7 @@ class TransactionManager:
     ):
         self.session = session
         self.rollback_for = rollback_for
+        self.committed = False
 
     def __enter__(self):
         self.session.begin()
@@ -22,9 +38,55 @@ class TransactionManager:
             self.session.rollback()
         else:
             self.session.commit()
+            self.committed = True
 
     def _should_rollback(self, exc_type) -> bool:
         if self.rollback_for is None:
             return True
 
         return issubclass(exc_type, self.rollback_for)
+
+
+class AsyncTransactionManager(TransactionManager):
+    session: AsyncSession
+
+    async def __aenter__(self):
+        await self.session.begin()
+        return self.session
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None and self._should_rollback(exc_type):
+            await self.session.rollback()
+        else:
+            await self.session.commit()
+            self.committed = True
+
+
+class NestedTransactionManager(TransactionManager):
+    """Wraps a savepoint of the session's current transaction, rolling back only the savepoint"""
+
+    def __enter__(self):
+        self._savepoint = self.session.begin_nested()
+        return self.session
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None and self._should_rollback(exc_type):
+            self._savepoint.rollback()
+        else:
+            self._savepoint.commit()
+            self.committed = True
+
+
+class AsyncNestedTransactionManager(AsyncTransactionManager):
+    """Wraps a savepoint of the async session's current transaction, rolling back only the savepoint"""
+
+    async def __aenter__(self):
+        self._savepoint = await self.session.begin_nested()
+        return self.session
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None and self._should_rollback(exc_type):
+            await self._savepoint.rollback()
+        else:
+            await self._savepoint.commit()
+            self.committed = True
@@ -1,8 +1,17 @@
+import inspect
+from contextlib import nullcontext
 from functools import wraps
-from typing import Any, Type, Union, Callable
+from typing import Any, Type, Union, Callable, Iterator
 
 from fastdbx import Datasource
-from fastdbx.transactions.manager import TransactionManager
+from fastdbx.transactions.manager import (
+    Propagation,
+    TransactionManager,
+    AsyncTransactionManager,
+    NestedTransactionManager,
+    AsyncNestedTransactionManager,
+)
+from fastdbx.transactions.tracing import get_tracer, TransactionTraceScope
 
 _transactional_method_prefixes = ("save", "update", "delete")
 
@@ -13,17 +22,125 @@ def _should_decorate_transactional(
     return any(name.startswith(p) for p in prefixes)
 
 
+def _bound_steps(datasource: Datasource, session, generator: Iterator) -> Iterator:
+    """Advances the generator with the session bound around each step only
+
+    A generator consumed by a streaming response is resumed from a different context on every step,
+    so the session can not stay bound to the context the generator was started from
+    """
+    try:
+        while True:
+            with datasource.bind(session):
+                try:
+                    value = next(generator)
+                except StopIteration:
+                    return
+
+            yield value
+    finally:
+        with datasource.bind(session):
+            generator.close()
+
+
 def transactional(
     rollback_for: Union[type[Exception], tuple[type[Exception]], None] = None,
+    read_only: bool = False,
+    propagation: Propagation = Propagation.REQUIRED,
 ):
+    """Runs the decorated function inside a transaction
+
+    read_only transactions are routed to one of the configured replicas, falling back to the primary
+    when there are none available, and refuse to flush any changes. propagation decides what happens
+    when the function is called while another transaction is active, see Propagation
+
+    Generator functions run their transaction from the first to the last item they yield, it is committed once
+    they are exhausted, closing them early counts as a GeneratorExit raised by the function. They are not traced
+    """
+
     def decorator(func: Callable) -> Callable:
+        name = func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                datasource = Datasource.instance()
+                current = datasource.context
+
+                if current is not None and propagation is Propagation.REQUIRED:
+                    return await func(*args, **kwargs)
+
+                if current is not None and propagation is Propagation.NESTED:
+                    session_scope = nullcontext(current)
+                    manager_class = AsyncNestedTransactionManager
+                else:
+                    session_scope = datasource.async_session(read_only)
+                    manager_class = AsyncTransactionManager
+
+                tracer = get_tracer()
+
+                if tracer is None:
+                    async with session_scope as session:
+                        async with manager_class(session, rollback_for):
+                            return await func(*args, **kwargs)
+
+                with TransactionTraceScope(tracer, name, read_only) as scope:
+                    async with session_scope as session:
+                        async with scope.track(manager_class(session, rollback_for)):
+                            return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        if inspect.isgeneratorfunction(func):
+
+            @wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                datasource = Datasource.instance()
+                current = datasource.context
+
+                if current is not None and propagation is Propagation.REQUIRED:
+                    yield from func(*args, **kwargs)
+                    return
+
+                if current is not None and propagation is Propagation.NESTED:
+                    session_scope = nullcontext(current)
+                    manager_class = NestedTransactionManager
+                else:
+                    session_scope = datasource.unbound_session(read_only)
+                    manager_class = TransactionManager
+
+                with session_scope as session:
+                    with manager_class(session, rollback_for):
+                        yield from _bound_steps(datasource, session, func(*args, **kwargs))
+
+            return generator_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            print(args, kwargs)
             datasource = Datasource.instance()
-            with datasource.session() as session:
-                with TransactionManager(session, rollback_for):
-                    return func(*args, **kwargs)
+            current = datasource.context
+
+            if current is not None and propagation is Propagation.REQUIRED:
+                return func(*args, **kwargs)
+
+            if current is not None and propagation is Propagation.NESTED:
+                session_scope = nullcontext(current)
+                manager_class = NestedTransactionManager
+            else:
+                session_scope = datasource.session(read_only)
+                manager_class = TransactionManager
+
+            tracer = get_tracer()
+
+            if tracer is None:
+                with session_scope as session:
+                    with manager_class(session, rollback_for):
+                        return func(*args, **kwargs)
+
+            with TransactionTraceScope(tracer, name, read_only) as scope:
+                with session_scope as session:
+                    with scope.track(manager_class(session, rollback_for)):
+                        return func(*args, **kwargs)
 
         return wrapper
 
@@ -39,4 +156,4 @@ class TransactionalMetaclass(type):
     def apply_transactional(cls, attrs: dict[str, Any]) -> None:
         for attr_name, attr_value in attrs.items():
             if callable(attr_value) and _should_decorate_transactional(name=attr_name):
-                attrs[attr_name] = transactional(attr_value)
+                attrs[attr_name] = transactional()(attr_value)
@@ -0,0 +1,108 @@
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("fastdbx.transactions")
+
+
+@dataclass
+class TransactionTrace:
+    name: str
+    duration: float
+    read_only: bool
+    rolled_back: bool
+    rollback_reason: Optional[str]
+    statement_count: int
+
+
+Tracer = Callable[[TransactionTrace], None]
+
+_tracer: Optional[Tracer] = None
+_statement_count: ContextVar[Optional[list[int]]] = ContextVar("fastdbx_statement_count", default=None)
+
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    """Installs the callable receiving a TransactionTrace after every transaction, None disables tracing
+
+    Statements are only counted while a tracer is installed, with no tracer the transactional wrappers skip
+    tracing entirely
+    """
+    global _tracer
+
+    is_counting = event.contains(Engine, "before_cursor_execute", _count_statement)
+
+    if tracer is not None and not is_counting:
+        event.listen(Engine, "before_cursor_execute", _count_statement)
+    elif tracer is None and is_counting:
+        event.remove(Engine, "before_cursor_execute", _count_statement)
+
+    _tracer = tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def log_transaction(trace: TransactionTrace) -> None:
+    """Tracer writing every trace to the fastdbx.transactions logger"""
+    logger.debug(
+        "%s finished in %.3fms with %d statements%s",
+        trace.name,
+        trace.duration * 1000,
+        trace.statement_count,
+        f", rolled back: {trace.rollback_reason}" if trace.rolled_back else "",
+        extra={"transaction": trace},
+    )
+
+
+class TransactionTraceScope:
+    """Measures one transaction and hands its trace to the tracer on exit"""
+
+    def __init__(self, tracer: Tracer, name: str, read_only: bool):
+        self._tracer = tracer
+        self._name = name
+        self._read_only = read_only
+        self._manager = None
+        self._counter = [0]
+        self._token = None
+        self._start = 0.0
+
+    def track(self, manager):
+        self._manager = manager
+        return manager
+
+    def __enter__(self) -> "TransactionTraceScope":
+        self._token = _statement_count.set(self._counter)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        duration = time.perf_counter() - self._start
+        _statement_count.reset(self._token)
+        rolled_back = exc_val is not None and not (self._manager is not None and self._manager.committed)
+
+        trace = TransactionTrace(
+            name=self._name,
+            duration=duration,
+            read_only=self._read_only,
+            rolled_back=rolled_back,
+            rollback_reason=f"{exc_type.__name__}: {exc_val}" if rolled_back else None,
+            statement_count=self._counter[0],
+        )
+
+        try:
+            self._tracer(trace)
+        except Exception:
+            logger.exception("Transaction tracer failed for %s", self._name)
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _statement_count.get()
+
+    if counter is not None:
+        counter[0] += 1
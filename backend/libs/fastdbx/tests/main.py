@@ -1,10 +1,21 @@
+import contextvars
+import os
+import tempfile
 import unittest
 
-from sqlalchemy import Column, Text, Integer
+from sqlalchemy import Column, Text, Integer, ForeignKey, create_engine, select, bindparam
+from sqlalchemy.orm import relationship, selectinload
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError, OperationalError
 
-from fastdbx import CrudRepository, Datasource
-from fastdbx.core import BaseEntity
-from fastdbx.transactions.meta import transactional
+from fastdbx import CrudRepository, AsyncCrudRepository, Datasource
+from fastdbx.config.schemas import FastDbxConfig, EngineConfig, MigrationsConfig
+from fastdbx.core import BaseEntity, Page, InvalidCursorException, prepared
+from fastdbx.core.exception import FastDbxException, TransactionalException
+from fastdbx.core.lazyload import NPlusOneWarning
+from fastdbx.core.pagination import encode_cursor, decode_cursor
+from fastdbx.migrations import MigrationRunner, MigrationException
+from fastdbx.transactions import Propagation, TransactionTrace, set_tracer
+from fastdbx.transactions.meta import transactional, TransactionalMetaclass
 
 
 class Item(BaseEntity):
@@ -13,12 +24,41 @@ class Item(BaseEntity):
     id: int = Column(Integer, primary_key=True)
     name: str = Column(Text)
 
+    tags = relationship("ItemTag")
+
+
+class ItemTag(BaseEntity):
+    __tablename__ = "item_tag"
+
+    id: int = Column(Integer, primary_key=True)
+    item_id: int = Column(Integer, ForeignKey("item.id"))
+    label: str = Column(Text)
+
 
 class ItemRepository(CrudRepository):
     def __init__(self):
         super().__init__(Item)
 
 
+class PreparedItemRepository(CrudRepository):
+    def __init__(self):
+        super().__init__(Item)
+
+    @prepared
+    def _by_name():
+        return select(Item).where(Item.name == bindparam("name"))
+
+    def find_by_name(self, name: str) -> list[Item]:
+        return self.session.scalars(self._by_name, {"name": name}).all()
+
+
+class TaggedItemRepository(CrudRepository):
+    load_options = (selectinload(Item.tags),)
+
+    def __init__(self):
+        super().__init__(Item)
+
+
 class CustomException(Exception):
     pass
 
@@ -66,6 +106,115 @@ class ItemService:
     def is_item_name_valid(self, item_name: str) -> bool:
         return item_name != "invalid"
 
+    @transactional()
+    def create_items(self, names: list[str]) -> list[Item]:
+        return self.repo.save_all([Item(name=name) for name in names])
+
+    @transactional()
+    def get_items_by_ids(self, ids: list[int]) -> list[Item]:
+        return self.repo.find_by_ids(ids)
+
+    @transactional()
+    def delete_items(self, ids: list[int]) -> int:
+        return self.repo.delete_by_ids(ids)
+
+    @transactional()
+    def upsert_items(self, rows: list[dict], update=None) -> int:
+        return self.repo.upsert_many(rows, conflict_columns=["id"], update=update)
+
+    @transactional(read_only=True)
+    def get_items_page(self, limit: int, cursor: str = None) -> Page[Item]:
+        return self.repo.find_page(limit=limit, cursor=cursor)
+
+    @transactional(read_only=True)
+    def get_item_names_streamed(self, batch_size: int) -> list[str]:
+        return [item.name for item in self.repo.stream(batch_size=batch_size)]
+
+    @transactional(read_only=True)
+    def iterate_item_names(self, batch_size: int):
+        for item in self.repo.stream(batch_size=batch_size):
+            yield item.name
+
+    @transactional(rollback_for=CustomException)
+    def create_items_lazily(self, names: list[str]):
+        for name in names:
+            if not self.is_item_name_valid(name):
+                raise CustomException(f"Could not create item {name}. Not creating anything")
+            yield self.repo.save(Item(name=name)).id
+
+
+class AsyncItemRepository(AsyncCrudRepository):
+    def __init__(self):
+        super().__init__(Item)
+
+
+class AsyncItemService:
+
+    def __init__(self, repo: AsyncItemRepository):
+        self.repo = repo
+
+    @transactional()
+    async def get_item_by_id(self, id: int) -> Item:
+        return await self.repo.find_by_id(id)
+
+    @transactional()
+    async def get_all_items(self) -> list[Item]:
+        return await self.repo.find_all()
+
+    @transactional()
+    async def create_item(self, name: str) -> Item:
+        return await self.repo.save(Item(name=name))
+
+    @transactional()
+    async def update_item(self, item_id: int, name: str) -> Item:
+        item_to_update = await self.repo.find_by_id(item_id)
+        return await self.repo.save(item_to_update, name=name)
+
+    @transactional()
+    async def delete_item(self, item_id: int) -> bool:
+        return await self.repo.delete_by_id(item_id)
+
+    @transactional(read_only=True)
+    async def get_items_page(self, limit: int, cursor: str = None) -> Page[Item]:
+        return await self.repo.find_page(limit=limit, cursor=cursor)
+
+    @transactional(read_only=True)
+    async def get_item_names_streamed(self, batch_size: int) -> list[str]:
+        return [item.name async for item in self.repo.stream(batch_size=batch_size)]
+
+    @transactional(rollback_for=CustomException)
+    async def create_item_then_fail(self, name: str):
+        await self.repo.save(Item(name=name))
+        raise CustomException("Not creating anything")
+
+    @transactional(propagation=Propagation.NESTED)
+    async def create_item_then_fail_nested(self, name: str):
+        await self.repo.save(Item(name=name))
+        raise CustomException("Rolling back the savepoint only")
+
+    @transactional(rollback_for=CustomException, propagation=Propagation.NESTED)
+    async def create_item_then_fail_nested_without_rollback(self, name: str):
+        await self.repo.save(Item(name=name))
+        raise ValueError("Not in rollback_for, releasing the savepoint")
+
+    @transactional()
+    async def create_item_with_released_savepoint(self, name: str, nested_name: str):
+        await self.repo.save(Item(name=name))
+
+        try:
+            await self.create_item_then_fail_nested_without_rollback(nested_name)
+        except ValueError:
+            pass
+
+    @transactional()
+    async def create_item_with_failing_savepoint(self, name: str, nested_name: str):
+        await self.repo.save(Item(name=name))
+
+        try:
+            await self.create_item_then_fail_nested(nested_name)
+        except CustomException:
+            pass
+
 
 class TestItemService(unittest.TestCase):
     def setUp(self):
@@ -119,6 +268,111 @@ class TestItemService(unittest.TestCase):
         self.assertEqual(refreshed_i1.name, "item1")
         self.assertEqual(refreshed_i2.name, "item2")
 
+    def test_saveAll_findByIds(self):
+        items = self.item_service.create_items(["item1", "item2", "item3"])
+        self.assertTrue(all(item.id is not None for item in items))
+
+        found = self.item_service.get_items_by_ids([items[0].id, items[2].id])
+        self.assertEqual(sorted(item.name for item in found), ["item1", "item3"])
+
+    def test_deleteByIds(self):
+        items = self.item_service.create_items(["item1", "item2", "item3"])
+
+        deleted = self.item_service.delete_items([items[0].id, items[1].id])
+
+        self.assertEqual(deleted, 2)
+        self.assertEqual([item.name for item in self.item_service.get_all_items()], ["item3"])
+
+    def test_upsertMany_insertsAndUpdates(self):
+        existing = self.item_service.create_item("old name")
+
+        self.item_service.upsert_items([
+            {"id": existing.id, "name": "new name"},
+            {"id": existing.id + 1, "name": "inserted"},
+        ])
+
+        items = {item.id: item.name for item in self.item_service.get_all_items()}
+        self.assertEqual(items, {existing.id: "new name", existing.id + 1: "inserted"})
+
+    def test_upsertMany_withUpdateExpression(self):
+        existing = self.item_service.create_item("name")
+
+        self.item_service.upsert_items(
+            [{"id": existing.id, "name": "-suffix"}],
+            update={"name": lambda excluded: Item.name + excluded.name},
+        )
+
+        self.assertEqual(self.item_service.get_item_by_id(existing.id).name, "name-suffix")
+
+    def test_upsertMany_doNothingOnConflict(self):
+        existing = self.item_service.create_item("name")
+
+        self.item_service.upsert_items([{"id": existing.id, "name": "ignored"}], update=[])
+
+        self.assertEqual(self.item_service.get_item_by_id(existing.id).name, "name")
+
+    def test_findPage_followsCursorToLastPage(self):
+        self.item_service.create_items([f"item{i}" for i in range(5)])
+
+        first = self.item_service.get_items_page(limit=2)
+        second = self.item_service.get_items_page(limit=2, cursor=first.next_cursor)
+        last = self.item_service.get_items_page(limit=2, cursor=second.next_cursor)
+
+        pages = [[item.name for item in page.items] for page in (first, second, last)]
+        self.assertEqual(pages, [["item0", "item1"], ["item2", "item3"], ["item4"]])
+        self.assertIsNone(last.next_cursor)
+
+    def test_findPage_invalidCursor(self):
+        with self.assertRaises(InvalidCursorException):
+            self.item_service.get_items_page(limit=2, cursor="not-a-cursor")
+
+    def test_cursor_keepsItsKey(self):
+        self.assertEqual(decode_cursor(encode_cursor(4, key="offset"), key="offset"), 4)
+
+        for cursor in (encode_cursor(4), encode_cursor(True, key="offset")):
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursorException):
+                decode_cursor(cursor, key="offset")
+
+    def test_stream_yieldsAllInBatches(self):
+        self.item_service.create_items([f"item{i}" for i in range(5)])
+
+        names = self.item_service.get_item_names_streamed(batch_size=2)
+
+        self.assertEqual(names, [f"item{i}" for i in range(5)])
+
+    def test_transactionalGenerator_resumedFromOtherContexts(self):
+        self.item_service.create_items([f"item{i}" for i in range(5)])
+        names = self.item_service.iterate_item_names(batch_size=2)
+
+        # a streaming response advances the generator from a copy of the context on every step
+        streamed = [contextvars.copy_context().run(next, names) for _ in range(5)]
+
+        self.assertEqual(streamed, [f"item{i}" for i in range(5)])
+        self.assertRaises(StopIteration, next, names)
+        self.assertIsNone(Datasource._instance.context)
+
+    def test_transactionalGenerator_commitsWhenExhausted(self):
+        ids = list(self.item_service.create_items_lazily(["first", "second"]))
+
+        self.assertEqual([item.name for item in self.item_service.get_items_by_ids(ids)], ["first", "second"])
+
+    def test_transactionalGenerator_rollsBackOnException(self):
+        with self.assertRaises(CustomException):
+            list(self.item_service.create_items_lazily(["first", "invalid"]))
+
+        self.assertEqual(self.item_service.get_all_items(), [])
+
+    def test_preparedQuery_builtOnceAndReused(self):
+        self.item_service.create_items(["first", "second"])
+        repo = PreparedItemRepository()
+
+        @transactional(read_only=True)
+        def find_by_names(names: list[str]) -> list[list[str]]:
+            return [[item.name for item in repo.find_by_name(name)] for name in names]
+
+        self.assertIs(repo._by_name, PreparedItemRepository()._by_name)
+        self.assertEqual(find_by_names(["first", "second", "third"]), [["first"], ["second"], []])
+
     def test_isItemNameValid_sessionContextIsNone(self):
         self.assertIsNone(Datasource._instance.context)
 
@@ -128,5 +382,504 @@ class TestItemService(unittest.TestCase):
         self.assertIsNone(Datasource._instance.context)
 
 
+class TestAsyncItemService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        settings = FastDbxConfig(
+            engine=EngineConfig(url="sqlite+aiosqlite:///:memory:", echo=False),
+            use_async=True,
+        )
+        Datasource._instance = Datasource(settings)
+        await Datasource._instance.astartup()
+        self.item_service = AsyncItemService(repo=AsyncItemRepository())
+
+    async def asyncTearDown(self):
+        await Datasource._instance.ashutdown()
+
+    async def test_create_item(self):
+        item = await self.item_service.create_item("new item")
+        self.assertIsNotNone(item.id, "item id should not be None")
+        self.assertEqual(item.name, "new item")
+
+    async def test_update_item(self):
+        item = await self.item_service.create_item("old name")
+        updated = await self.item_service.update_item(item.id, "new name")
+        self.assertEqual(updated.name, "new name")
+
+    async def test_delete_item(self):
+        item = await self.item_service.create_item("to be deleted")
+        is_deleted = await self.item_service.delete_item(item.id)
+        self.assertTrue(is_deleted)
+        self.assertIsNone(await self.item_service.get_item_by_id(item.id))
+
+    async def test_findPage_and_stream(self):
+        for name in ("item0", "item1", "item2"):
+            await self.item_service.create_item(name)
+
+        first = await self.item_service.get_items_page(limit=2)
+        last = await self.item_service.get_items_page(limit=2, cursor=first.next_cursor)
+
+        self.assertEqual([item.name for item in first.items + last.items], ["item0", "item1", "item2"])
+        self.assertIsNone(last.next_cursor)
+        self.assertEqual(await self.item_service.get_item_names_streamed(batch_size=2), ["item0", "item1", "item2"])
+
+    async def test_rollback_on_exception(self):
+        with self.assertRaises(CustomException):
+            await self.item_service.create_item_then_fail("rolled back")
+
+        self.assertEqual(await self.item_service.get_all_items(), [])
+        self.assertIsNone(Datasource._instance.context)
+
+    async def test_nested_rollsBackSavepointOnly(self):
+        await self.item_service.create_item_with_failing_savepoint("outer", "nested")
+
+        items = await self.item_service.get_all_items()
+        self.assertEqual([item.name for item in items], ["outer"])
+
+    async def test_nested_exceptionNotInRollbackFor_releasesSavepoint(self):
+        await self.item_service.create_item_with_released_savepoint("outer", "nested")
+
+        items = await self.item_service.get_all_items()
+        self.assertEqual([item.name for item in items], ["outer", "nested"])
+
+    async def test_sync_operations_are_rejected(self):
+        with self.assertRaises(FastDbxException):
+            Datasource._instance.startup()
+
+
+class TestTransactionTracing(unittest.TestCase):
+    def setUp(self):
+        Datasource._instance = Datasource()
+        Datasource._instance.startup()
+        self.item_service = ItemService(repo=ItemRepository())
+        self.traces: list[TransactionTrace] = []
+        set_tracer(self.traces.append)
+
+    def tearDown(self):
+        set_tracer(None)
+        Datasource._instance.shutdown()
+
+    def test_tracer_receivesCommittedTransaction(self):
+        self.item_service.create_item("traced")
+
+        self.assertEqual(len(self.traces), 1)
+        trace = self.traces[0]
+        self.assertEqual(trace.name, "ItemService.create_item")
+        self.assertFalse(trace.rolled_back)
+        self.assertIsNone(trace.rollback_reason)
+        self.assertGreaterEqual(trace.statement_count, 2)
+        self.assertGreater(trace.duration, 0)
+
+    def test_tracer_receivesRollbackReason(self):
+        item = self.item_service.create_item("item")
+
+        with self.assertRaises(CustomException):
+            self.item_service.batch_update([(item.id, "invalid")])
+
+        trace = self.traces[-1]
+        self.assertTrue(trace.rolled_back)
+        self.assertIn("CustomException", trace.rollback_reason)
+
+    def test_disabledTracer_recordsNothing(self):
+        set_tracer(None)
+
+        self.item_service.create_item("untraced")
+
+        self.assertEqual(self.traces, [])
+
+
+class TestTransactionalMetaclass(unittest.TestCase):
+    def setUp(self):
+        Datasource._instance = Datasource()
+        Datasource._instance.startup()
+
+    def tearDown(self):
+        Datasource._instance.shutdown()
+
+    def test_prefixedMethods_runInsideTransaction(self):
+        class MetaItemService(metaclass=TransactionalMetaclass):
+            def save_item(self, name: str) -> Item:
+                return ItemRepository().save(Item(name=name))
+
+        item = MetaItemService().save_item("saved")
+
+        self.assertIsNotNone(item.id)
+
+
+class ComposedItemService:
+
+    def __init__(self, item_service: ItemService):
+        self.item_service = item_service
+        self.repo = item_service.repo
+        self.sessions = []
+
+    @transactional()
+    def create_item_joining_outer(self, name: str) -> Item:
+        self.sessions.append(Datasource._instance.context)
+        return self.repo.save(Item(name=name))
+
+    @transactional(propagation=Propagation.NESTED)
+    def create_item_then_fail_nested(self, name: str):
+        self.repo.save(Item(name=name))
+        raise CustomException("Rolling back the savepoint only")
+
+    @transactional(propagation=Propagation.REQUIRES_NEW)
+    def create_item_in_new_transaction(self, name: str) -> Item:
+        self.sessions.append(Datasource._instance.context)
+        return self.repo.save(Item(name=name))
+
+    @transactional()
+    def create_two_items_then_fail(self, first: str, second: str):
+        self.sessions.append(Datasource._instance.context)
+        self.repo.save(Item(name=first))
+        self.create_item_joining_outer(second)
+        raise CustomException("Rolling back both items")
+
+    @transactional()
+    def create_item_with_failing_savepoint(self, name: str, nested_name: str):
+        self.repo.save(Item(name=name))
+
+        try:
+            self.create_item_then_fail_nested(nested_name)
+        except CustomException:
+            pass
+
+    @transactional()
+    def create_item_in_new_transaction_then_fail(self, name: str):
+        self.sessions.append(Datasource._instance.context)
+        self.create_item_in_new_transaction(name)
+        self.sessions.append(Datasource._instance.context)
+        raise CustomException("Not rolling back the independent transaction")
+
+
+class TestTransactionPropagation(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        settings = FastDbxConfig(
+            engine=EngineConfig(url=f"sqlite:///{os.path.join(self.tmpdir.name, 'items.db')}", echo=False),
+        )
+        Datasource._instance = Datasource(settings)
+        Datasource._instance.startup()
+        self.item_service = ItemService(repo=ItemRepository())
+        self.composed_service = ComposedItemService(self.item_service)
+
+    def tearDown(self):
+        Datasource._instance.shutdown()
+        self.tmpdir.cleanup()
+
+    def _item_names(self) -> list[str]:
+        return sorted(item.name for item in self.item_service.get_all_items())
+
+    def test_required_joinsOuterTransaction(self):
+        with self.assertRaises(CustomException):
+            self.composed_service.create_two_items_then_fail("first", "second")
+
+        outer_session, inner_session = self.composed_service.sessions
+        self.assertIs(outer_session, inner_session)
+        self.assertEqual(self._item_names(), [])
+        self.assertIsNone(Datasource._instance.context)
+
+    def test_nested_rollsBackSavepointOnly(self):
+        self.composed_service.create_item_with_failing_savepoint("outer", "nested")
+
+        self.assertEqual(self._item_names(), ["outer"])
+        self.assertIsNone(Datasource._instance.context)
+
+    def test_requiresNew_commitsIndependently(self):
+        with self.assertRaises(CustomException):
+            self.composed_service.create_item_in_new_transaction_then_fail("independent")
+
+        outer_session, inner_session, restored_session = self.composed_service.sessions
+        self.assertIsNot(outer_session, inner_session)
+        self.assertIs(outer_session, restored_session)
+        self.assertEqual(self._item_names(), ["independent"])
+        self.assertIsNone(Datasource._instance.context)
+
+
+class TestLoadOptions(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        settings = FastDbxConfig(
+            engine=EngineConfig(url=f"sqlite:///{os.path.join(self.tmpdir.name, 'items.db')}", echo=False),
+            n_plus_one_threshold=2,
+        )
+        Datasource._instance = Datasource(settings)
+        Datasource._instance.startup()
+        self._create_tagged_items()
+
+    def tearDown(self):
+        Datasource._instance.shutdown()
+        self.tmpdir.cleanup()
+
+    @transactional()
+    def _create_tagged_items(self):
+        ItemRepository().save_all([
+            Item(name="first", tags=[ItemTag(label="a"), ItemTag(label="b")]),
+            Item(name="second", tags=[ItemTag(label="c")]),
+        ])
+
+    def test_loadOptions_appliedByFinders(self):
+        @transactional(read_only=True)
+        def get_items() -> list[Item]:
+            return TaggedItemRepository().find_all()
+
+        items = get_items()
+
+        self.assertEqual([len(item.tags) for item in items], [2, 1])
+
+    def test_explicitOptions_overrideLoadOptions(self):
+        @transactional(read_only=True)
+        def get_items() -> list[Item]:
+            return ItemRepository().find_by_ids([1, 2], selectinload(Item.tags))
+
+        items = get_items()
+
+        self.assertEqual(sorted(tag.label for item in items for tag in item.tags), ["a", "b", "c"])
+
+    def test_repeatedLazyLoads_warnNPlusOne(self):
+        @transactional(read_only=True)
+        def count_tags() -> int:
+            return sum(len(item.tags) for item in ItemRepository().find_all())
+
+        with self.assertWarns(NPlusOneWarning):
+            self.assertEqual(count_tags(), 3)
+
+
+class TestPoolMetrics(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        settings = FastDbxConfig(
+            engine=EngineConfig(
+                url=f"sqlite:///{os.path.join(self.tmpdir.name, 'pool.db')}",
+                echo=False,
+                pool_size=1,
+                max_overflow=0,
+                pool_timeout=0.05,
+                pool_pre_ping=True,
+            ),
+        )
+        self.datasource = Datasource(settings)
+
+    def tearDown(self):
+        self.datasource._engine.dispose()
+        self.tmpdir.cleanup()
+
+    def test_engineConfig_unsetPoolOptionsAreNotPassed(self):
+        self.assertEqual(EngineConfig(url="sqlite://").dict(), {"url": "sqlite://", "echo": True, "pool_pre_ping": False})
+
+    def test_poolStatistics_tracksCheckedOutConnections(self):
+        with self.datasource._engine.connect():
+            statistics = self.datasource.pool_statistics
+            self.assertEqual(statistics.size, 1)
+            self.assertEqual(statistics.checked_out, 1)
+
+        statistics = self.datasource.pool_statistics
+        self.assertEqual(statistics.checked_out, 0)
+        self.assertEqual(statistics.checked_in, 1)
+        self.assertEqual(statistics.checkouts, 1)
+        self.assertEqual(sum(statistics.wait_time_histogram.values()), 1)
+
+    def test_poolStatistics_countsTimeouts(self):
+        with self.datasource._engine.connect():
+            with self.assertRaises(PoolTimeoutError):
+                self.datasource._engine.connect()
+
+        statistics = self.datasource.pool_statistics
+        self.assertEqual(statistics.timeouts, 1)
+        self.assertEqual(sum(statistics.wait_time_histogram.values()), 2)
+        self.assertGreaterEqual(statistics.total_wait_time, 0.05)
+
+    def test_poolStatistics_keepCountingAfterDispose(self):
+        with self.datasource._engine.connect():
+            pass
+
+        self.datasource._engine.dispose()
+
+        with self.datasource._engine.connect():
+            statistics = self.datasource.pool_statistics
+            self.assertEqual(statistics.checked_out, 1)
+            self.assertEqual(statistics.checkouts, 2)
+            self.assertEqual(sum(statistics.wait_time_histogram.values()), 2)
+
+        self.assertEqual(self.datasource.pool_statistics.checked_in, 1)
+
+
+class TestReadReplicaRouting(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.primary_url = f"sqlite:///{os.path.join(self.tmpdir.name, 'primary.db')}"
+        self.replica_url = f"sqlite:///{os.path.join(self.tmpdir.name, 'replica.db')}"
+        self.unreachable_url = f"sqlite:///{os.path.join(self.tmpdir.name, 'missing', 'replica.db')}"
+
+    def tearDown(self):
+        Datasource._instance.shutdown()
+        self.tmpdir.cleanup()
+
+    def _start_datasource(self, *replica_urls: str):
+        settings = FastDbxConfig(
+            engine=EngineConfig(url=self.primary_url, echo=False),
+            replicas=[EngineConfig(url=url, echo=False) for url in replica_urls],
+            replica_retry_after=60,
+        )
+        Datasource._instance = Datasource(settings)
+        Datasource._instance.startup()
+        return ItemService(repo=ItemRepository())
+
+    def _create_replica_tables(self):
+        engine = create_engine(self.replica_url)
+        with engine.begin() as connection:
+            BaseEntity.metadata.create_all(connection)
+        engine.dispose()
+
+    def test_readOnlyTransaction_isRoutedToReplica(self):
+        self._create_replica_tables()
+        item_service = self._start_datasource(self.replica_url)
+        item_service.create_item("written to primary")
+
+        @transactional(read_only=True)
+        def count_items_on_replica() -> int:
+            return len(ItemRepository().find_all())
+
+        self.assertEqual(len(item_service.get_all_items()), 1)
+        self.assertEqual(count_items_on_replica(), 0)
+
+    def test_readOnlyTransaction_rejectsWrites(self):
+        item_service = self._start_datasource()
+
+        @transactional(read_only=True)
+        def create_item_in_read_only_transaction():
+            return ItemRepository().save(Item(name="rejected"))
+
+        with self.assertRaises(TransactionalException):
+            create_item_in_read_only_transaction()
+
+        self.assertEqual(item_service.get_all_items(), [])
+
+    def test_unreachableReplica_fallsBackToPrimary(self):
+        item_service = self._start_datasource(self.unreachable_url)
+        item_service.create_item("written to primary")
+
+        @transactional(read_only=True)
+        def get_items() -> list[Item]:
+            return ItemRepository().find_all()
+
+        with self.assertRaises(OperationalError):
+            get_items()
+
+        self.assertFalse(Datasource._instance._replica_router.is_healthy(0))
+        self.assertEqual(len(get_items()), 1)
+
+    def test_statementError_keepsReplicaHealthy(self):
+        self._start_datasource(self.replica_url)
+
+        @transactional(read_only=True)
+        def get_items() -> list[Item]:
+            return ItemRepository().find_all()
+
+        with self.assertRaises(OperationalError):
+            get_items()  # the replica has no tables
+
+        self.assertTrue(Datasource._instance._replica_router.is_healthy(0))
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmpdir.name, "migrations")
+        os.mkdir(self.directory)
+        self.url = f"sqlite:///{os.path.join(self.tmpdir.name, 'migrations.db')}"
+        self.engine = create_engine(self.url)
+        self.runner = MigrationRunner(MigrationsConfig(directory=self.directory))
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmpdir.cleanup()
+
+    def _write(self, filename: str, content: str):
+        with open(os.path.join(self.directory, filename), "w") as file:
+            file.write(content)
+
+    def _run(self, create_tables: bool = False) -> list[str]:
+        with self.engine.connect() as connection:
+            return self.runner.run(connection, create_tables=create_tables)
+
+    def _query(self, sql: str) -> list[tuple]:
+        with self.engine.connect() as connection:
+            return [tuple(row) for row in connection.exec_driver_sql(sql)]
+
+    def _create_tables(self):
+        with self.engine.begin() as connection:
+            BaseEntity.metadata.create_all(connection)
+
+    def test_emptyDatabase_isCreatedFromModelsAndStamped(self):
+        self._write("0001_add_item_price.sql", "ALTER TABLE item ADD COLUMN price INTEGER;")
+
+        self.assertEqual(self._run(create_tables=True), [])
+        self.assertEqual(self._query("SELECT version, name FROM fastdbx_schema_version"), [("0001", "add_item_price")])
+        self.assertIn(("item",), self._query("SELECT name FROM sqlite_master WHERE type = 'table'"))
+        self.assertEqual(self._run(create_tables=True), [])
+
+    def test_existingDatabase_appliesPendingMigrationsInOrder(self):
+        self._create_tables()
+        self._write("0002_seed_items.sql", "-- prices are added by 0001\nINSERT INTO item (name, price) VALUES ('a', 1);")
+        self._write("0001_add_item_price.sql", "ALTER TABLE item ADD COLUMN price INTEGER;")
+
+        self.assertEqual(self._run(), ["0001", "0002"])
+        self.assertEqual(self._query("SELECT name, price FROM item"), [("a", 1)])
+
+        self._write("0003_seed_more_items.sql", "INSERT INTO item (name, price) VALUES ('b', 2);")
+        self.assertEqual(self._run(), ["0003"])
+        self.assertEqual(self._run(), [])
+        self.assertEqual(len(self._query("SELECT * FROM item")), 2)
+
+    def test_failingMigration_isRolledBackAndNotRecorded(self):
+        self._create_tables()
+        self._write("0001_seed_items.sql", "INSERT INTO item (name) VALUES ('a');\nINSERT INTO missing (name) VALUES ('b');")
+
+        with self.assertRaises(MigrationException):
+            self._run()
+
+        self.assertEqual(self._query("SELECT * FROM item"), [])
+        self.assertEqual(self._query("SELECT * FROM fastdbx_schema_version"), [])
+
+    def test_nonTransactionalMigration_createsIndexOnce(self):
+        self._create_tables()
+        self._write(
+            "0001_index_item_name.py",
+            "from fastdbx.migrations import create_index\n"
+            "TRANSACTIONAL = False\n"
+            "def upgrade(connection):\n"
+            "    create_index(connection, 'ix_item_name', 'item', ['name'])\n"
+            "    create_index(connection, 'ix_item_name', 'item', ['name'])\n",
+        )
+
+        self.assertEqual(self._run(), ["0001"])
+        self.assertIn(("ix_item_name",), self._query("SELECT name FROM sqlite_master WHERE type = 'index'"))
+
+    def test_duplicateVersion_isRejected(self):
+        self._write("0001_a.sql", "SELECT 1;")
+        self._write("1_b.sql", "SELECT 1;")
+
+        with self.assertRaises(MigrationException):
+            self._run()
+
+    def test_datasourceStartup_runsMigrations(self):
+        self._create_tables()
+        self._write("0001_seed_items.sql", "INSERT INTO item (name) VALUES ('migrated');")
+        settings = FastDbxConfig(
+            engine=EngineConfig(url=self.url, echo=False),
+            create_tables=True,
+            migrations=MigrationsConfig(directory=self.directory),
+        )
+        Datasource._instance = Datasource(settings)
+
+        try:
+            Datasource._instance.startup()
+            item_names = [item.name for item in ItemService(repo=ItemRepository()).get_all_items()]
+        finally:
+            Datasource._instance.shutdown()
+
+        self.assertEqual(item_names, ["migrated"])
+
+
 if __name__ == "__main__":
     unittest.main()
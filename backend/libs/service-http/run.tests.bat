@@ -0,0 +1 @@
+python -m unittest tests/main.py
\ No newline at end of file
@@ -0,0 +1,8 @@
+from .breaker import CircuitBreaker
+from .client import ServiceHttpClient, ServiceUnavailableException
+
+__all__ = [
+    "CircuitBreaker",
+    "ServiceHttpClient",
+    "ServiceUnavailableException",
+]
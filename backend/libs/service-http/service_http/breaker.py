@@ -0,0 +1,50 @@
+import threading
+import time
+from typing import Callable, Optional
+
+
+class CircuitBreaker:
+    """Stops calling a service after `failure_threshold` consecutive failures
+
+    Once open every call is rejected for `reset_timeout` seconds, then a single trial call is let through,
+    its outcome closes the circuit again or keeps it open for another `reset_timeout`. Every call let through
+    must report its outcome with record_success or record_failure.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, timer: Callable[[], float] = time.monotonic):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._timer = timer
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+
+            if self._trial_in_flight or self._timer() - self._opened_at < self._reset_timeout:
+                return False
+
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+
+            if self._opened_at is not None or self._failures >= self._failure_threshold:
+                self._opened_at = self._timer()
@@ -0,0 +1,115 @@
+import logging
+import random
+import threading
+import time
+from typing import Optional
+
+import httpx
+from fastapi import HTTPException
+
+from service_http.breaker import CircuitBreaker
+
+logger = logging.getLogger("uvicorn.error")
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE"})
+RETRYABLE_STATUS_CODES = frozenset({502, 503, 504})
+
+
+class ServiceUnavailableException(HTTPException):
+
+    def __init__(self, *, detail: str):
+        super().__init__(status_code=503, detail=detail)
+
+
+class ServiceHttpClient:
+    """Pooled HTTP client shared by every request made to one service
+
+    Connections are kept alive and reused between requests. Idempotent requests failing with a transport error or
+    a 502/503/504 are retried with exponential backoff and full jitter, a circuit breaker stops the calls while the
+    service keeps failing. The client is opened lazily and closed by the application's lifespan.
+    """
+
+    def __init__(self, base_url: str, settings: dict, transport: Optional[httpx.BaseTransport] = None):
+        self._base_url = base_url
+        self._settings = settings
+        self._transport = transport
+        self._retries = settings["RETRIES"]
+        self._backoff = settings["BACKOFF"]
+        self._breaker = CircuitBreaker(settings["CIRCUIT_FAILURE_THRESHOLD"], settings["CIRCUIT_RESET_TIMEOUT"])
+        self._client: Optional[httpx.Client] = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._create_client()
+
+        return self._client
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, idempotent: bool = False, **kwargs) -> httpx.Response:
+        return self.request("POST", url, idempotent=idempotent, **kwargs)
+
+    def put(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def request(self, method: str, url: str, idempotent: Optional[bool] = None, **kwargs) -> httpx.Response:
+        """idempotent defaults to the method's semantics, pass True for lookups made through POST to retry them
+
+        The request counts once for the circuit breaker, however many attempts it took, it fails when it raises
+        or ends with a 5xx response
+        """
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+
+        if not self._breaker.allow():
+            raise ServiceUnavailableException(detail=f"{self._base_url} is unavailable, try again later")
+
+        succeeded = False
+        try:
+            response = self._send(method, url, attempts=1 + (self._retries if idempotent else 0), **kwargs)
+            succeeded = response.status_code < 500
+            return response
+        finally:
+            # also reached by errors that are not retried, so a half open breaker never waits for a lost trial
+            if succeeded:
+                self._breaker.record_success()
+            else:
+                self._breaker.record_failure()
+
+    def _send(self, method: str, url: str, attempts: int, **kwargs) -> httpx.Response:
+        for attempt in range(attempts):
+            try:
+                response = self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == attempts - 1:
+                    raise
+                logger.warning(f"{method} {self._base_url}{url} failed: {e!r}, retrying")
+            else:
+                if attempt == attempts - 1 or response.status_code not in RETRYABLE_STATUS_CODES:
+                    return response
+                logger.warning(f"{method} {self._base_url}{url} returned {response.status_code}, retrying")
+
+            time.sleep(random.uniform(0, self._backoff * 2 ** attempt))
+
+    def _create_client(self) -> httpx.Client:
+        return httpx.Client(
+            base_url=self._base_url,
+            limits=httpx.Limits(
+                max_connections=self._settings["MAX_CONNECTIONS"],
+                max_keepalive_connections=self._settings["MAX_KEEPALIVE_CONNECTIONS"],
+                keepalive_expiry=self._settings["KEEPALIVE_EXPIRY"],
+            ),
+            timeout=httpx.Timeout(self._settings["READ_TIMEOUT"], connect=self._settings["CONNECT_TIMEOUT"]),
+            transport=self._transport,
+        )
@@ -0,0 +1,170 @@
+import unittest
+from unittest import mock
+
+import httpx
+
+from service_http import CircuitBreaker, ServiceHttpClient, ServiceUnavailableException
+
+SETTINGS = {
+    "MAX_CONNECTIONS": 10,
+    "MAX_KEEPALIVE_CONNECTIONS": 5,
+    "KEEPALIVE_EXPIRY": 30,
+    "CONNECT_TIMEOUT": 1,
+    "READ_TIMEOUT": 1,
+    "RETRIES": 2,
+    "BACKOFF": 0.1,
+    "CIRCUIT_FAILURE_THRESHOLD": 2,
+    "CIRCUIT_RESET_TIMEOUT": 30,
+}
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ScriptedService:
+    """Answers the requests with the given outcomes in order, a status code or an exception to raise"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        outcome = self.outcomes.pop(0)
+
+        if isinstance(outcome, Exception):
+            raise outcome
+
+        return httpx.Response(outcome)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.timer = FakeTimer()
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, timer=self.timer)
+
+    def test_opensAfterConsecutiveFailures(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertFalse(self.breaker.is_open)
+
+        self.breaker.record_failure()
+
+        self.assertTrue(self.breaker.is_open)
+        self.assertFalse(self.breaker.allow())
+
+    def test_halfOpen_letsOneTrialThroughAfterResetTimeout(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.timer.now = 30
+
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+    def test_halfOpen_successfulTrialClosesCircuit(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.timer.now = 30
+        self.breaker.allow()
+
+        self.breaker.record_success()
+
+        self.assertFalse(self.breaker.is_open)
+        self.assertTrue(self.breaker.allow())
+        self.assertTrue(self.breaker.allow())
+
+    def test_halfOpen_failedTrialOpensCircuitAgain(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.timer.now = 30
+        self.breaker.allow()
+
+        self.breaker.record_failure()
+
+        self.assertFalse(self.breaker.allow())
+        self.timer.now = 59
+        self.assertFalse(self.breaker.allow())
+        self.timer.now = 60
+        self.assertTrue(self.breaker.allow())
+
+
+@mock.patch("service_http.client.time.sleep")
+class TestServiceHttpClient(unittest.TestCase):
+    def client(self, service: ScriptedService) -> ServiceHttpClient:
+        return ServiceHttpClient("http://service", SETTINGS, transport=httpx.MockTransport(service))
+
+    def test_idempotentRequest_isRetriedWithExponentialBackoff(self, sleep):
+        service = ScriptedService(httpx.ConnectError("refused"), 503, 200)
+
+        with mock.patch("service_http.client.random.uniform", side_effect=lambda low, high: high) as uniform:
+            response = self.client(service).get("/items")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(service.requests), 3)
+        self.assertEqual([c.args for c in uniform.call_args_list], [(0, 0.1), (0, 0.2)])
+        self.assertEqual([c.args for c in sleep.call_args_list], [(0.1,), (0.2,)])
+
+    def test_retriesExhausted_returnsLastResponseOrRaises(self, sleep):
+        self.assertEqual(self.client(ScriptedService(502, 503, 504)).get("/items").status_code, 504)
+
+        with self.assertRaises(httpx.ConnectError):
+            self.client(ScriptedService(*[httpx.ConnectError("refused")] * 3)).get("/items")
+
+    def test_nonIdempotentRequest_isNotRetried(self, sleep):
+        service = ScriptedService(503)
+
+        self.assertEqual(self.client(service).post("/items").status_code, 503)
+        self.assertEqual(len(service.requests), 1)
+        sleep.assert_not_called()
+
+    def test_nonRetryableStatus_isReturnedAtOnce(self, sleep):
+        service = ScriptedService(500, 404)
+        client = self.client(service)
+
+        self.assertEqual(client.get("/items").status_code, 500)
+        self.assertEqual(client.get("/items").status_code, 404)
+        self.assertEqual(len(service.requests), 2)
+
+    def test_retriedRequest_countsAsOneFailure(self, sleep):
+        service = ScriptedService(503, 503, 503, 200)
+        client = self.client(service)
+
+        client.get("/items")
+
+        self.assertEqual(client.get("/items").status_code, 200)
+
+    def test_openCircuit_rejectsRequestsWithoutCallingService(self, sleep):
+        service = ScriptedService(500, 500)
+        client = self.client(service)
+        client.get("/items")
+        client.get("/items")
+
+        with self.assertRaises(ServiceUnavailableException):
+            client.get("/items")
+
+        self.assertEqual(len(service.requests), 2)
+
+    def test_trialFailingWithUnexpectedError_doesNotKeepCircuitOpen(self, sleep):
+        timer = FakeTimer()
+        service = ScriptedService(500, 500, httpx.DecodingError("bad body"), 200)
+        client = self.client(service)
+        client._breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, timer=timer)
+        client.get("/items")
+        client.get("/items")
+        timer.now = 30
+
+        with self.assertRaises(httpx.DecodingError):
+            client.get("/items")
+
+        timer.now = 60
+        self.assertEqual(client.get("/items").status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,7 @@
 import logging
 from typing import Optional, Annotated
 
-from fastapi import APIRouter, Depends, UploadFile, File, Query
+from fastapi import APIRouter, Depends, UploadFile, File, Query, Response
 from jwt_guard.security.auth_bearer import JWTBearer
 
 from src.api.security.permissions import IsUserOfTypeManager
@@ -10,22 +10,51 @@ from src.domain.dtos.medication import (
     CreateMedicationRequest,
     parse_json_payload,
     UpdateMedicationRequest,
+    MedicationBatchRequest,
 )
 from src.services import MedicationService
 from src.services.file_manager import FileManager
+from src.settings import MAX_PAGE_SIZE
 
 medication_router = APIRouter()
 
 logger = logging.getLogger("uvicorn.error")
 
 
-@medication_router.get("/", response_model=list[MedicationDto])
+@medication_router.get(
+    "/",
+    response_model=list[MedicationDto],
+    description="""
+    Pass `limit` to page through the catalog, the cursor of the next page is returned in the `X-Next-Cursor` header
+    and is absent on the last page. Lookups by `ids` are never paginated
+    """,
+)
 def get_medications(
+    response: Response,
     ids: Optional[list[int]] = Query(default=None),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     _ctrl: MedicationService = Depends(MedicationService),
 ):
     logger.info(f"ids: {ids}")
-    return _ctrl.get_medications(ids)
+    page = _ctrl.get_medications(ids, limit=limit, cursor=cursor)
+
+    if page.next_cursor is not None:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+
+    return page.items
+
+
+@medication_router.post(
+    "/batch",
+    response_model=list[MedicationDto],
+    description="Looks up many medications by id in one request, ids that do not exist are left out",
+)
+def get_medications_batch(
+    payload: MedicationBatchRequest,
+    _ctrl: MedicationService = Depends(MedicationService),
+):
+    return _ctrl.get_medications_batch(payload.ids)
 
 
 @medication_router.post(
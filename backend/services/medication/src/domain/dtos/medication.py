@@ -8,6 +8,7 @@ from pydantic import BaseModel, ConfigDict, AfterValidator, Field, ValidationErr
 from src.domain.validations.common import (
     is_positive_decimal,
 )
+from src.settings import MAX_BATCH_SIZE
 
 
 class MedicationManufacturerDto(BaseModel):
@@ -35,6 +36,10 @@ class MedicationDto(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class MedicationBatchRequest(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
 class CreateMedicationRequest(BaseModel):
     name: str
     description: str
@@ -1,18 +1,11 @@
-from abc import ABC, abstractmethod
+from abc import ABC
 
 from fastdbx.core.repo import AbstractRepository
-from src.domain.models import Manufacturer, Medication, MedicationImage
+from src.domain.models import Manufacturer, Medication
 
 
 class AbstractMedicationRepository(AbstractRepository[Medication], ABC):
-
-    @abstractmethod
-    def find_by_ids(self, ids: list[int]) -> list[Medication]:
-        pass
-
-    @abstractmethod
-    def save_image(self, image: MedicationImage) -> MedicationImage:
-        pass
+    pass
 
 
 class AbstractManufacturerRepository(AbstractRepository[Manufacturer], ABC):
@@ -1,20 +1,15 @@
 from fastdbx.core.repo import CrudRepository
+from sqlalchemy.orm import joinedload, selectinload
 from src.domain.internal.abstracts import AbstractMedicationRepository
 
-from src.domain.models import Medication, MedicationImage
+from src.domain.models import Medication
 
 
 class MedicationRepository(AbstractMedicationRepository, CrudRepository):
+    load_options = (joinedload(Medication.manufacturer), selectinload(Medication.images))
+
     def __init__(self) -> None:
         super().__init__(Medication)
 
     def __call__(self, *args, **kwargs):
         return MedicationRepository()
-
-    def find_by_ids(self, ids: list[int]) -> list[Medication]:
-        return self.session.query(Medication).filter(Medication.id.in_(ids))
-
-    def save_image(self, image: MedicationImage) -> MedicationImage:
-        self.session.add(image)
-        self.session.flush()
-        return image
@@ -2,6 +2,7 @@ from typing import Optional
 
 from fastapi import Depends, HTTPException
 
+from fastdbx.core import Page, InvalidCursorException
 from fastdbx.transactions.meta import transactional
 from src.domain.dtos.medication import (
     MedicationDto,
@@ -26,13 +27,28 @@ class MedicationService:
     def __call__(self, *args, **kwargs):
         return MedicationService()
 
-    @transactional()
-    def get_medications(self, ids: Optional[list[int]]) -> list[MedicationDto]:
+    @transactional(read_only=True)
+    def get_medications(
+        self, ids: Optional[list[int]], limit: Optional[int] = None, cursor: Optional[str] = None
+    ) -> Page[MedicationDto]:
         if ids:
-            medications = self.medication_repo.find_by_ids(ids)
+            page = Page(items=self.medication_repo.find_by_ids(ids))
+        elif limit is not None:
+            try:
+                page = self.medication_repo.find_page(limit=limit, cursor=cursor)
+            except InvalidCursorException as e:
+                raise HTTPException(status_code=400, detail=str(e))
         else:
-            medications = self.medication_repo.find_all()
+            page = Page(items=self.medication_repo.find_all())
+
+        return Page(
+            items=[MedicationDto.model_validate(m) for m in page.items],
+            next_cursor=page.next_cursor,
+        )
 
+    @transactional(read_only=True)
+    def get_medications_batch(self, ids: list[int]) -> list[MedicationDto]:
+        medications = self.medication_repo.find_by_ids(set(ids))
         return [MedicationDto.model_validate(m) for m in medications]
 
     @transactional()
@@ -43,16 +59,15 @@ class MedicationService:
             instance=Medication(**payload.model_dump())
         )
 
-        images: list[MedicationImageDto] = []
-
-        for path in image_paths:
-            image_url, alt_text = path, path.split("/")[-1]
-            medication_image = self.medication_repo.save_image(
-                image=MedicationImage(
-                    image_url=image_url, alt_text=alt_text, medication_id=medication.id
+        medication_images = self.medication_repo.save_all(
+            [
+                MedicationImage(
+                    image_url=path, alt_text=path.split("/")[-1], medication_id=medication.id
                 )
-            )
-            images.append(MedicationImageDto.model_validate(medication_image))
+                for path in image_paths
+            ]
+        )
+        images = [MedicationImageDto.model_validate(image) for image in medication_images]
 
         return MedicationDto(
             id=medication.id,
@@ -10,13 +10,19 @@ VALID_FILE_EXTENSIONS = ("png", "jpeg", "jpg")
 MAX_FILENAME_LENGTH = 250
 FILENAME_FORBIDDEN_CHARACTERS = set(' !@#$%[]:{}?*\\')
 FILE_UPLOAD_DIRECTORY = os.path.join(BASE_DIR, "..", "media")
+MAX_PAGE_SIZE = 100
+MAX_BATCH_SIZE = 500
+
+# development aid, warns on lazy loads repeated that many times in a transaction, off when unset
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD")) if os.getenv("N_PLUS_ONE_THRESHOLD") else None
 
 FASTDBX = {
     "ENGINE": {
         "URL": "sqlite:///medication.db",
         "ECHO": True
     },
-    "CREATE_TABLES": True
+    "CREATE_TABLES": True,
+    "N_PLUS_ONE_THRESHOLD": N_PLUS_ONE_THRESHOLD
 }
 
 JWT_GUARD = {
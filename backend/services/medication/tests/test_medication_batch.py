@@ -0,0 +1,33 @@
+"""Validation of the batch medication lookups
+
+Run from backend/services/medication, with the same environment as the service (see run.dev.bat and .env):
+
+    set FASTAPI_SETTINGS_MODULE=src.settings
+    python -m unittest discover tests
+"""
+import unittest
+
+from pydantic import ValidationError
+
+from src.domain.dtos.medication import MedicationBatchRequest
+from src.settings import MAX_BATCH_SIZE
+
+
+class TestMedicationBatchRequest(unittest.TestCase):
+
+    def test_upToMaxBatchSizeIds_areAccepted(self):
+        request = MedicationBatchRequest(ids=list(range(MAX_BATCH_SIZE)))
+
+        self.assertEqual(len(request.ids), MAX_BATCH_SIZE)
+
+    def test_moreThanMaxBatchSizeIds_areRejected(self):
+        with self.assertRaises(ValidationError):
+            MedicationBatchRequest(ids=list(range(MAX_BATCH_SIZE + 1)))
+
+    def test_noIds_areRejected(self):
+        with self.assertRaises(ValidationError):
+            MedicationBatchRequest(ids=[])
+
+
+if __name__ == "__main__":
+    unittest.main()
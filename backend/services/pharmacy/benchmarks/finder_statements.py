@@ -0,0 +1,181 @@
+"""Per-call overhead of the pharmacy finders, statements built on every call vs prepared statements
+
+Run from backend/services/pharmacy, with the same environment as the service (see run.dev.bat and .env):
+
+    set FASTAPI_SETTINGS_MODULE=src.settings
+    python -m benchmarks.finder_statements [calls]
+
+The "rebuilt" variants are the finders as they were before they moved to fastdbx prepared statements, both run
+against the same seeded in-memory sqlite database inside one transaction, so the difference is the time spent
+building the select and computing its cache key.
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from fastdbx.config.schemas import FastDbxConfig, EngineConfig
+from fastdbx.core import Datasource
+from fastdbx.transactions.meta import transactional
+from sqlalchemy import select, exists
+
+from src.domain.models import Pharmacy, PharmacyEmployee, Inventory, Sale, SaleItem, SaleMedicationCounter
+from src.domain.internal.clock import SystemClock
+from src.repository.inventory_repo import InventoryRepository
+from src.repository.pharmacy_repo import PharmacyRepository
+from src.repository.sale_counter_repo import SaleMedicationCounterRepository
+
+PHARMACIES = 20
+MEDICATIONS = 100
+
+
+def seed(session):
+    expiration_date = datetime.now() + timedelta(days=365)
+
+    for pharmacy_id in range(1, PHARMACIES + 1):
+        pharmacy = Pharmacy(id=pharmacy_id, name=f"p{pharmacy_id}", address="a", manager_id=pharmacy_id % 3)
+        pharmacy.employees = [PharmacyEmployee(employee_id=pharmacy_id * 10 + e) for e in range(5)]
+        pharmacy.inventories = [
+            Inventory(medication_id=m, quantity=10, expiration_date=expiration_date) for m in range(MEDICATIONS)
+        ]
+        session.add(pharmacy)
+        session.flush()
+
+        employee = pharmacy.employees[0]
+        for m in range(0, MEDICATIONS, 10):
+            sale = Sale(total_amount=Decimal(10), employee_id=employee.id, pharmacy_id=pharmacy_id)
+            sale.sale_items = [SaleItem(medication_id=m, quantity=1, unit_price=10)]
+            session.add(sale)
+            session.add(SaleMedicationCounter(pharmacy_id=pharmacy_id, medication_id=m, quantity=1))
+
+
+def rebuilt_find_by_pharmacy_and_medication(session, pharmacy_id: int, medication_id: int):
+    statement = select(Inventory).where(
+        Inventory.pharmacy_id == pharmacy_id, Inventory.medication_id == medication_id
+    )
+    return session.scalars(statement).first()
+
+
+def rebuilt_find_by_pharmacy_employee_id(session, pharmacy_id: int, employee_id: int):
+    statement = (
+        select(Inventory)
+        .join(Pharmacy, Inventory.pharmacy_id == Pharmacy.id)
+        .join(PharmacyEmployee, Pharmacy.id == PharmacyEmployee.pharmacy_id)
+        .where(PharmacyEmployee.employee_id == employee_id, Pharmacy.id == pharmacy_id)
+    )
+    return session.scalars(statement).all()
+
+
+def rebuilt_find_by_medication_id_quantity_gt0_exp_gt_now(session, medication_id: int):
+    statement = (
+        select(Pharmacy)
+        .join(Inventory)
+        .where(
+            Inventory.medication_id == medication_id,
+            Inventory.quantity > 0,
+            Inventory.expiration_date > datetime.now(),
+        )
+        .distinct()
+    )
+    return session.scalars(statement).all()
+
+
+def rebuilt_is_known_employee(session, pharmacy_id: int, employee_id: int):
+    statement = select(
+        exists().where(PharmacyEmployee.pharmacy_id == pharmacy_id, PharmacyEmployee.employee_id == employee_id)
+    )
+    return session.scalar(statement)
+
+
+def rebuilt_find_all_by_manager_id(session, manager_id: int):
+    statement = select(Pharmacy.id).where(Pharmacy.manager_id == manager_id)
+    return session.execute(statement).scalars().all()
+
+
+def rebuilt_find_mid_quantity_by_manager_id(session, manager_id: int):
+    statement = (
+        select(SaleMedicationCounter.medication_id, SaleMedicationCounter.quantity)
+        .join(Pharmacy, SaleMedicationCounter.pharmacy_id == Pharmacy.id)
+        .where(Pharmacy.manager_id == manager_id)
+    )
+    return session.execute(statement).all()
+
+
+def measure(call, calls: int) -> float:
+    """Microseconds per call, the session is expunged between calls so every call hits the database"""
+    session = Datasource.instance().context
+    call()
+
+    started = time.perf_counter()
+    for _ in range(calls):
+        call()
+        session.expunge_all()
+
+    return (time.perf_counter() - started) / calls * 1_000_000
+
+
+@transactional()
+def run(calls: int) -> list[tuple[str, float, float]]:
+    session = Datasource.instance().context
+    seed(session)
+    session.flush()
+
+    clock = SystemClock()
+    inventory_repo, pharmacy_repo = InventoryRepository(clock), PharmacyRepository(clock)
+    sale_counter_repo = SaleMedicationCounterRepository()
+
+    cases = [
+        (
+            "find_by_pharmacy_and_medication",
+            lambda: rebuilt_find_by_pharmacy_and_medication(session, 3, 42),
+            lambda: inventory_repo.find_by_pharmacy_and_medication(3, 42),
+        ),
+        (
+            "find_by_pharmacy_employee_id",
+            lambda: rebuilt_find_by_pharmacy_employee_id(session, 3, 31),
+            lambda: inventory_repo.find_by_pharmacy_employee_id(3, 31),
+        ),
+        (
+            "find_by_medication_id_quantity_gt0_exp_gt_now",
+            lambda: rebuilt_find_by_medication_id_quantity_gt0_exp_gt_now(session, 42),
+            lambda: pharmacy_repo.find_by_medication_id_quantity_gt0_exp_gt_now(42),
+        ),
+        (
+            "is_known_employee",
+            lambda: rebuilt_is_known_employee(session, 3, 31),
+            lambda: pharmacy_repo.is_known_employee(3, 31),
+        ),
+        (
+            "find_all_by_manager_id",
+            lambda: rebuilt_find_all_by_manager_id(session, 1),
+            lambda: pharmacy_repo.find_all_by_manager_id(1),
+        ),
+        (
+            "find_mid_quantity_by_manager_id",
+            lambda: rebuilt_find_mid_quantity_by_manager_id(session, 1),
+            lambda: sale_counter_repo.find_mid_quantity_by_manager_id(1),
+        ),
+    ]
+
+    return [(name, measure(rebuilt, calls), measure(prepared, calls)) for name, rebuilt, prepared in cases]
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    settings = FastDbxConfig(engine=EngineConfig(url="sqlite://", echo=False), create_tables=True)
+    Datasource._instance = Datasource(settings)
+    Datasource.instance().startup()
+
+    try:
+        results = run(calls)
+    finally:
+        Datasource.instance().shutdown()
+
+    print(f"{'finder':<48}{'rebuilt us/call':>18}{'prepared us/call':>18}{'saved':>8}")
+    for name, rebuilt, prepared in results:
+        print(f"{name:<48}{rebuilt:>18.1f}{prepared:>18.1f}{(1 - prepared / rebuilt):>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Cost of joining the most sold ranking with the medications, per medication, as the ranking grows
+
+Run from backend/services/pharmacy, with the same environment as the service (see run.dev.bat and .env):
+
+    set FASTAPI_SETTINGS_MODULE=src.settings
+    python -m benchmarks.most_sold_ranking [repeats]
+
+"scan" is the join as it was before it moved to a dict index, it looks up the ranking row of every medication with
+a linear scan, "indexed" is rank_most_sold_medications. The medications are shuffled, the medication service does
+not return them in ranking order. A constant time per medication means the join scales linearly.
+"""
+import random
+import sys
+import time
+
+from src.domain.dtos.medication import MedicationDto, MedicationManufacturerDto
+from src.domain.dtos.sale import MostSoldMedicationDto
+from src.service.sale_service import rank_most_sold_medications
+
+SIZES = (100, 1_000, 10_000)
+
+
+def scan_most_sold_medications(
+    ranked: list[tuple[int, int]], medications: list[MedicationDto]
+) -> list[MostSoldMedicationDto]:
+    result = []
+
+    for medication in medications:
+        row = next((r for r in ranked if r[0] == medication.id), None)
+        if row is not None:
+            result.append(
+                MostSoldMedicationDto(
+                    medication_id=medication.id,
+                    name=medication.name,
+                    quantity=row[1],
+                    manufacturer=medication.manufacturer,
+                )
+            )
+
+    return result
+
+
+def dataset(size: int) -> tuple[list[tuple[int, int]], list[MedicationDto]]:
+    manufacturer = MedicationManufacturerDto(id=1, name="m")
+    ranked = [(medication_id, size - medication_id) for medication_id in range(size)]
+    medications = [
+        MedicationDto(id=medication_id, name=f"m{medication_id}", description="d", manufacturer=manufacturer, images=[])
+        for medication_id in range(size)
+    ]
+    random.shuffle(medications)
+    return ranked, medications
+
+
+def measure(join, ranked, medications, repeats: int) -> float:
+    """Microseconds per medication"""
+    started = time.perf_counter()
+    for _ in range(repeats):
+        join(ranked, medications)
+
+    return (time.perf_counter() - started) / repeats / len(medications) * 1_000_000
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    print(f"{'medications':>12} {'scan us/medication':>20} {'indexed us/medication':>23}")
+
+    for size in SIZES:
+        ranked, medications = dataset(size)
+        assert [r.medication_id for r in rank_most_sold_medications(ranked, medications)] == [m for m, _ in ranked]
+
+        scan = measure(scan_most_sold_medications, ranked, medications, repeats)
+        indexed = measure(rank_most_sold_medications, ranked, medications, repeats)
+        print(f"{size:>12} {scan:>20.2f} {indexed:>23.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,13 +9,23 @@ from src.api.routers.pharmacy_router import pharmacy_router
 from src.api.routers.pharmacy_employee_router import pharmacy_employee_router
 from src.api.routers.pharmacy_manager_router import pharmacy_manager_router
 from src.api.routers.pharmacy_internal_router import pharmacy_internal_router
+from src.service.medication_api_client import medication_service_client
+from src.service.sales_analytics import SalesAnalytics
+from src.settings import SALES_ANALYTICS
 import src.domain.models
 
 
 @asynccontextmanager
 async def lifespan(fastapi: FastAPI):
     Datasource.instance().startup()
+    fastapi.state.sales_analytics = SalesAnalytics(
+        refresh_interval=SALES_ANALYTICS["REFRESH_INTERVAL"],
+        batch_size=SALES_ANALYTICS["BATCH_SIZE"],
+    )
+    fastapi.state.sales_analytics.start()
     yield
+    fastapi.state.sales_analytics.stop()
+    medication_service_client.close()
     Datasource.instance().shutdown()
 
 
@@ -34,6 +44,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -0,0 +1,48 @@
+"""Merges the inventories registered more than once for the same (pharmacy_id, medication_id) into one row
+
+The finders did not order the duplicates, so any of them may hold the stock that was kept up to date. The most
+recent row of each pair is kept with the sum of the quantities and the earliest expiration date, so no stock is lost
+and none is reported as lasting longer than it does. Runs in a transaction, before the unique index of 0002 is built
+outside of one, so a failure leaves the inventory as it was.
+"""
+from sqlalchemy import MetaData, Table, Column, Integer, DateTime, select, update, delete, func
+
+metadata = MetaData()
+
+inventory = Table(
+    "inventory",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("quantity", Integer),
+    Column("expiration_date", DateTime),
+    Column("medication_id", Integer, nullable=False),
+    Column("pharmacy_id", Integer),
+)
+
+
+def upgrade(connection):
+    duplicates = connection.execute(
+        select(
+            inventory.c.pharmacy_id,
+            inventory.c.medication_id,
+            func.max(inventory.c.id),
+            func.sum(inventory.c.quantity),
+            func.min(inventory.c.expiration_date),
+        )
+        .group_by(inventory.c.pharmacy_id, inventory.c.medication_id)
+        .having(func.count() > 1)
+    ).all()
+
+    for pharmacy_id, medication_id, kept_id, quantity, expiration_date in duplicates:
+        connection.execute(
+            update(inventory)
+            .where(inventory.c.id == kept_id)
+            .values(quantity=quantity, expiration_date=expiration_date)
+        )
+        connection.execute(
+            delete(inventory).where(
+                inventory.c.pharmacy_id == pharmacy_id,
+                inventory.c.medication_id == medication_id,
+                inventory.c.id != kept_id,
+            )
+        )
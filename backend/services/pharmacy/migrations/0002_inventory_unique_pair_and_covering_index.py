@@ -0,0 +1,25 @@
+"""One inventory row per (pharmacy_id, medication_id), the bulk registration upserts on the pair and the finders use it
+
+The duplicates registered before the constraint existed are merged by 0001. The indexes are built without blocking
+the writes to the inventory, so the migration runs outside of a transaction.
+"""
+from fastdbx.migrations import create_index, drop_index
+
+TRANSACTIONAL = False
+
+
+def upgrade(connection):
+    create_index(
+        connection, "uq_inventory_pharmacy_medication", "inventory", ["pharmacy_id", "medication_id"], unique=True
+    )
+    # covers the in stock filters (medication_id, expiration_date > now, quantity > 0) without reading the table
+    create_index(
+        connection,
+        "ix_inventory_medication_id_expiration_date_quantity",
+        "inventory",
+        ["medication_id", "expiration_date", "quantity"],
+    )
+
+    # both are the leading column of one of the composite indexes above
+    drop_index(connection, "ix_inventory_pharmacy_id", "inventory")
+    drop_index(connection, "ix_inventory_medication_id", "inventory")
@@ -0,0 +1,84 @@
+"""Creates the sales aggregates read by the manager trends and most sold ranking, filled from the existing sales
+
+The aggregates are incremented when a sale is placed, so each one is only filled while it is still empty.
+The tables are declared as they were at this version, independently of the current models.
+"""
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, Date, DateTime, Numeric, ForeignKey, UniqueConstraint, Index,
+    select, insert, exists, func,
+)
+
+metadata = MetaData()
+
+pharmacy = Table("pharmacy", metadata, Column("id", Integer, primary_key=True))
+
+sale = Table(
+    "sale",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("total_amount", Numeric(5, 2), nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("pharmacy_id", Integer),
+)
+
+sale_item = Table(
+    "sale_item",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("medication_id", Integer, nullable=False),
+    Column("quantity", Integer),
+    Column("sale_id", Integer, nullable=False),
+)
+
+sale_daily_rollup = Table(
+    "sale_daily_rollup",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("pharmacy_id", Integer, ForeignKey("pharmacy.id"), nullable=False),
+    Column("sale_date", Date, nullable=False),
+    Column("number_of_sales", Integer, nullable=False),
+    Column("total_sales_amount", Numeric(12, 2), nullable=False),
+    UniqueConstraint("pharmacy_id", "sale_date", name="uq_sale_daily_rollup_pharmacy_date"),
+    Index("ix_sale_daily_rollup_sale_date", "sale_date"),
+)
+
+sale_medication_counter = Table(
+    "sale_medication_counter",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("pharmacy_id", Integer, ForeignKey("pharmacy.id"), nullable=False),
+    Column("medication_id", Integer, nullable=False),
+    Column("quantity", Integer, nullable=False),
+    UniqueConstraint("pharmacy_id", "medication_id", name="uq_sale_medication_counter_pharmacy_medication"),
+)
+
+
+def _is_empty(connection, table: Table) -> bool:
+    return not connection.scalar(select(exists().select_from(table)))
+
+
+def upgrade(connection):
+    sale_daily_rollup.create(connection, checkfirst=True)
+    sale_medication_counter.create(connection, checkfirst=True)
+
+    if _is_empty(connection, sale_daily_rollup):
+        sale_date = func.date(sale.c.created_at, type_=Date)
+        connection.execute(
+            insert(sale_daily_rollup).from_select(
+                ["pharmacy_id", "sale_date", "number_of_sales", "total_sales_amount"],
+                select(sale.c.pharmacy_id, sale_date, func.count(sale.c.id), func.sum(sale.c.total_amount))
+                .where(sale.c.pharmacy_id.is_not(None))
+                .group_by(sale.c.pharmacy_id, sale_date),
+            )
+        )
+
+    if _is_empty(connection, sale_medication_counter):
+        connection.execute(
+            insert(sale_medication_counter).from_select(
+                ["pharmacy_id", "medication_id", "quantity"],
+                select(sale.c.pharmacy_id, sale_item.c.medication_id, func.sum(sale_item.c.quantity))
+                .join(sale, sale_item.c.sale_id == sale.c.id)
+                .where(sale.c.pharmacy_id.is_not(None))
+                .group_by(sale.c.pharmacy_id, sale_item.c.medication_id),
+            )
+        )
@@ -1,3 +1,4 @@
 set FASTAPI_SETTINGS_MODULE=src.settings
+set N_PLUS_ONE_THRESHOLD=2
 
 fastapi dev main.py
\ No newline at end of file
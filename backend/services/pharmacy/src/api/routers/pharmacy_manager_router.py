@@ -1,13 +1,24 @@
-from typing import Optional
+from datetime import datetime
+from typing import Optional, Any
 
-from fastapi import Request, APIRouter, Depends
+from fastapi import Request, APIRouter, Depends, Query, Response, Body, UploadFile, File
+from fastapi.responses import StreamingResponse
 from jwt_guard.security.auth_bearer import JWTBearer
 
 from src.api.security.permissions import IsUserOfTypeManager
+from src.domain.dtos.analytics import (
+    HourlyRevenueDto,
+    MedicationRevenueDto,
+    EmployeeRevenueDto,
+    WeeklyRevenueDto,
+)
 from src.domain.dtos.inventory import RegisterInventoryRequest
-from src.domain.dtos.sale import MostSoldMedicationDto, SaleTrendDto
+from src.domain.dtos.sale import MostSoldMedicationDto, SaleTrendDto, SaleExportFormat
+from src.service.analytics_service import SalesAnalyticsService
+from src.service.inventory_import import read_inventory_csv
 from src.service.inventory_service import InventoryService
 from src.service.sale_service import SaleService
+from src.settings import MAX_PAGE_SIZE, MAX_INVENTORY_IMPORT_ROWS
 
 pharmacy_manager_router = APIRouter(
     tags=["pharmacy-manager-actions"],
@@ -25,19 +36,139 @@ def register_medication_to_inventory(
     return {"message": "Successfully register inventory"}
 
 
-@pharmacy_manager_router.get("/sales", response_model=list[MostSoldMedicationDto])
+@pharmacy_manager_router.post(
+    "/{pharmacy_id}/inventory/bulk",
+    description="""
+    Registers a list of inventories shaped like the single registration payload, all of them or none, an invalid list
+    is answered with 422 and the errors of every invalid row, numbered from 1
+    """,
+)
+def register_medications_to_inventory(
+    pharmacy_id: int,
+    payload: list[Any] = Body(...),
+    _ctrl: InventoryService = Depends(InventoryService),
+):
+    registered = _ctrl.register_medications_in_pharmacy_inventory(pharmacy_id, payload)
+    return {"message": f"Successfully registered {registered} inventories"}
+
+
+@pharmacy_manager_router.post(
+    "/{pharmacy_id}/inventory/bulk/csv",
+    description="""
+    Same as the bulk registration, from a CSV file with a `medication_id,quantity,expiration_date` header
+    """,
+)
+def register_medications_to_inventory_from_csv(
+    pharmacy_id: int,
+    file: UploadFile = File(...),
+    _ctrl: InventoryService = Depends(InventoryService),
+):
+    rows = read_inventory_csv(file.file, max_rows=MAX_INVENTORY_IMPORT_ROWS)
+    registered = _ctrl.register_medications_in_pharmacy_inventory(pharmacy_id, rows)
+    return {"message": f"Successfully registered {registered} inventories"}
+
+
+@pharmacy_manager_router.get(
+    "/sales",
+    response_model=list[MostSoldMedicationDto],
+    description="""
+    The `most_sold` medications in descending order of the sold quantity, the cursor of the next ones is returned
+    in the `X-Next-Cursor` header and is absent on the last page
+    """,
+)
 def retrieve_most_sold_medications(
     request: Request,
-    most_sold: Optional[int] = 3,
+    response: Response,
+    most_sold: int = Query(default=3, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     _ctrl: SaleService = Depends(SaleService),
 ):
     manager_id = request.state.auth.id
-    return _ctrl.get_most_sold_medications(manager_id, limit=most_sold)
+    page = _ctrl.get_most_sold_medications(manager_id, limit=most_sold, cursor=cursor)
 
+    if page.next_cursor is not None:
+        response.headers["X-Next-Cursor"] = page.next_cursor
 
-@pharmacy_manager_router.get("/sales/trends", response_model=list[SaleTrendDto])
+    return page.items
+
+
+@pharmacy_manager_router.get(
+    "/sales/trends",
+    response_model=list[SaleTrendDto],
+    description="""
+    Number and total amount of the sales of the managed pharmacies per day, for the whole days since the date `days`
+    ago, that first day included
+    """,
+)
 def retrieve_sale_trends_from_managed_pharmacies_in_past_days(
     request: Request, days: Optional[int] = 7, _ctrl: SaleService = Depends(SaleService)
 ):
     manager_id = request.state.auth.id
     return _ctrl.get_sale_trends_past_days(manager_id, days)
+
+
+@pharmacy_manager_router.get(
+    "/sales/export",
+    response_class=StreamingResponse,
+    description="""
+    Every sale item of the managed pharmacies sold in [`start`, `end`), either bound is optional, as CSV (one line per
+    sale item) or NDJSON (one object per sale with its items), streamed while it is read from the database
+    """,
+)
+def export_sales_from_managed_pharmacies(
+    request: Request,
+    export_format: SaleExportFormat = Query(default=SaleExportFormat.NDJSON, alias="format"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    _ctrl: SaleService = Depends(SaleService),
+):
+    manager_id = request.state.auth.id
+    return StreamingResponse(
+        _ctrl.export_sales(manager_id, start, end, export_format),
+        media_type=export_format.media_type,
+        headers={"Content-Disposition": f'attachment; filename="sales.{export_format.value}"'},
+    )
+
+
+@pharmacy_manager_router.get("/sales/analytics/hourly", response_model=list[HourlyRevenueDto])
+def retrieve_revenue_by_hour(
+    request: Request,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    _ctrl: SalesAnalyticsService = Depends(SalesAnalyticsService),
+):
+    manager_id = request.state.auth.id
+    return _ctrl.get_revenue_by_hour(manager_id, start, end)
+
+
+@pharmacy_manager_router.get("/sales/analytics/medications", response_model=list[MedicationRevenueDto])
+def retrieve_revenue_by_medication(
+    request: Request,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(default=10, ge=1, le=MAX_PAGE_SIZE),
+    _ctrl: SalesAnalyticsService = Depends(SalesAnalyticsService),
+):
+    manager_id = request.state.auth.id
+    return _ctrl.get_revenue_by_medication(manager_id, start, end, limit)
+
+
+@pharmacy_manager_router.get("/sales/analytics/employees", response_model=list[EmployeeRevenueDto])
+def retrieve_revenue_by_employee(
+    request: Request,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    _ctrl: SalesAnalyticsService = Depends(SalesAnalyticsService),
+):
+    manager_id = request.state.auth.id
+    return _ctrl.get_revenue_by_employee(manager_id, start, end)
+
+
+@pharmacy_manager_router.get("/sales/analytics/weekly", response_model=list[WeeklyRevenueDto])
+def retrieve_revenue_week_over_week(
+    request: Request,
+    weeks: int = Query(default=4, ge=1, le=52),
+    _ctrl: SalesAnalyticsService = Depends(SalesAnalyticsService),
+):
+    manager_id = request.state.auth.id
+    return _ctrl.get_revenue_week_over_week(manager_id, weeks)
@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class HourlyRevenueDto(BaseModel):
+    hour: int
+    revenue: float
+    number_of_sales: int
+
+
+class MedicationRevenueDto(BaseModel):
+    medication_id: int
+    revenue: float
+    quantity: int
+
+
+class EmployeeRevenueDto(BaseModel):
+    employee_id: int
+    revenue: float
+    number_of_sales: int
+
+
+class WeeklyRevenueDto(BaseModel):
+    week_start: datetime
+    revenue: float
+    change: Optional[float]
@@ -1,5 +1,6 @@
 from datetime import datetime
 from decimal import Decimal
+from enum import Enum
 from typing import Annotated
 
 from pydantic import BaseModel, AfterValidator, ConfigDict
@@ -31,3 +32,12 @@ class SaleTrendDto(BaseModel):
     number_of_sales: int
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class SaleExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+    @property
+    def media_type(self) -> str:
+        return "text/csv" if self is SaleExportFormat.CSV else "application/x-ndjson"
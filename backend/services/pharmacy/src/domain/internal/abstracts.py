@@ -1,17 +1,17 @@
 from abc import ABC, abstractmethod
-from datetime import datetime
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Optional, Iterator, Sequence
 
 from fastdbx.core.repo import AbstractRepository
 
-from src.domain.models import Inventory, Pharmacy, Sale
+from src.domain.models import Inventory, Pharmacy, Sale, SaleDailyRollup, SaleMedicationCounter
 
 
 class AbstractInventoryRepository(AbstractRepository[Inventory], ABC):
 
     @abstractmethod
-    def find_by_expiration_date_gt(
-        self, expiration_date: datetime = datetime.now()
-    ) -> list[Inventory]:
+    def find_distinct_medication_ids_quantity_gt0_exp_gt_now(self) -> list[int]:
         pass
 
     @abstractmethod
@@ -26,6 +26,20 @@ class AbstractInventoryRepository(AbstractRepository[Inventory], ABC):
     ) -> Inventory:
         pass
 
+    @abstractmethod
+    def find_by_pharmacy_and_medication_ids_for_update(
+        self, pharmacy_id: int, medication_ids: list[int]
+    ) -> list[Inventory]:
+        pass
+
+    @abstractmethod
+    def decrement_quantities(self, pharmacy_id: int, quantities: dict[int, int]) -> int:
+        pass
+
+    @abstractmethod
+    def upsert_by_pharmacy_and_medication(self, pharmacy_id: int, rows: list[dict]) -> int:
+        pass
+
 
 class AbstractPharmacyRepository(AbstractRepository[Pharmacy], ABC):
 
@@ -43,14 +57,45 @@ class AbstractPharmacyRepository(AbstractRepository[Pharmacy], ABC):
     def find_all_by_employee_id(self, employee_id: int) -> list[int]:
         pass
 
+    @abstractmethod
+    def is_known_employee(self, pharmacy_id: int, employee_id: int) -> bool:
+        pass
 
 
 class AbstractSaleRepository(AbstractRepository[Sale], ABC):
 
     @abstractmethod
-    def find_medication_qsum_by_manager_id_limit(self, manager_id: int, limit: int):
+    def stream_id_pid_eid_created_total(self, batch_size: int) -> Iterator[Sequence[tuple]]:
+        pass
+
+    @abstractmethod
+    def stream_sid_mid_quantity_price(self, batch_size: int) -> Iterator[Sequence[tuple]]:
+        pass
+
+    @abstractmethod
+    def stream_with_items_by_manager_id_created_between(
+        self, manager_id: int, start: Optional[datetime], end: Optional[datetime], batch_size: int
+    ) -> Iterator[tuple]:
+        pass
+
+
+class AbstractSaleDailyRollupRepository(AbstractRepository[SaleDailyRollup], ABC):
+
+    @abstractmethod
+    def add_sale(self, pharmacy_id: int, sale_date: date, amount: Decimal):
         pass
 
     @abstractmethod
     def find_date_scount_tsum_by_manager_id_days(self, manager_id, days: int):
         pass
+
+
+class AbstractSaleMedicationCounterRepository(AbstractRepository[SaleMedicationCounter], ABC):
+
+    @abstractmethod
+    def add_quantities(self, pharmacy_id: int, quantities: dict[int, int]):
+        pass
+
+    @abstractmethod
+    def find_mid_quantity_by_manager_id(self, manager_id: int) -> list[tuple[int, int]]:
+        pass
@@ -0,0 +1,28 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+
+class Clock(ABC):
+
+    @abstractmethod
+    def now(self) -> datetime:
+        pass
+
+
+class SystemClock(Clock):
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+
+class FixedClock(Clock):
+    """Clock standing still at the given time until it is moved, for deterministic expiry checks"""
+
+    def __init__(self, now: datetime):
+        self._now = now
+
+    def now(self) -> datetime:
+        return self._now
+
+    def advance(self, delta: timedelta):
+        self._now += delta
@@ -1,8 +1,10 @@
-from datetime import datetime
+from datetime import datetime, date
 from decimal import Decimal
 
 from fastdbx.core import BaseEntity
-from sqlalchemy import Column, Integer, String, Boolean, Numeric, DateTime, ForeignKey, CheckConstraint
+from sqlalchemy import (
+    Column, Integer, String, Boolean, Numeric, DateTime, Date, ForeignKey, CheckConstraint, Index, UniqueConstraint
+)
 from sqlalchemy.orm import Mapped, relationship
 
 
@@ -19,9 +21,6 @@ class Pharmacy(BaseEntity):
     inventories: Mapped[list["Inventory"]] = relationship(back_populates="pharmacy")
     employees: Mapped[list["PharmacyEmployee"]] = relationship(back_populates="pharmacy")
 
-    def is_known_employee(self, employee_id) -> bool:
-        return any([e.employee_id for e in self.employees if e.employee_id == employee_id])
-
 
 class Sale(BaseEntity):
     __tablename__ = 'sale'
@@ -51,13 +50,20 @@ class SaleItem(BaseEntity):
 
 class Inventory(BaseEntity):
     __tablename__ = "inventory"
+    # the composite indexes lead with pharmacy_id and medication_id, which therefore need no index of their own,
+    # the schema of existing databases is changed by migrations/0002_inventory_unique_pair_and_covering_index.py
+    __table_args__ = (
+        Index("uq_inventory_pharmacy_medication", "pharmacy_id", "medication_id", unique=True),
+        # covers the in stock filters of the medication lookups, in medication_id order for DISTINCT
+        Index("ix_inventory_medication_id_expiration_date_quantity", "medication_id", "expiration_date", "quantity"),
+    )
 
     id: int = Column(Integer, primary_key=True)
     quantity: int = Column(Integer, CheckConstraint("quantity >= 0"))
     expiration_date: datetime = Column(DateTime, CheckConstraint("expiration_date > CURRENT_TIMESTAMP"), index=True)
-    medication_id: int = Column(Integer, nullable=False, index=True)
+    medication_id: int = Column(Integer, nullable=False)
 
-    pharmacy_id: int = Column(Integer, ForeignKey("pharmacy.id"), index=True)
+    pharmacy_id: int = Column(Integer, ForeignKey("pharmacy.id"))
     pharmacy: Mapped[Pharmacy] = relationship(back_populates="inventories")
 
 
@@ -69,3 +75,30 @@ class PharmacyEmployee(BaseEntity):
 
     pharmacy_id: int = Column(Integer, ForeignKey("pharmacy.id"), index=True)
     pharmacy: Mapped[Pharmacy] = relationship(back_populates="employees")
+
+
+class SaleDailyRollup(BaseEntity):
+    """Number and total amount of the sales of a pharmacy per day, incremented when a sale is placed"""
+    __tablename__ = "sale_daily_rollup"
+    __table_args__ = (
+        UniqueConstraint("pharmacy_id", "sale_date", name="uq_sale_daily_rollup_pharmacy_date"),
+    )
+
+    id: int = Column(Integer, primary_key=True)
+    pharmacy_id: int = Column(Integer, ForeignKey("pharmacy.id"), nullable=False)
+    sale_date: date = Column(Date, nullable=False, index=True)
+    number_of_sales: int = Column(Integer, nullable=False, default=0)
+    total_sales_amount: Decimal = Column(Numeric(12, 2), nullable=False, default=0)
+
+
+class SaleMedicationCounter(BaseEntity):
+    """Quantity of a medication sold by a pharmacy over its whole history, incremented when a sale is placed"""
+    __tablename__ = "sale_medication_counter"
+    __table_args__ = (
+        UniqueConstraint("pharmacy_id", "medication_id", name="uq_sale_medication_counter_pharmacy_medication"),
+    )
+
+    id: int = Column(Integer, primary_key=True)
+    pharmacy_id: int = Column(Integer, ForeignKey("pharmacy.id"), nullable=False)
+    medication_id: int = Column(Integer, nullable=False)
+    quantity: int = Column(Integer, nullable=False, default=0)
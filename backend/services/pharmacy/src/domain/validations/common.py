@@ -9,6 +9,10 @@ def is_positive_number(value: Union[int, float]) -> Union[int, float]:
 
 
 def is_future_date(value: datetime) -> datetime:
-    if value is not None and value <= datetime.now(timezone.utc):
+    if value is None:
+        return value
+
+    now = datetime.now(timezone.utc) if value.tzinfo is not None else datetime.now()
+    if value <= now:
         raise ValueError("Date must be in the future.")
     return value
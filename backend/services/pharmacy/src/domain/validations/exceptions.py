@@ -10,3 +10,8 @@ class InsufficientInventoryException(HTTPException):
 class UnknownEmployeeException(HTTPException):
     def __init__(self, *, detail: str):
         super().__init__(status_code=401, detail=detail)
+
+
+class InvalidInventoryRowsException(HTTPException):
+    def __init__(self, *, detail: list[dict]):
+        super().__init__(status_code=422, detail=detail)
@@ -1,42 +1,113 @@
-from fastdbx.core import CrudRepository
-from sqlalchemy import select
+from fastapi import Depends
+from fastdbx.core import CrudRepository, prepared
+from sqlalchemy import select, bindparam, update, case
 
 from src.domain.internal.abstracts import AbstractInventoryRepository
+from src.domain.internal.clock import Clock, SystemClock
 from src.domain.models import Inventory, Pharmacy, PharmacyEmployee
-from datetime import datetime
 
 
 class InventoryRepository(AbstractInventoryRepository, CrudRepository[Inventory]):
-    def __init__(self):
+    def __init__(self, clock: Clock = Depends(SystemClock)):
         super().__init__(Inventory)
+        self.clock = clock
 
     def __call__(self, *args, **kwargs):
-        return InventoryRepository()
+        return InventoryRepository(self.clock)
 
-    def find_by_expiration_date_gt(
-        self, expiration_date: datetime = datetime.now()
-    ) -> list[Inventory]:
-        statement = select(Inventory).where(
-            self.entity.expiration_date > expiration_date
+    @prepared
+    def _distinct_medication_ids_in_stock():
+        return (
+            select(Inventory.medication_id)
+            .where(Inventory.quantity > 0, Inventory.expiration_date > bindparam("now"))
+            .distinct()
         )
-        return self.session.scalars(statement).all()
 
-    def find_by_pharmacy_employee_id(self, pharmacy_id: int, employee_id: int) -> list[Inventory]:
-        statement = (
+    @prepared
+    def _by_pharmacy_employee_id():
+        return (
             select(Inventory)
             .join(Pharmacy, Inventory.pharmacy_id == Pharmacy.id)
             .join(PharmacyEmployee, Pharmacy.id == PharmacyEmployee.pharmacy_id)
-            .where(PharmacyEmployee.employee_id == employee_id, Pharmacy.id == pharmacy_id)
+            .where(
+                PharmacyEmployee.employee_id == bindparam("employee_id"),
+                Pharmacy.id == bindparam("pharmacy_id"),
+            )
+        )
+
+    @prepared
+    def _by_pharmacy_and_medication():
+        return (
+            select(Inventory)
+            .where(
+                Inventory.pharmacy_id == bindparam("pharmacy_id"),
+                Inventory.medication_id == bindparam("medication_id"),
+            )
         )
 
-        return self.session.scalars(statement).all()
+    @prepared
+    def _by_pharmacy_and_medication_ids_for_update():
+        return (
+            select(Inventory)
+            .where(
+                Inventory.pharmacy_id == bindparam("pharmacy_id"),
+                Inventory.medication_id.in_(bindparam("medication_ids", expanding=True)),
+            )
+            .with_for_update(of=Inventory)
+        )
+
+    def find_distinct_medication_ids_quantity_gt0_exp_gt_now(self) -> list[int]:
+        return self.session.scalars(self._distinct_medication_ids_in_stock, {"now": self.clock.now()}).all()
+
+    def find_by_pharmacy_employee_id(self, pharmacy_id: int, employee_id: int) -> list[Inventory]:
+        return self.session.scalars(
+            self._by_pharmacy_employee_id, {"pharmacy_id": pharmacy_id, "employee_id": employee_id}
+        ).all()
 
     def find_by_pharmacy_and_medication(
         self, pharmacy_id: int, medication_id: int
     ) -> Inventory:
-        statement = select(Inventory).where(
-            Inventory.pharmacy_id == pharmacy_id,
-            Inventory.medication_id == medication_id,
+        return self.session.scalars(
+            self._by_pharmacy_and_medication,
+            {"pharmacy_id": pharmacy_id, "medication_id": medication_id},
+        ).first()
+
+    def find_by_pharmacy_and_medication_ids_for_update(
+        self, pharmacy_id: int, medication_ids: list[int]
+    ) -> list[Inventory]:
+        """Loads the inventories with one IN query, locking the rows (SELECT ... FOR UPDATE) where supported"""
+        return self.session.scalars(
+            self._by_pharmacy_and_medication_ids_for_update,
+            {"pharmacy_id": pharmacy_id, "medication_ids": medication_ids},
+        ).all()
+
+    def decrement_quantities(self, pharmacy_id: int, quantities: dict[int, int]) -> int:
+        """Subtracts the quantity of every medication id in one UPDATE, skipping rows that do not have enough stock
+
+        Returns the number of decremented rows, inventories already loaded in the session are not refreshed
+        """
+        if not quantities:
+            return 0
+
+        sold_quantity = case(quantities, value=Inventory.medication_id)
+        statement = (
+            update(Inventory)
+            .where(
+                Inventory.pharmacy_id == pharmacy_id,
+                Inventory.medication_id.in_(quantities.keys()),
+                Inventory.quantity >= sold_quantity,
+            )
+            .values(quantity=Inventory.quantity - sold_quantity)
+            .execution_options(synchronize_session=False)
         )
 
-        return self.session.scalars(statement).first()
+        return self.session.execute(statement).rowcount
+
+    def upsert_by_pharmacy_and_medication(self, pharmacy_id: int, rows: list[dict]) -> int:
+        """Inserts the medications in the pharmacy's inventory in one statement, overwriting the registered ones
+
+        Every row holds the medication_id and the inventory columns to write
+        """
+        return self.upsert_many(
+            [{"pharmacy_id": pharmacy_id, **row} for row in rows], conflict_columns=("pharmacy_id", "medication_id")
+        )
@@ -1,39 +1,66 @@
-from fastdbx.core import CrudRepository
-from sqlalchemy import select
+from fastapi import Depends
+from fastdbx.core import CrudRepository, prepared
+from sqlalchemy import select, bindparam, exists
 
 from src.domain.internal.abstracts import AbstractPharmacyRepository
+from src.domain.internal.clock import Clock, SystemClock
 from src.domain.models import Pharmacy, Inventory, PharmacyEmployee
-from datetime import datetime
 
 
 class PharmacyRepository(AbstractPharmacyRepository, CrudRepository[Pharmacy]):
 
-    def __init__(self):
+    def __init__(self, clock: Clock = Depends(SystemClock)):
         super().__init__(Pharmacy)
+        self.clock = clock
 
     def __call__(self, *args, **kwargs):
-        return PharmacyRepository()
+        return PharmacyRepository(self.clock)
 
-    def find_by_medication_id_quantity_gt0_exp_gt_now(
-        self, medication_id: int
-    ) -> list[Pharmacy]:
-        statement = (
+    @prepared
+    def _by_medication_id_quantity_gt0_exp_gt():
+        return (
             select(Pharmacy)
             .join(Inventory)
             .where(
-                Inventory.medication_id == medication_id,
+                Inventory.medication_id == bindparam("medication_id"),
                 Inventory.quantity > 0,
-                Inventory.expiration_date > datetime.now(),
+                Inventory.expiration_date > bindparam("now"),
             )
             .distinct()
         )
 
-        return self.session.scalars(statement).all()
+    @prepared
+    def _ids_by_manager_id():
+        return select(Pharmacy.id).where(Pharmacy.manager_id == bindparam("manager_id"))
+
+    @prepared
+    def _ids_by_employee_id():
+        return select(PharmacyEmployee.pharmacy_id).where(PharmacyEmployee.employee_id == bindparam("employee_id"))
+
+    @prepared
+    def _is_known_employee():
+        return select(
+            exists().where(
+                PharmacyEmployee.pharmacy_id == bindparam("pharmacy_id"),
+                PharmacyEmployee.employee_id == bindparam("employee_id"),
+            )
+        )
+
+    def find_by_medication_id_quantity_gt0_exp_gt_now(
+        self, medication_id: int
+    ) -> list[Pharmacy]:
+        return self.session.scalars(
+            self._by_medication_id_quantity_gt0_exp_gt,
+            {"medication_id": medication_id, "now": self.clock.now()},
+        ).all()
 
     def find_all_by_manager_id(self, manager_id: int) -> list[int]:
-        statement = select(Pharmacy.id).where(Pharmacy.manager_id == manager_id)
-        return self.session.execute(statement).scalars().all()
+        return self.session.execute(self._ids_by_manager_id, {"manager_id": manager_id}).scalars().all()
 
     def find_all_by_employee_id(self, employee_id: int) -> list[int]:
-        statement = select(PharmacyEmployee.pharmacy_id).where(PharmacyEmployee.employee_id == employee_id)
-        return self.session.execute(statement).scalars().all()
+        return self.session.execute(self._ids_by_employee_id, {"employee_id": employee_id}).scalars().all()
+
+    def is_known_employee(self, pharmacy_id: int, employee_id: int) -> bool:
+        return self.session.scalar(
+            self._is_known_employee, {"pharmacy_id": pharmacy_id, "employee_id": employee_id}
+        )
@@ -0,0 +1,41 @@
+from fastdbx import CrudRepository
+from fastdbx.core import prepared
+from sqlalchemy import select, bindparam
+
+from src.domain.internal.abstracts import AbstractSaleMedicationCounterRepository
+from src.domain.models import SaleMedicationCounter, Pharmacy
+
+_CONFLICT_COLUMNS = ("pharmacy_id", "medication_id")
+
+
+class SaleMedicationCounterRepository(AbstractSaleMedicationCounterRepository, CrudRepository[SaleMedicationCounter]):
+
+    def __init__(self):
+        super().__init__(SaleMedicationCounter)
+
+    def __call__(self, *args, **kwargs):
+        return SaleMedicationCounterRepository()
+
+    @prepared
+    def _mid_quantity_by_manager_id():
+        return (
+            select(SaleMedicationCounter.medication_id, SaleMedicationCounter.quantity)
+            .join(Pharmacy, SaleMedicationCounter.pharmacy_id == Pharmacy.id)
+            .where(Pharmacy.manager_id == bindparam("manager_id"))
+        )
+
+    def add_quantities(self, pharmacy_id: int, quantities: dict[int, int]):
+        """Adds the sold quantities to the pharmacy's counters, in a single upsert"""
+        rows = [
+            {"pharmacy_id": pharmacy_id, "medication_id": medication_id, "quantity": quantity}
+            for medication_id, quantity in quantities.items()
+        ]
+
+        self.upsert_many(rows, _CONFLICT_COLUMNS, update={
+            "quantity": lambda inserted: SaleMedicationCounter.quantity + inserted.quantity,
+        })
+
+    def find_mid_quantity_by_manager_id(self, manager_id: int) -> list[tuple[int, int]]:
+        """One (medication_id, quantity) row per pharmacy of the manager and medication it sold"""
+        return self.session.execute(self._mid_quantity_by_manager_id, {"manager_id": manager_id}).all()
+
@@ -1,46 +1,71 @@
-from datetime import datetime, timedelta
+from datetime import datetime
+from typing import Iterator, Sequence, Optional
 
+from fastapi import Depends
 from fastdbx import CrudRepository
-from sqlalchemy import select, func, desc
+from fastdbx.core import prepared
+from sqlalchemy import select, bindparam
 
 from src.domain.internal.abstracts import AbstractSaleRepository
+from src.domain.internal.clock import Clock, SystemClock
 from src.domain.models import Sale, SaleItem, Pharmacy
 
 
 class SaleRepository(AbstractSaleRepository, CrudRepository[Sale]):
 
-    def __init__(self):
+    def __init__(self, clock: Clock = Depends(SystemClock)):
         super().__init__(Sale)
+        self.clock = clock
 
     def __call__(self, *args, **kwargs):
-        return SaleRepository()
+        return SaleRepository(self.clock)
 
-    def find_medication_qsum_by_manager_id_limit(self, manager_id: int, limit: int):
-        statement = (
-            select(SaleItem.medication_id, func.sum(SaleItem.quantity).label("q"))
-            .join(Sale, SaleItem.sale_id == Sale.id)
-            .join(Pharmacy, Sale.pharmacy_id == Pharmacy.id)
-            .where(Pharmacy.manager_id == manager_id)
-            .group_by(SaleItem.medication_id)
-            .order_by(desc("q"))
-            .limit(limit)
+    @prepared
+    def _id_pid_eid_created_total():
+        return (
+            select(Sale.id, Sale.pharmacy_id, Sale.employee_id, Sale.created_at, Sale.total_amount)
+            .order_by(Sale.id)
         )
 
-        return self.session.execute(statement).all()
-
-    def find_date_scount_tsum_by_manager_id_days(self, manager_id, days: int):
-        start_date = datetime.now() - timedelta(days=days)
+    @prepared
+    def _sid_mid_quantity_price():
+        return select(SaleItem.sale_id, SaleItem.medication_id, SaleItem.quantity, SaleItem.unit_price)
 
-        statement = (
+    @prepared
+    def _with_items_by_manager_id_created_between():
+        return (
             select(
-                func.date(Sale.created_at).label("sale_date"),
-                func.sum(Sale.total_amount).label("total_sales_amount"),
-                func.count(Sale.id).label("number_of_sales"),
+                Sale.id, Sale.pharmacy_id, Sale.employee_id, Sale.created_at, Sale.total_amount,
+                SaleItem.medication_id, SaleItem.quantity, SaleItem.unit_price,
             )
+            .join(SaleItem, SaleItem.sale_id == Sale.id)
             .join(Pharmacy, Sale.pharmacy_id == Pharmacy.id)
-            .where(Sale.created_at >= start_date, Pharmacy.manager_id == manager_id)
-            .group_by("sale_date")
-            .order_by("sale_date")
+            .where(
+                Pharmacy.manager_id == bindparam("manager_id"),
+                Sale.created_at >= bindparam("start"),
+                Sale.created_at < bindparam("end"),
+            )
+            .order_by(Sale.id, SaleItem.id)
         )
 
-        return self.session.execute(statement).mappings().all()
+    def stream_id_pid_eid_created_total(self, batch_size: int) -> Iterator[Sequence[tuple]]:
+        """Every sale, in id order, in chunks of batch_size rows read through a server side cursor"""
+        result = self.session.execute(self._id_pid_eid_created_total, execution_options={"yield_per": batch_size})
+        return result.partitions()
+
+    def stream_sid_mid_quantity_price(self, batch_size: int) -> Iterator[Sequence[tuple]]:
+        result = self.session.execute(self._sid_mid_quantity_price, execution_options={"yield_per": batch_size})
+        return result.partitions()
+
+    def stream_with_items_by_manager_id_created_between(
+        self, manager_id: int, start: Optional[datetime], end: Optional[datetime], batch_size: int
+    ) -> Iterator[tuple]:
+        """One row per sale item of the manager's pharmacies sold in [start, end), in sale order
+
+        Either bound may be None, the rows are read batch_size at a time through a server side cursor
+        """
+        return self.session.execute(
+            self._with_items_by_manager_id_created_between,
+            {"manager_id": manager_id, "start": start or datetime.min, "end": end or datetime.max},
+            execution_options={"yield_per": batch_size},
+        )
@@ -0,0 +1,55 @@
+from datetime import timedelta, date
+from decimal import Decimal
+
+from fastapi import Depends
+from fastdbx import CrudRepository
+from fastdbx.core import prepared
+from sqlalchemy import select, func, bindparam
+
+from src.domain.internal.abstracts import AbstractSaleDailyRollupRepository
+from src.domain.internal.clock import Clock, SystemClock
+from src.domain.models import SaleDailyRollup, Pharmacy
+
+_CONFLICT_COLUMNS = ("pharmacy_id", "sale_date")
+
+
+class SaleDailyRollupRepository(AbstractSaleDailyRollupRepository, CrudRepository[SaleDailyRollup]):
+
+    def __init__(self, clock: Clock = Depends(SystemClock)):
+        super().__init__(SaleDailyRollup)
+        self.clock = clock
+
+    def __call__(self, *args, **kwargs):
+        return SaleDailyRollupRepository(self.clock)
+
+    @prepared
+    def _date_scount_tsum_by_manager_id():
+        return (
+            select(
+                SaleDailyRollup.sale_date,
+                func.sum(SaleDailyRollup.total_sales_amount).label("total_sales_amount"),
+                func.sum(SaleDailyRollup.number_of_sales).label("number_of_sales"),
+            )
+            .join(Pharmacy, SaleDailyRollup.pharmacy_id == Pharmacy.id)
+            .where(SaleDailyRollup.sale_date >= bindparam("start_date"), Pharmacy.manager_id == bindparam("manager_id"))
+            .group_by(SaleDailyRollup.sale_date)
+            .order_by(SaleDailyRollup.sale_date)
+        )
+
+    def add_sale(self, pharmacy_id: int, sale_date: date, amount: Decimal):
+        """Counts one more sale of the given amount in the pharmacy's rollup for that day, in a single upsert"""
+        row = {"pharmacy_id": pharmacy_id, "sale_date": sale_date, "number_of_sales": 1, "total_sales_amount": amount}
+
+        self.upsert_many([row], _CONFLICT_COLUMNS, update={
+            "number_of_sales": lambda inserted: SaleDailyRollup.number_of_sales + inserted.number_of_sales,
+            "total_sales_amount": lambda inserted: SaleDailyRollup.total_sales_amount + inserted.total_sales_amount,
+        })
+
+    def find_date_scount_tsum_by_manager_id_days(self, manager_id, days: int):
+        """The rollup is per day, so the window starts at midnight of the date `days` ago, that whole day included"""
+        start_date = (self.clock.now() - timedelta(days=days)).date()
+
+        return self.session.execute(
+            self._date_scount_tsum_by_manager_id, {"manager_id": manager_id, "start_date": start_date}
+        ).mappings().all()
+
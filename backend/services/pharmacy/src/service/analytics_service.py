@@ -0,0 +1,86 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Depends
+from fastdbx.transactions.meta import transactional
+
+from src.domain.dtos.analytics import (
+    HourlyRevenueDto,
+    MedicationRevenueDto,
+    EmployeeRevenueDto,
+    WeeklyRevenueDto,
+)
+from src.domain.internal.abstracts import AbstractPharmacyRepository
+from src.repository.pharmacy_repo import PharmacyRepository
+from src.service.sales_analytics import SalesAnalytics, get_sales_analytics
+
+
+class SalesAnalyticsService:
+
+    def __init__(
+        self,
+        pharmacy_repo: AbstractPharmacyRepository = Depends(PharmacyRepository),
+        analytics: SalesAnalytics = Depends(get_sales_analytics),
+    ):
+        self.pharmacy_repo = pharmacy_repo
+        self.analytics = analytics
+
+    def __call__(self, *args, **kwargs):
+        return SalesAnalyticsService()
+
+    def get_revenue_by_hour(
+        self, manager_id: int, start: Optional[datetime], end: Optional[datetime]
+    ) -> list[HourlyRevenueDto]:
+        revenue, number_of_sales = self.analytics.revenue_by_hour(self._pharmacy_ids(manager_id), start, end)
+
+        return [
+            HourlyRevenueDto(hour=hour, revenue=round(r, 2), number_of_sales=n)
+            for hour, (r, n) in enumerate(zip(revenue.tolist(), number_of_sales.tolist()))
+        ]
+
+    def get_revenue_by_medication(
+        self, manager_id: int, start: Optional[datetime], end: Optional[datetime], limit: int
+    ) -> list[MedicationRevenueDto]:
+        medication_ids, revenue, quantity = self.analytics.revenue_by_medication(
+            self._pharmacy_ids(manager_id), start, end
+        )
+
+        return [
+            MedicationRevenueDto(medication_id=medication_id, revenue=round(r, 2), quantity=q)
+            for medication_id, r, q in zip(
+                medication_ids[:limit].tolist(), revenue[:limit].tolist(), quantity[:limit].tolist()
+            )
+        ]
+
+    def get_revenue_by_employee(
+        self, manager_id: int, start: Optional[datetime], end: Optional[datetime]
+    ) -> list[EmployeeRevenueDto]:
+        employee_ids, revenue, number_of_sales = self.analytics.revenue_by_employee(
+            self._pharmacy_ids(manager_id), start, end
+        )
+
+        return [
+            EmployeeRevenueDto(employee_id=employee_id, revenue=round(r, 2), number_of_sales=n)
+            for employee_id, r, n in zip(employee_ids.tolist(), revenue.tolist(), number_of_sales.tolist())
+        ]
+
+    def get_revenue_week_over_week(self, manager_id: int, weeks: int) -> list[WeeklyRevenueDto]:
+        week_starts, revenue = self.analytics.revenue_by_week(self._pharmacy_ids(manager_id), weeks)
+        revenue = revenue.tolist()
+        result = []
+
+        for week, week_start in enumerate(week_starts.tolist()):
+            previous = revenue[week - 1] if week > 0 else 0
+            result.append(
+                WeeklyRevenueDto(
+                    week_start=week_start,
+                    revenue=round(revenue[week], 2),
+                    change=round((revenue[week] - previous) / previous, 4) if previous else None,
+                )
+            )
+
+        return result
+
+    @transactional(read_only=True)
+    def _pharmacy_ids(self, manager_id: int) -> list[int]:
+        return self.pharmacy_repo.find_all_by_manager_id(manager_id)
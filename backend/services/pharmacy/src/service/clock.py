@@ -0,0 +1,10 @@
+from datetime import datetime
+
+
+def to_local_time(value: datetime) -> datetime:
+    """Times are stored naive in the server's local time, aware datetimes are converted to it"""
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+
+    return value
+
@@ -0,0 +1,75 @@
+import csv
+import io
+from itertools import islice
+from typing import Any, BinaryIO, Iterable
+
+from pydantic import ValidationError
+
+from src.domain.dtos.inventory import RegisterInventoryRequest
+from src.domain.validations.exceptions import InvalidInventoryRowsException
+
+INVENTORY_CSV_COLUMNS = ("medication_id", "quantity", "expiration_date")
+
+
+def too_many_rows(max_rows: int) -> InvalidInventoryRowsException:
+    return InvalidInventoryRowsException(
+        detail=[{"row": None, "errors": [f"At most {max_rows} rows can be imported at once"]}]
+    )
+
+
+def read_inventory_csv(file: BinaryIO, max_rows: int) -> list[dict[str, Any]]:
+    """The rows of a CSV with a medication_id,quantity,expiration_date header, empty cells are read as missing values
+
+    The file is decoded while it is read, which stops one row past `max_rows`, so a larger upload is never loaded whole
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+
+    try:
+        reader = csv.DictReader(text)
+
+        missing = [column for column in INVENTORY_CSV_COLUMNS if column not in (reader.fieldnames or ())]
+        if missing:
+            error = f"Missing columns: {', '.join(missing)}"
+            raise InvalidInventoryRowsException(detail=[{"row": None, "errors": [error]}])
+
+        rows = [
+            {column: row[column] or None for column in INVENTORY_CSV_COLUMNS} for row in islice(reader, max_rows + 1)
+        ]
+    except UnicodeDecodeError:
+        raise InvalidInventoryRowsException(detail=[{"row": None, "errors": ["The file is not UTF-8 encoded CSV"]}])
+    finally:
+        # leaves the upload open, its owner closes it
+        text.detach()
+
+    if len(rows) > max_rows:
+        raise too_many_rows(max_rows)
+
+    return rows
+
+
+def validate_inventory_rows(rows: Iterable[Any]) -> list[RegisterInventoryRequest]:
+    """Validates every row before reporting, so one response lists all the errors, rows are numbered from 1"""
+    requests, errors, seen = [], [], {}
+
+    for number, row in enumerate(rows, start=1):
+        try:
+            request = RegisterInventoryRequest.model_validate(row)
+        except ValidationError as e:
+            errors.append({
+                "row": number,
+                "errors": [f"{'.'.join(map(str, error['loc'])) or 'row'}: {error['msg']}" for error in e.errors()],
+            })
+            continue
+
+        if request.medication_id in seen:
+            duplicate = f"medication_id: {request.medication_id} is already registered by row"
+            errors.append({"row": number, "errors": [f"{duplicate} {seen[request.medication_id]}"]})
+            continue
+
+        seen[request.medication_id] = number
+        requests.append(request)
+
+    if errors:
+        raise InvalidInventoryRowsException(detail=errors)
+
+    return requests
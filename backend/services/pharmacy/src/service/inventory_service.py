@@ -1,20 +1,28 @@
+from typing import Any
+
 from fastapi import Depends, HTTPException
 from fastdbx.transactions.meta import transactional
 from sqlalchemy.exc import SQLAlchemyError
 
 from src.domain.dtos.inventory import RegisterInventoryRequest, UpdateInventoryRequest
-from src.domain.internal.abstracts import AbstractInventoryRepository
+from src.domain.internal.abstracts import AbstractInventoryRepository, AbstractPharmacyRepository
 from src.domain.models import Inventory
 from src.domain.validations.exceptions import UnknownEmployeeException
 from src.repository.inventory_repo import InventoryRepository
+from src.repository.pharmacy_repo import PharmacyRepository
+from src.service.inventory_import import validate_inventory_rows, too_many_rows
+from src.settings import MAX_INVENTORY_IMPORT_ROWS
 
 
 class InventoryService:
 
     def __init__(
-        self, inventory_repo: AbstractInventoryRepository = Depends(InventoryRepository)
+        self,
+        inventory_repo: AbstractInventoryRepository = Depends(InventoryRepository),
+        pharmacy_repo: AbstractPharmacyRepository = Depends(PharmacyRepository),
     ):
         self.inventory_repo = inventory_repo
+        self.pharmacy_repo = pharmacy_repo
 
     def __call__(self, *args, **kwargs):
         return InventoryService()
@@ -34,6 +42,22 @@ class InventoryService:
         _new_inventory = Inventory(pharmacy_id=pharmacy_id, **payload.model_dump())
         self.inventory_repo.save(_new_inventory)
 
+    @transactional()
+    def register_medications_in_pharmacy_inventory(self, pharmacy_id: int, rows: list[Any]) -> int:
+        """Registers every row or none of them, the errors of all the invalid rows are reported together"""
+        if len(rows) > MAX_INVENTORY_IMPORT_ROWS:
+            raise too_many_rows(MAX_INVENTORY_IMPORT_ROWS)
+
+        requests = validate_inventory_rows(rows)
+
+        if self.pharmacy_repo.find_by_id(pharmacy_id) is None:
+            raise HTTPException(status_code=404, detail=f"Pharmacy {pharmacy_id} does not exist")
+
+        self.inventory_repo.upsert_by_pharmacy_and_medication(
+            pharmacy_id, [request.model_dump() for request in requests]
+        )
+        return len(requests)
+
     @transactional(rollback_for=(UnknownEmployeeException, SQLAlchemyError))
     def update_pharmacy_inventory(
         self, pharmacy_id, employee_id, payload: UpdateInventoryRequest
@@ -48,7 +72,7 @@ class InventoryService:
                 detail=f"No inventory for {payload.medication_id} at {pharmacy_id}",
             )
 
-        if not inventory.pharmacy.is_known_employee(employee_id):
+        if not self.pharmacy_repo.is_known_employee(pharmacy_id, employee_id):
             raise UnknownEmployeeException(
                 detail=f"Employee {employee_id} is can not perform inventory updates at pharmacy {pharmacy_id}"
             )
@@ -1,15 +1,22 @@
 import random
+from concurrent.futures import ThreadPoolExecutor
 
-import httpx
+from service_http import ServiceHttpClient
 
 from src.domain.dtos.medication import MedicationDto
 from src.domain.internal.medication_client import MedicationClient
-from src.settings import MEDICATION_SERVICE_BASE_URL
+from src.service.medication_cache import medication_cache
+from src.settings import MEDICATION_SERVICE_BASE_URL, MEDICATION_SERVICE_HTTP
+
+medication_service_client = ServiceHttpClient(MEDICATION_SERVICE_BASE_URL, MEDICATION_SERVICE_HTTP)
+_batch_executor = ThreadPoolExecutor(
+    max_workers=MEDICATION_SERVICE_HTTP["MAX_CONCURRENT_BATCHES"], thread_name_prefix="medication-batch"
+)
 
 
 class MedicationApiClient(MedicationClient):
     def __init__(self):
-        self.client = httpx.Client(base_url=MEDICATION_SERVICE_BASE_URL)
+        self.client = medication_service_client
 
     def __call__(self, *args, **kwargs):
         return MedicationApiClient()
@@ -17,8 +24,20 @@ class MedicationApiClient(MedicationClient):
     def get_medications_by_ids(self, ids: list[int]) -> list[MedicationDto]:
         if not ids:
             return []
-        query_params = [("ids", id) for id in ids]
-        response = self.client.get("/medications/", params=query_params)
+        return medication_cache.get_many(ids, loader=self._fetch_medications)
+
+    def _fetch_medications(self, ids: list[int]) -> list[MedicationDto]:
+        """Splits the ids in batches of BATCH_SIZE, fetched concurrently"""
+        batch_size = MEDICATION_SERVICE_HTTP["BATCH_SIZE"]
+        batches = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+
+        if len(batches) == 1:
+            return self._fetch_batch(batches[0])
+
+        return [medication for batch in _batch_executor.map(self._fetch_batch, batches) for medication in batch]
+
+    def _fetch_batch(self, ids: list[int]) -> list[MedicationDto]:
+        response = self.client.post("/medications/batch", json={"ids": ids}, idempotent=True)
         response.raise_for_status()
         data = response.json()
         return [MedicationDto.from_json(json) for json in data]
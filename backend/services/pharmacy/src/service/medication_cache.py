@@ -0,0 +1,135 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+from src.domain.dtos.medication import MedicationDto
+from src.settings import MEDICATION_CACHE
+
+logger = logging.getLogger("uvicorn.error")
+
+MedicationLoader = Callable[[list[int]], list[MedicationDto]]
+
+
+@dataclass
+class CacheStatistics:
+    size: int
+    hits: int
+    stale_hits: int
+    misses: int
+    evictions: int
+
+
+class MedicationCache:
+    """Bounded LRU cache of medications by id, entries expire `ttl` seconds after they were loaded
+
+    An expired entry younger than `ttl + stale_ttl` is still served, and reloaded in the background so the
+    caller does not wait for the medication service. Older entries count as misses.
+    """
+
+    def __init__(self, max_size: int, ttl: float, stale_ttl: float = 0.0, timer: Callable[[], float] = time.monotonic):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._timer = timer
+        self._entries: OrderedDict[int, tuple[float, MedicationDto]] = OrderedDict()
+        self._refreshing: set[int] = set()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_many(self, ids: Iterable[int], loader: MedicationLoader) -> list[MedicationDto]:
+        """The medications with the given ids, in request order, only the ids not cached are passed to the loader"""
+        ids = list(dict.fromkeys(ids))
+        found, missing, stale = self._lookup(ids)
+
+        if missing:
+            loaded = loader(missing)
+            self.put_many(loaded)
+            found.update((medication.id, medication) for medication in loaded)
+
+        if stale:
+            self._refresh_in_background(stale, loader)
+
+        return [found[id] for id in ids if id in found]
+
+    def put_many(self, medications: Iterable[MedicationDto]):
+        loaded_at = self._timer()
+
+        with self._lock:
+            for medication in medications:
+                self._entries[medication.id] = (loaded_at, medication)
+                self._entries.move_to_end(medication.id)
+
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, ids: Iterable[int] = None):
+        with self._lock:
+            if ids is None:
+                self._entries.clear()
+                return
+
+            for id in ids:
+                self._entries.pop(id, None)
+
+    def statistics(self) -> CacheStatistics:
+        with self._lock:
+            return CacheStatistics(
+                size=len(self._entries),
+                hits=self._hits,
+                stale_hits=self._stale_hits,
+                misses=self._misses,
+                evictions=self._evictions,
+            )
+
+    def _lookup(self, ids: list[int]) -> tuple[dict[int, MedicationDto], list[int], list[int]]:
+        now = self._timer()
+        found, missing, stale = {}, [], []
+
+        with self._lock:
+            for id in ids:
+                entry = self._entries.get(id)
+                age = now - entry[0] if entry is not None else None
+
+                if age is None or age > self._ttl + self._stale_ttl:
+                    missing.append(id)
+                    self._misses += 1
+                    continue
+
+                found[id] = entry[1]
+                self._entries.move_to_end(id)
+
+                if age <= self._ttl:
+                    self._hits += 1
+                else:
+                    self._stale_hits += 1
+                    if id not in self._refreshing:
+                        self._refreshing.add(id)
+                        stale.append(id)
+
+        return found, missing, stale
+
+    def _refresh_in_background(self, ids: list[int], loader: MedicationLoader):
+        def refresh():
+            try:
+                self.put_many(loader(ids))
+            except Exception as e:
+                logger.warning(f"Could not refresh cached medications {ids}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.difference_update(ids)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+
+medication_cache = MedicationCache(
+    max_size=MEDICATION_CACHE["MAX_SIZE"],
+    ttl=MEDICATION_CACHE["TTL"],
+    stale_ttl=MEDICATION_CACHE.get("STALE_TTL", 0.0),
+)
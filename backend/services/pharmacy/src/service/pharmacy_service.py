@@ -17,9 +17,13 @@ from src.repository.inventory_repo import InventoryRepository
 from src.repository.pharmacy_repo import PharmacyRepository
 from src.repository.sale_repo import SaleRepository
 from src.service.medication_api_client import MedicationApiClient
+from src.service.single_flight import SingleFlight
 
 logger = logging.getLogger("uvicorn.error")
 
+# shared by every PharmacyService, a new instance is created per request
+_medication_lookups = SingleFlight()
+
 
 class PharmacyService:
 
@@ -42,16 +46,16 @@ class PharmacyService:
     def __call__(self, *args, **kwargs):
         return PharmacyService()
 
-    @transactional()
     def get_not_expired_medications(self) -> list[MedicationDto]:
-        not_expired_medication_ids = [
-            i.medication_id for i in self.inventory_repo.find_by_expiration_date_gt()
-        ]
-        return self.medication_client.get_medications_by_ids(
-            ids=not_expired_medication_ids
-        )
+        """Concurrent requests share one query and one medication service call, the returned list is shared too"""
+        return _medication_lookups.do("not_expired_medications", self._load_not_expired_medications)
 
-    @transactional()
+    @transactional(read_only=True)
+    def _load_not_expired_medications(self) -> list[MedicationDto]:
+        in_stock_medication_ids = self.inventory_repo.find_distinct_medication_ids_quantity_gt0_exp_gt_now()
+        return self.medication_client.get_medications_by_ids(ids=in_stock_medication_ids)
+
+    @transactional(read_only=True)
     def get_pharmacies_for_medication(self, medication_id) -> list[PharmacyDto]:
         pharmacies = self.pharmacy_repo.find_by_medication_id_quantity_gt0_exp_gt_now(
             medication_id
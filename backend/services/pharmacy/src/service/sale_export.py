@@ -0,0 +1,48 @@
+import csv
+import io
+import json
+from itertools import groupby, islice
+from operator import itemgetter
+from typing import Iterable, Iterator
+
+SALE_COLUMNS = ("sale_id", "pharmacy_id", "employee_id", "created_at", "total_amount")
+ITEM_COLUMNS = ("medication_id", "quantity", "unit_price")
+
+
+def _chunked(lines: Iterator[str], chunk_size: int) -> Iterator[str]:
+    """Joins the lines chunk_size at a time, so the response is not written one line at a time"""
+    while chunk := "".join(islice(lines, chunk_size)):
+        yield chunk
+
+
+def _csv_lines(rows: Iterable[tuple]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(SALE_COLUMNS + ITEM_COLUMNS)
+
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def _ndjson_lines(rows: Iterable[tuple]) -> Iterator[str]:
+    # the rows of a sale are consecutive, so grouping them only holds one sale at a time
+    for _, sale_rows in groupby(rows, key=itemgetter(0)):
+        sale_rows = list(sale_rows)
+        sale = dict(zip(SALE_COLUMNS, sale_rows[0][:len(SALE_COLUMNS)]))
+        sale["items"] = [dict(zip(ITEM_COLUMNS, row[len(SALE_COLUMNS):])) for row in sale_rows]
+        yield json.dumps(sale, default=str) + "\n"
+
+
+def to_csv(rows: Iterable[tuple], chunk_size: int) -> Iterator[str]:
+    """A header line, then one line per sale item"""
+    return _chunked(_csv_lines(rows), chunk_size)
+
+
+def to_ndjson(rows: Iterable[tuple], chunk_size: int) -> Iterator[str]:
+    """One JSON object per sale, with its items nested"""
+    return _chunked(_ndjson_lines(rows), chunk_size)
@@ -1,12 +1,25 @@
+import heapq
 import logging
+from collections import Counter
+from datetime import datetime
 from decimal import Decimal
+from typing import Optional, Iterator
 
-from fastapi import Depends
+from fastapi import Depends, HTTPException
+from fastdbx.core import Page, InvalidCursorException
+from fastdbx.core.pagination import encode_cursor, decode_cursor
 from fastdbx.transactions.meta import transactional
 from sqlalchemy.exc import SQLAlchemyError
 
-from src.domain.dtos.sale import SaleItemDto, MostSoldMedicationDto, SaleTrendDto
-from src.domain.internal.abstracts import AbstractInventoryRepository, AbstractSaleRepository
+from src.domain.dtos.medication import MedicationDto
+from src.domain.dtos.sale import SaleItemDto, MostSoldMedicationDto, SaleTrendDto, SaleExportFormat
+from src.domain.internal.abstracts import (
+    AbstractInventoryRepository,
+    AbstractPharmacyRepository,
+    AbstractSaleRepository,
+    AbstractSaleDailyRollupRepository,
+    AbstractSaleMedicationCounterRepository,
+)
 from src.domain.internal.medication_client import MedicationClient
 from src.domain.models import SaleItem, Sale
 from src.domain.validations.exceptions import (
@@ -14,11 +27,20 @@ from src.domain.validations.exceptions import (
     UnknownEmployeeException,
 )
 from src.repository.inventory_repo import InventoryRepository
+from src.repository.pharmacy_repo import PharmacyRepository
+from src.repository.sale_counter_repo import SaleMedicationCounterRepository
 from src.repository.sale_repo import SaleRepository
+from src.repository.sale_rollup_repo import SaleDailyRollupRepository
+from src.service.clock import to_local_time
+from src.service.sale_export import to_csv, to_ndjson
 from src.service.medication_api_client import MedicationApiClient
+from src.settings import SALES_EXPORT
 
 logger = logging.getLogger("uvicorn.error")
 
+# the ranking has no id to continue after, its cursors hold the position of the next page instead
+OFFSET_CURSOR_KEY = "offset"
+
 
 class SaleService:
 
@@ -26,46 +48,69 @@ class SaleService:
         self,
         inventory_repo: AbstractInventoryRepository = Depends(InventoryRepository),
         sale_repo: AbstractSaleRepository = Depends(SaleRepository),
+        pharmacy_repo: AbstractPharmacyRepository = Depends(PharmacyRepository),
         medication_client: MedicationClient = Depends(MedicationApiClient),
+        sale_rollup_repo: AbstractSaleDailyRollupRepository = Depends(SaleDailyRollupRepository),
+        sale_counter_repo: AbstractSaleMedicationCounterRepository = Depends(SaleMedicationCounterRepository),
     ):
         self.inventory_repo = inventory_repo
         self.sale_repo = sale_repo
+        self.pharmacy_repo = pharmacy_repo
         self.medication_client = medication_client
+        self.sale_rollup_repo = sale_rollup_repo
+        self.sale_counter_repo = sale_counter_repo
 
     def __call__(self, *args, **kwargs):
         return SaleService()
 
-    @transactional()
+    @transactional(read_only=True)
     def get_most_sold_medications(
-        self, manager_id: int, limit: int
-    ) -> list[MostSoldMedicationDto]:
-        rows = self.sale_repo.find_medication_qsum_by_manager_id_limit(
-            manager_id, limit
-        )
+        self, manager_id: int, limit: int, cursor: Optional[str] = None
+    ) -> Page[MostSoldMedicationDto]:
+        try:
+            offset = decode_cursor(cursor, key=OFFSET_CURSOR_KEY) if cursor is not None else 0
+        except InvalidCursorException as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-        medication_ids = [row.medication_id for row in rows]
-        medications = self.medication_client.get_medications_by_ids(ids=medication_ids)
-        result = []
-
-        for medication in medications:
-            row = next((r for r in rows if r.medication_id == medication.id), None)
-            if row is not None:
-                result.append(
-                    MostSoldMedicationDto(
-                        medication_id=medication.id,
-                        name=medication.name,
-                        quantity=row.q,
-                        manufacturer=medication.manufacturer,
-                    )
-                )
+        if offset < 0:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
+
+        totals = Counter()
+        for medication_id, quantity in self.sale_counter_repo.find_mid_quantity_by_manager_id(manager_id):
+            totals[medication_id] += quantity
 
-        return result
+        # a heap of the `offset + limit` largest totals instead of sorting every medication, ties are ranked by
+        # medication id so that the pages do not depend on the order of the counter rows
+        ranked = heapq.nsmallest(offset + limit, totals.items(), key=lambda total: (-total[1], total[0]))[offset:]
+        medications = self.medication_client.get_medications_by_ids(ids=[medication_id for medication_id, _ in ranked])
+        next_cursor = encode_cursor(offset + limit, key=OFFSET_CURSOR_KEY) if len(totals) > offset + limit else None
 
-    @transactional()
+        return Page(items=rank_most_sold_medications(ranked, medications), next_cursor=next_cursor)
+
+    @transactional(read_only=True)
     def get_sale_trends_past_days(self, manager_id, days: int) -> list[SaleTrendDto]:
-        sale_trends = self.sale_repo.find_date_scount_tsum_by_manager_id_days(manager_id, days)
+        sale_trends = self.sale_rollup_repo.find_date_scount_tsum_by_manager_id_days(manager_id, days)
         return [SaleTrendDto.model_validate(trend) for trend in sale_trends]
 
+    @transactional(read_only=True)
+    def export_sales(
+        self,
+        manager_id: int,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        export_format: SaleExportFormat,
+    ) -> Iterator[str]:
+        """The sales of the manager's pharmacies made in [start, end), streamed in chunks of formatted lines"""
+        rows = self.sale_repo.stream_with_items_by_manager_id_created_between(
+            manager_id,
+            start=to_local_time(start) if start is not None else None,
+            end=to_local_time(end) if end is not None else None,
+            batch_size=SALES_EXPORT["BATCH_SIZE"],
+        )
+        to_lines = to_csv if export_format is SaleExportFormat.CSV else to_ndjson
+
+        yield from to_lines(rows, chunk_size=SALES_EXPORT["CHUNK_SIZE"])
+
     @transactional(
         rollback_for=(
             InsufficientInventoryException,
@@ -77,43 +122,51 @@ class SaleService:
     def place_sale_at_pharmacy(
         self, employee_id: int, pharmacy_id: int, items: list[SaleItemDto]
     ):
-        sold_items: list[SaleItem] = []
-        total_amount = Decimal(0)
+        if not self.pharmacy_repo.is_known_employee(pharmacy_id, employee_id):
+            raise UnknownEmployeeException(
+                detail=f"Employee {employee_id} is not authorized to perform sales at pharmacy {pharmacy_id}"
+            )
 
+        quantities = Counter()
         for item in items:
-            inventory = self.inventory_repo.find_by_pharmacy_and_medication(
-                pharmacy_id=pharmacy_id, medication_id=item.medication_id
-            )
+            quantities[item.medication_id] += item.quantity
 
-            if inventory is None:
-                raise UnknownEmployeeException(
-                    detail=f"Can't sell medication {item.medication_id}"
-                )
+        inventories = {
+            inventory.medication_id: inventory
+            for inventory in self.inventory_repo.find_by_pharmacy_and_medication_ids_for_update(
+                pharmacy_id, medication_ids=list(quantities)
+            )
+        }
 
-            if not inventory.pharmacy.is_known_employee(employee_id=employee_id):
-                raise UnknownEmployeeException(
-                    detail=f"Employee {employee_id} is not authorized to perform sales at pharmacy {pharmacy_id}"
-                )
+        missing = next((m for m in quantities if m not in inventories), None)
+        if missing is not None:
+            raise UnknownEmployeeException(detail=f"Can't sell medication {missing}")
 
-            if inventory.quantity < item.quantity:
+        for medication_id, quantity in quantities.items():
+            if inventories[medication_id].quantity < quantity:
                 raise InsufficientInventoryException(
-                    detail=f"Can't sell {item.quantity} of medication {item.medication_id}"
+                    detail=f"Can't sell {quantity} of medication {medication_id}"
                 )
 
-            self.inventory_repo.save(
-                instance=inventory, quantity=inventory.quantity - item.quantity
+        # the quantity condition of the update guards against sales committed since the inventories were read
+        if self.inventory_repo.decrement_quantities(pharmacy_id, quantities) != len(quantities):
+            raise InsufficientInventoryException(
+                detail="Inventory changed while placing the sale, please retry"
             )
 
-            total_amount += Decimal(item.unit_price) * item.quantity
-            sold_items.append(
-                SaleItem(
-                    medication_id=item.medication_id,
-                    quantity=item.quantity,
-                    unit_price=item.unit_price,
-                )
+        sold_items = [
+            SaleItem(
+                medication_id=item.medication_id,
+                quantity=item.quantity,
+                unit_price=item.unit_price,
             )
+            for item in items
+        ]
+        total_amount = sum(
+            (Decimal(item.unit_price) * item.quantity for item in items), Decimal(0)
+        )
 
-        self.sale_repo.save(
+        sale = self.sale_repo.save(
             instance=Sale(
                 total_amount=total_amount,
                 employee_id=employee_id,
@@ -121,3 +174,31 @@ class SaleService:
                 sale_items=sold_items,
             )
         )
+        self.sale_rollup_repo.add_sale(pharmacy_id, sale.created_at.date(), total_amount)
+        self.sale_counter_repo.add_quantities(pharmacy_id, quantities)
+
+
+def rank_most_sold_medications(
+    ranked: list[tuple[int, int]], medications: list[MedicationDto]
+) -> list[MostSoldMedicationDto]:
+    """Joins the (medication_id, quantity) ranking with the medications, keeping the ranking's order
+
+    Medications the medication service did not return are left out
+    """
+    medications_by_id = {medication.id: medication for medication in medications}
+    result = []
+
+    for medication_id, quantity in ranked:
+        medication = medications_by_id.get(medication_id)
+
+        if medication is not None:
+            result.append(
+                MostSoldMedicationDto(
+                    medication_id=medication_id,
+                    name=medication.name,
+                    quantity=quantity,
+                    manufacturer=medication.manufacturer,
+                )
+            )
+
+    return result
@@ -0,0 +1,246 @@
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+from fastapi import Request
+from fastdbx.transactions.meta import transactional
+
+from src.domain.internal.abstracts import AbstractSaleRepository
+from src.domain.internal.clock import Clock, SystemClock
+from src.repository.sale_repo import SaleRepository
+from src.service.clock import to_local_time
+
+logger = logging.getLogger("uvicorn.error")
+
+HOURS_PER_DAY = 24
+WEEK = np.timedelta64(7, "D")
+
+
+def _to_datetime64(value: datetime) -> np.datetime64:
+    return np.datetime64(to_local_time(value), "us")
+
+
+def _read_columns(chunks: Iterator[Sequence[tuple]], dtypes: Sequence[str]) -> list[np.ndarray]:
+    """Transposes the row chunks into one array per column, only one chunk of rows is held at a time"""
+    columns = [[] for _ in dtypes]
+
+    for rows in chunks:
+        for values, column, dtype in zip(zip(*rows), columns, dtypes):
+            column.append(np.array(values, dtype=dtype))
+
+    return [np.concatenate(column) if column else np.empty(0, dtype) for column, dtype in zip(columns, dtypes)]
+
+
+@dataclass(frozen=True)
+class ColumnTable:
+    """Equally long columns sorted by pharmacy, then by creation time
+
+    Every pharmacy's rows form one contiguous partition, inside it the rows of a time range, a day or a week,
+    are contiguous too and are found with a binary search over `created_at`
+    """
+    columns: dict[str, np.ndarray]
+    partitions: dict[int, tuple[int, int]]
+
+    @staticmethod
+    def build(columns: dict[str, np.ndarray]) -> "ColumnTable":
+        order = np.lexsort((columns["created_at"], columns["pharmacy_id"]))
+        columns = {name: column[order] for name, column in columns.items()}
+        pharmacy_ids, starts, counts = np.unique(columns["pharmacy_id"], return_index=True, return_counts=True)
+        partitions = {
+            int(pharmacy_id): (int(start), int(start + count))
+            for pharmacy_id, start, count in zip(pharmacy_ids, starts, counts)
+        }
+        return ColumnTable(columns=columns, partitions=partitions)
+
+    @property
+    def size(self) -> int:
+        return len(self.columns["pharmacy_id"])
+
+    def select(
+        self, pharmacy_ids: Iterable[int], start: Optional[np.datetime64], end: Optional[np.datetime64]
+    ) -> dict[str, np.ndarray]:
+        """The rows of the given pharmacies created in [start, end), either bound may be None"""
+        slices = []
+
+        for pharmacy_id in pharmacy_ids:
+            if pharmacy_id not in self.partitions:
+                continue
+
+            first, last = self.partitions[pharmacy_id]
+            created_at = self.columns["created_at"][first:last]
+            lower = first + (np.searchsorted(created_at, start, side="left") if start is not None else 0)
+            upper = first + (np.searchsorted(created_at, end, side="left") if end is not None else last - first)
+            slices.append(slice(lower, upper))
+
+        return {
+            name: np.concatenate([column[s] for s in slices]) if slices else column[:0]
+            for name, column in self.columns.items()
+        }
+
+
+@dataclass(frozen=True)
+class SalesSnapshot:
+    sales: ColumnTable
+    items: ColumnTable
+    loaded_at: datetime
+
+
+class SalesAnalytics:
+    """In process columnar copy of the sale and sale_item tables answering the manager dashboards
+
+    The tables are exported every `refresh_interval` seconds by a background thread, each export replaces the
+    whole snapshot, so the answers can be up to one interval behind the database. The queries are vectorized
+    over the snapshot arrays and never touch the database. Without a sale_repo, every export reads through a
+    SaleRepository of the current Datasource.
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float,
+        batch_size: int,
+        clock: Optional[Clock] = None,
+        sale_repo: Optional[AbstractSaleRepository] = None,
+    ):
+        self._refresh_interval = refresh_interval
+        self._batch_size = batch_size
+        self._clock = clock or SystemClock()
+        self._sale_repo = sale_repo
+        self._snapshot: Optional[SalesSnapshot] = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def snapshot(self) -> SalesSnapshot:
+        if self._snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self._export()
+
+        return self._snapshot
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._refresh_periodically, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def refresh(self):
+        snapshot = self._export()
+
+        with self._lock:
+            self._snapshot = snapshot
+
+    def revenue_by_hour(
+        self, pharmacy_ids: list[int], start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Revenue and number of sales per hour of the day, indexed 0 to 23"""
+        sales = self.snapshot.sales.select(pharmacy_ids, *self._bounds(start, end))
+        created_at = sales["created_at"]
+        hours = (created_at - created_at.astype("datetime64[D]")).astype("timedelta64[h]").astype(np.int64)
+
+        revenue = np.bincount(hours, weights=sales["total_amount"], minlength=HOURS_PER_DAY)
+        number_of_sales = np.bincount(hours, minlength=HOURS_PER_DAY)
+        return revenue, number_of_sales
+
+    def revenue_by_medication(
+        self, pharmacy_ids: list[int], start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Medication ids with their revenue and sold quantity, in descending order of the revenue"""
+        items = self.snapshot.items.select(pharmacy_ids, *self._bounds(start, end))
+        medication_ids, groups = np.unique(items["medication_id"], return_inverse=True)
+
+        revenue = np.bincount(groups, weights=items["revenue"], minlength=len(medication_ids))
+        quantity = np.bincount(groups, weights=items["quantity"], minlength=len(medication_ids)).astype(np.int64)
+        order = np.argsort(-revenue, kind="stable")
+        return medication_ids[order], revenue[order], quantity[order]
+
+    def revenue_by_employee(
+        self, pharmacy_ids: list[int], start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Employee ids with their revenue and number of sales, in descending order of the revenue"""
+        sales = self.snapshot.sales.select(pharmacy_ids, *self._bounds(start, end))
+        employee_ids, groups = np.unique(sales["employee_id"], return_inverse=True)
+
+        revenue = np.bincount(groups, weights=sales["total_amount"], minlength=len(employee_ids))
+        number_of_sales = np.bincount(groups, minlength=len(employee_ids))
+        order = np.argsort(-revenue, kind="stable")
+        return employee_ids[order], revenue[order], number_of_sales[order]
+
+    def revenue_by_week(self, pharmacy_ids: list[int], weeks: int) -> tuple[np.ndarray, np.ndarray]:
+        """Start and revenue of each of the past `weeks` rolling 7 day windows ending now, oldest first"""
+        end = _to_datetime64(self._clock.now())
+        start = end - weeks * WEEK
+        sales = self.snapshot.sales.select(pharmacy_ids, start, end)
+        week_indexes = ((sales["created_at"] - start) // WEEK).astype(np.int64)
+
+        revenue = np.bincount(week_indexes, weights=sales["total_amount"], minlength=weeks)
+        week_starts = start + np.arange(weeks) * WEEK
+        return week_starts, revenue
+
+    def _refresh_periodically(self):
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Could not refresh the sales analytics: {e}")
+
+            self._stopped.wait(self._refresh_interval)
+
+    @transactional(read_only=True)
+    def _export(self) -> SalesSnapshot:
+        sale_repo = self._sale_repo or SaleRepository(self._clock)
+        loaded_at = self._clock.now()
+        sale_ids, pharmacy_ids, employee_ids, created_at, total_amounts = _read_columns(
+            sale_repo.stream_id_pid_eid_created_total(self._batch_size),
+            ("int64", "int32", "int32", "datetime64[us]", "float64"),
+        )
+        item_sale_ids, medication_ids, quantities, unit_prices = _read_columns(
+            sale_repo.stream_sid_mid_quantity_price(self._batch_size),
+            ("int64", "int32", "int64", "float64"),
+        )
+
+        # sale ids are exported in order, so each item finds its sale with a binary search
+        positions = np.searchsorted(sale_ids, item_sale_ids)
+        known = positions < len(sale_ids)
+        known[known] = sale_ids[positions[known]] == item_sale_ids[known]
+        positions = positions[known]
+
+        sales = ColumnTable.build({
+            "pharmacy_id": pharmacy_ids,
+            "employee_id": employee_ids,
+            "created_at": created_at,
+            "total_amount": total_amounts,
+        })
+        items = ColumnTable.build({
+            "pharmacy_id": pharmacy_ids[positions],
+            "created_at": created_at[positions],
+            "medication_id": medication_ids[known],
+            "quantity": quantities[known],
+            "revenue": quantities[known] * unit_prices[known],
+        })
+
+        logger.info(f"Exported {sales.size} sales and {items.size} sale items for analytics")
+        return SalesSnapshot(sales=sales, items=items, loaded_at=loaded_at)
+
+    @staticmethod
+    def _bounds(start: Optional[datetime], end: Optional[datetime]):
+        return (
+            _to_datetime64(start) if start is not None else None,
+            _to_datetime64(end) if end is not None else None,
+        )
+
+
+
+def get_sales_analytics(request: Request) -> SalesAnalytics:
+    """The instance started by the application's lifespan"""
+    return request.app.state.sales_analytics
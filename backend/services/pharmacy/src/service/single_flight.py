@@ -0,0 +1,54 @@
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+def _copy_error(error: BaseException) -> BaseException:
+    """A copy of the exception with its attributes, but without the traceback, so every waiter raises its own"""
+    copied = type(error).__new__(type(error), *error.args)
+    copied.__dict__.update(error.__dict__)
+    return copied
+
+
+class SingleFlight:
+    """Coalesces concurrent calls sharing a key into one execution
+
+    The first caller runs the function, callers arriving with the same key while it is in flight wait for it and
+    get the same result, or a copy of the same exception, caused by the original one. Once it finishes the next
+    call runs the function again, nothing is cached.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise _copy_error(call.error) from call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
@@ -4,14 +4,61 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 MEDICATION_SERVICE_BASE_URL = os.getenv("MEDICATION_SERVICE_BASE_URL", "http://localhost:8002/api")
 
+# shared connection pool to the medication service, timeouts and backoff in seconds
+MEDICATION_SERVICE_HTTP = {
+    "MAX_CONNECTIONS": 100,
+    "MAX_KEEPALIVE_CONNECTIONS": 20,
+    "KEEPALIVE_EXPIRY": 30,
+    "CONNECT_TIMEOUT": 2,
+    "READ_TIMEOUT": 5,
+    "RETRIES": 2,
+    "BACKOFF": 0.1,
+    "CIRCUIT_FAILURE_THRESHOLD": 5,
+    "CIRCUIT_RESET_TIMEOUT": 30,
+    # medication ids per batch lookup and batch lookups sent at once
+    "BATCH_SIZE": 200,
+    "MAX_CONCURRENT_BATCHES": 4,
+}
+
+# per id cache of the medication service responses, TTL and STALE_TTL in seconds
+MEDICATION_CACHE = {
+    "MAX_SIZE": 10_000,
+    "TTL": 300,
+    "STALE_TTL": 60,
+}
+
+# columnar copy of the sales answering the manager analytics, REFRESH_INTERVAL in seconds
+SALES_ANALYTICS = {
+    "REFRESH_INTERVAL": 300,
+    "BATCH_SIZE": 10_000,
+}
+
+# rows read from the database per round trip and lines written per chunk of the sales export
+SALES_EXPORT = {
+    "BATCH_SIZE": 1000,
+    "CHUNK_SIZE": 500,
+}
+
+MAX_PAGE_SIZE = 1000
+MAX_INVENTORY_IMPORT_ROWS = 5000
+
+# development aid, warns on lazy loads repeated that many times in a transaction, off when unset
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD")) if os.getenv("N_PLUS_ONE_THRESHOLD") else None
+
 FASTDBX = {
     "ENGINE": {
         "URL": "sqlite:///pharmacy.db",
         "ECHO": True
     },
-    "CREATE_TABLES": True
+    "CREATE_TABLES": True,
+    "N_PLUS_ONE_THRESHOLD": N_PLUS_ONE_THRESHOLD,
+    "MIGRATIONS": {
+        "DIRECTORY": os.path.join(BASE_DIR, "migrations"),
+    },
 }
 
 JWT_GUARD = {
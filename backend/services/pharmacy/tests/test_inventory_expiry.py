@@ -0,0 +1,72 @@
+"""Expiry aware finders read the current time from the clock
+
+Run from backend/services/pharmacy, with the same environment as the service (see run.dev.bat and .env):
+
+    set FASTAPI_SETTINGS_MODULE=src.settings
+    python -m unittest discover tests
+"""
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from fastdbx import Datasource
+from fastdbx.config.schemas import FastDbxConfig, EngineConfig
+
+from src.domain.internal.clock import FixedClock
+from src.domain.models import Inventory, Pharmacy
+from src.repository.inventory_repo import InventoryRepository
+from src.repository.pharmacy_repo import PharmacyRepository
+
+
+class TestInventoryExpiry(unittest.TestCase):
+    """Medication 1 expires in a day at pharmacy 1 and in three days at pharmacy 2, medication 2 is out of stock"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        settings = FastDbxConfig(
+            engine=EngineConfig(url=f"sqlite:///{os.path.join(self.tmpdir.name, 'pharmacy.db')}", echo=False),
+            create_tables=True,
+        )
+        Datasource._instance = Datasource(settings)
+        Datasource._instance.startup()
+
+        now = datetime.now()
+        self.clock = FixedClock(now)
+        with Datasource._instance.session() as session:
+            session.add_all([Pharmacy(id=id, name="p", address="a", manager_id=1) for id in (1, 2)])
+            session.add_all([
+                Inventory(pharmacy_id=1, medication_id=1, quantity=3, expiration_date=now + timedelta(days=1)),
+                Inventory(pharmacy_id=2, medication_id=1, quantity=3, expiration_date=now + timedelta(days=3)),
+                Inventory(pharmacy_id=1, medication_id=2, quantity=0, expiration_date=now + timedelta(days=3)),
+            ])
+            session.commit()
+
+    def tearDown(self):
+        Datasource._instance.shutdown()
+        self.tmpdir.cleanup()
+
+    def test_distinctMedicationIdsInStock_followTheClock(self):
+        inventory_repo = InventoryRepository(self.clock)
+
+        with Datasource._instance.session():
+            self.assertEqual(inventory_repo.find_distinct_medication_ids_quantity_gt0_exp_gt_now(), [1])
+            self.clock.advance(timedelta(days=3))
+            self.assertEqual(inventory_repo.find_distinct_medication_ids_quantity_gt0_exp_gt_now(), [])
+
+    def test_pharmaciesWithMedicationInStock_followTheClock(self):
+        pharmacy_repo = PharmacyRepository(self.clock)
+
+        with Datasource._instance.session():
+            pharmacies = pharmacy_repo.find_by_medication_id_quantity_gt0_exp_gt_now(medication_id=1)
+            self.assertEqual(sorted(pharmacy.id for pharmacy in pharmacies), [1, 2])
+
+            self.clock.advance(timedelta(days=2))
+            pharmacies = pharmacy_repo.find_by_medication_id_quantity_gt0_exp_gt_now(medication_id=1)
+            self.assertEqual([pharmacy.id for pharmacy in pharmacies], [2])
+
+            self.assertEqual(pharmacy_repo.find_by_medication_id_quantity_gt0_exp_gt_now(medication_id=2), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
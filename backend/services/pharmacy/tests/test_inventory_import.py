@@ -0,0 +1,182 @@
+"""Importing inventories in bulk, from a list of rows or a CSV file
+
+Run from backend/services/pharmacy, with the same environment as the service (see run.dev.bat and .env):
+
+    set FASTAPI_SETTINGS_MODULE=src.settings
+    python -m unittest discover tests
+"""
+import io
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from fastdbx import Datasource
+from fastdbx.config.schemas import FastDbxConfig, EngineConfig
+from sqlalchemy import select
+
+from src.domain.internal.clock import SystemClock
+from src.domain.models import Inventory, Pharmacy
+from src.domain.validations.exceptions import InvalidInventoryRowsException
+from src.repository.inventory_repo import InventoryRepository
+from src.repository.pharmacy_repo import PharmacyRepository
+from src.service.inventory_import import read_inventory_csv, validate_inventory_rows
+from src.service.inventory_service import InventoryService
+
+EXPIRATION_DATE = (datetime.now() + timedelta(days=30)).replace(microsecond=0)
+
+
+class UnreadableAfter(io.BytesIO):
+    """Fails the test when more than `limit` bytes are read"""
+
+    def __init__(self, content: bytes, limit: int):
+        super().__init__(content)
+        self.limit = limit
+
+    def read1(self, size: int = -1) -> bytes:
+        if self.tell() >= self.limit:
+            raise AssertionError(f"Read past byte {self.limit}")
+        return super().read1(min(size, 64) if size > 0 else 64)
+
+
+class TestValidateInventoryRows(unittest.TestCase):
+
+    def test_validRows_areReturnedInOrder(self):
+        requests = validate_inventory_rows([
+            {"medication_id": 2, "quantity": 5, "expiration_date": EXPIRATION_DATE},
+            {"medication_id": 1, "quantity": None, "expiration_date": None},
+        ])
+
+        self.assertEqual([request.medication_id for request in requests], [2, 1])
+
+    def test_everyInvalidRow_isReportedWithItsNumber(self):
+        with self.assertRaises(InvalidInventoryRowsException) as e:
+            validate_inventory_rows([
+                {"medication_id": 1, "quantity": 5, "expiration_date": EXPIRATION_DATE},
+                {"medication_id": "one", "quantity": 0, "expiration_date": EXPIRATION_DATE},
+                {"medication_id": 3, "quantity": 1, "expiration_date": datetime(2020, 1, 1)},
+                "not a row",
+            ])
+
+        self.assertEqual(e.exception.status_code, 422)
+        self.assertEqual([error["row"] for error in e.exception.detail], [2, 3, 4])
+        self.assertEqual(len(e.exception.detail[0]["errors"]), 2)
+        self.assertTrue(e.exception.detail[1]["errors"][0].startswith("expiration_date: "))
+        self.assertTrue(e.exception.detail[2]["errors"][0].startswith("row: "))
+
+    def test_duplicateMedication_pointsAtTheFirstRow(self):
+        with self.assertRaises(InvalidInventoryRowsException) as e:
+            validate_inventory_rows([
+                {"medication_id": 1, "quantity": 5, "expiration_date": None},
+                {"medication_id": 2, "quantity": 5, "expiration_date": None},
+                {"medication_id": 1, "quantity": 6, "expiration_date": None},
+            ])
+
+        self.assertEqual(
+            e.exception.detail, [{"row": 3, "errors": ["medication_id: 1 is already registered by row 1"]}]
+        )
+
+
+class TestReadInventoryCsv(unittest.TestCase):
+
+    def test_rows_readEmptyCellsAsMissing(self):
+        content = b"expiration_date,medication_id,quantity,notes\r\n2030-01-01,1,5,x\r\n,2,,\r\n"
+
+        rows = read_inventory_csv(io.BytesIO(content), max_rows=10)
+
+        self.assertEqual(rows, [
+            {"medication_id": "1", "quantity": "5", "expiration_date": "2030-01-01"},
+            {"medication_id": "2", "quantity": None, "expiration_date": None},
+        ])
+
+    def test_byteOrderMark_isSkipped(self):
+        content = "\ufeffmedication_id,quantity,expiration_date\n1,5,2030-01-01\n".encode("utf-8")
+
+        rows = read_inventory_csv(io.BytesIO(content), max_rows=10)
+
+        self.assertEqual(rows, [{"medication_id": "1", "quantity": "5", "expiration_date": "2030-01-01"}])
+
+    def test_missingColumns_areReported(self):
+        with self.assertRaises(InvalidInventoryRowsException) as e:
+            read_inventory_csv(io.BytesIO(b"medication_id,amount\n1,5\n"), max_rows=10)
+
+        self.assertEqual(e.exception.detail, [{"row": None, "errors": ["Missing columns: quantity, expiration_date"]}])
+
+    def test_notUtf8_isRejected(self):
+        content = "medication_id,quantity,expiration_date\n1,5,2030-01-01\n".encode("utf-16")
+
+        with self.assertRaises(InvalidInventoryRowsException) as e:
+            read_inventory_csv(io.BytesIO(content), max_rows=10)
+
+        self.assertEqual(e.exception.detail, [{"row": None, "errors": ["The file is not UTF-8 encoded CSV"]}])
+
+    def test_tooManyRows_stopsReadingPastTheLimit(self):
+        header = b"medication_id,quantity,expiration_date\n"
+        row = b"1,5,2030-01-01\n"
+        file = UnreadableAfter(header + row * 10_000, limit=len(header) + len(row) * 100)
+
+        with self.assertRaises(InvalidInventoryRowsException) as e:
+            read_inventory_csv(file, max_rows=3)
+
+        self.assertEqual(e.exception.detail, [{"row": None, "errors": ["At most 3 rows can be imported at once"]}])
+        self.assertFalse(file.closed)
+
+
+class TestRegisterInventories(unittest.TestCase):
+    """Pharmacy 1 has 5 of medication 1"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        settings = FastDbxConfig(
+            engine=EngineConfig(url=f"sqlite:///{os.path.join(self.tmpdir.name, 'pharmacy.db')}", echo=False),
+            create_tables=True,
+        )
+        Datasource._instance = Datasource(settings)
+        Datasource._instance.startup()
+
+        with Datasource._instance.session() as session:
+            session.add(Pharmacy(id=1, name="p", address="a", manager_id=1))
+            session.add(Inventory(pharmacy_id=1, medication_id=1, quantity=5, expiration_date=EXPIRATION_DATE))
+            session.commit()
+
+        clock = SystemClock()
+        self.inventory_service = InventoryService(
+            inventory_repo=InventoryRepository(clock), pharmacy_repo=PharmacyRepository(clock)
+        )
+
+    def tearDown(self):
+        Datasource._instance.shutdown()
+        self.tmpdir.cleanup()
+
+    def inventories(self) -> list[tuple]:
+        with Datasource._instance.session() as session:
+            return [
+                tuple(row) for row in session.execute(
+                    select(Inventory.medication_id, Inventory.quantity, Inventory.expiration_date)
+                    .order_by(Inventory.medication_id)
+                )
+            ]
+
+    def test_registeredMedication_isOverwritten_andNewOneInserted(self):
+        later = EXPIRATION_DATE + timedelta(days=10)
+
+        registered = self.inventory_service.register_medications_in_pharmacy_inventory(1, [
+            {"medication_id": 1, "quantity": 8, "expiration_date": later},
+            {"medication_id": 2, "quantity": 3, "expiration_date": EXPIRATION_DATE},
+        ])
+
+        self.assertEqual(registered, 2)
+        self.assertEqual(self.inventories(), [(1, 8, later), (2, 3, EXPIRATION_DATE)])
+
+    def test_invalidRow_registersNone(self):
+        with self.assertRaises(InvalidInventoryRowsException):
+            self.inventory_service.register_medications_in_pharmacy_inventory(1, [
+                {"medication_id": 2, "quantity": 3, "expiration_date": EXPIRATION_DATE},
+                {"medication_id": 3, "quantity": -1, "expiration_date": EXPIRATION_DATE},
+            ])
+
+        self.assertEqual(self.inventories(), [(1, 5, EXPIRATION_DATE)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""Batched lookups of the medication service
+
+Run from backend/services/pharmacy, with the same environment as the service (see run.dev.bat and .env):
+
+    set FASTAPI_SETTINGS_MODULE=src.settings
+    python -m unittest discover tests
+"""
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+import httpx
+from service_http import ServiceHttpClient
+
+from src.service.medication_api_client import MedicationApiClient
+from src.service.medication_cache import medication_cache
+from src.settings import MEDICATION_SERVICE_BASE_URL, MEDICATION_SERVICE_HTTP
+
+
+class MedicationService:
+    """Answers the batch lookups in descending id order, the first batch answers last"""
+
+    def __init__(self):
+        self.batches: list[list[int]] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        ids = json.loads(request.content)["ids"]
+        with self._lock:
+            self.batches.append(ids)
+            is_first = len(self.batches) == 1
+
+        if is_first:
+            time.sleep(0.05)
+
+        return httpx.Response(200, json=[
+            {"id": id, "name": f"m{id}", "description": "", "manufacturer": {"id": 1, "name": "m"}, "images": []}
+            for id in sorted(ids, reverse=True)
+        ])
+
+
+@mock.patch.dict(MEDICATION_SERVICE_HTTP, {"BATCH_SIZE": 3})
+class TestMedicationApiClient(unittest.TestCase):
+
+    def setUp(self):
+        medication_cache.invalidate()
+        self.service = MedicationService()
+        self.medication_client = MedicationApiClient()
+        self.medication_client.client = ServiceHttpClient(
+            MEDICATION_SERVICE_BASE_URL, MEDICATION_SERVICE_HTTP, transport=httpx.MockTransport(self.service)
+        )
+
+    def tearDown(self):
+        self.medication_client.client.close()
+        medication_cache.invalidate()
+
+    def test_ids_areSplitInBatchesOfBatchSize(self):
+        self.medication_client.get_medications_by_ids([1, 2, 3, 4, 5, 6, 7])
+
+        self.assertEqual(sorted(self.service.batches), [[1, 2, 3], [4, 5, 6], [7]])
+
+    def test_medications_keepRequestOrderAcrossBatches(self):
+        ids = [9, 2, 7, 4, 1, 8, 3]
+
+        medications = self.medication_client.get_medications_by_ids(ids + [2])
+
+        self.assertEqual([medication.id for medication in medications], ids)
+        self.assertEqual(len(self.service.batches), 3)
+
+    def test_singleBatch_isSentOnce(self):
+        self.medication_client.get_medications_by_ids([3, 1, 2])
+
+        self.assertEqual(self.service.batches, [[3, 1, 2]])
+
+
+if __name__ == "__main__":
+    unittest.main()
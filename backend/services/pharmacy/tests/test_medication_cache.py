@@ -0,0 +1,116 @@
+"""Per id cache of the medication service responses
+
+Run from backend/services/pharmacy, with the same environment as the service (see run.dev.bat and .env):
+
+    set FASTAPI_SETTINGS_MODULE=src.settings
+    python -m unittest discover tests
+"""
+import threading
+import time
+import unittest
+
+from src.domain.dtos.medication import MedicationDto
+from src.service.medication_cache import MedicationCache
+
+
+def medication(id: int, name: str = None) -> MedicationDto:
+    return MedicationDto.model_validate({
+        "id": id,
+        "name": name or f"medication {id}",
+        "description": "",
+        "manufacturer": {"id": 1, "name": "manufacturer"},
+        "images": [],
+    })
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class RecordingLoader:
+    """Loads medications named after the current version, remembering the ids of every call"""
+
+    def __init__(self):
+        self.calls: list[list[int]] = []
+        self.version = 1
+        self.loaded = threading.Event()
+
+    def __call__(self, ids: list[int]) -> list[MedicationDto]:
+        self.calls.append(ids)
+        self.loaded.set()
+        return [medication(id, name=f"v{self.version}") for id in ids]
+
+
+class TestMedicationCache(unittest.TestCase):
+
+    def setUp(self):
+        self.timer = FakeTimer()
+        self.loader = RecordingLoader()
+        self.cache = MedicationCache(max_size=3, ttl=10, stale_ttl=5, timer=self.timer)
+
+    def test_getMany_loadsOnlyMissingIdsInRequestOrder(self):
+        self.cache.get_many([1, 2], self.loader)
+
+        medications = self.cache.get_many([3, 2, 3, 1], self.loader)
+
+        self.assertEqual([m.id for m in medications], [3, 2, 1])
+        self.assertEqual(self.loader.calls, [[1, 2], [3]])
+        statistics = self.cache.statistics()
+        self.assertEqual((statistics.hits, statistics.misses), (2, 3))
+
+    def test_putMany_evictsLeastRecentlyUsed(self):
+        self.cache.get_many([1, 2, 3], self.loader)
+        self.cache.get_many([1], self.loader)
+
+        self.cache.get_many([4], self.loader)
+        self.cache.get_many([1, 3, 2], self.loader)
+
+        self.assertEqual(self.loader.calls, [[1, 2, 3], [4], [2]])
+        self.assertEqual(self.cache.statistics().evictions, 2)
+        self.assertEqual(self.cache.statistics().size, 3)
+
+    def test_entryOlderThanTtlAndStaleTtl_isLoadedAgain(self):
+        self.cache.get_many([1], self.loader)
+        self.timer.now = 15.5
+        self.loader.version = 2
+
+        medications = self.cache.get_many([1], self.loader)
+
+        self.assertEqual(medications[0].name, "v2")
+        self.assertEqual(self.loader.calls, [[1], [1]])
+        self.assertEqual(self.cache.statistics().misses, 2)
+
+    def test_staleEntry_isServedAndRefreshedInBackground(self):
+        self.cache.get_many([1], self.loader)
+        self.timer.now = 12
+        self.loader.version = 2
+        self.loader.loaded.clear()
+
+        medications = self.cache.get_many([1], self.loader)
+
+        self.assertEqual(medications[0].name, "v1")
+        self.assertTrue(self.loader.loaded.wait(timeout=5))
+        while self.cache._refreshing:
+            time.sleep(0.01)
+
+        self.assertEqual(self.cache.get_many([1], self.loader)[0].name, "v2")
+        self.assertEqual(self.loader.calls, [[1], [1]])
+        self.assertEqual(self.cache.statistics().stale_hits, 1)
+
+    def test_invalidate_dropsEntries(self):
+        self.cache.get_many([1, 2], self.loader)
+
+        self.cache.invalidate([1])
+        self.cache.get_many([1, 2], self.loader)
+        self.cache.invalidate()
+
+        self.assertEqual(self.loader.calls, [[1, 2], [1]])
+        self.assertEqual(self.cache.statistics().size, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+"""Query plans of the inventory finders on sqlite
+
+Run from backend/services/pharmacy, with the same environment as the service (see run.dev.bat and .env):
+
+    set FASTAPI_SETTINGS_MODULE=src.settings
+    python -m unittest discover tests
+"""
+import os
+import unittest
+from datetime import datetime, timedelta
+
+from fastdbx.config.schemas import MigrationsConfig
+from fastdbx.core import BaseEntity
+from fastdbx.migrations import MigrationRunner, MigrationException
+from sqlalchemy import create_engine, insert
+from sqlalchemy.exc import IntegrityError
+
+from src.domain.models import Inventory, Pharmacy
+from src.repository.inventory_repo import InventoryRepository
+from src.repository.pharmacy_repo import PharmacyRepository
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "migrations")
+UNIQUE_PAIR = "uq_inventory_pharmacy_medication"
+COVERING = "ix_inventory_medication_id_expiration_date_quantity"
+EXPIRES_SOON = (datetime.now() + timedelta(days=1)).isoformat(" ", timespec="microseconds")
+EXPIRES_LATER = (datetime.now() + timedelta(days=2)).isoformat(" ", timespec="microseconds")
+
+
+class TestInventoryQueryPlans(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        BaseEntity.metadata.create_all(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def query_plan(self, statement, params: dict) -> str:
+        compiled = statement.compile(dialect=self.engine.dialect)
+        values = compiled.construct_params(params)
+
+        with self.engine.connect() as connection:
+            rows = connection.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {compiled}", tuple(values[name] for name in compiled.positiontup)
+            ).all()
+
+        return "\n".join(row[-1] for row in rows)
+
+    def test_findByPharmacyAndMedication_usesUniquePair(self):
+        plan = self.query_plan(
+            InventoryRepository._by_pharmacy_and_medication, {"pharmacy_id": 1, "medication_id": 2}
+        )
+
+        self.assertIn(f"USING INDEX {UNIQUE_PAIR} (pharmacy_id=? AND medication_id=?)", plan)
+
+    def test_findByPharmacyEmployeeId_usesUniquePairForPharmacy(self):
+        plan = self.query_plan(InventoryRepository._by_pharmacy_employee_id, {"pharmacy_id": 1, "employee_id": 2})
+
+        self.assertIn(f"USING INDEX {UNIQUE_PAIR} (pharmacy_id=?)", plan)
+
+    def test_findDistinctMedicationIdsInStock_usesCoveringIndex(self):
+        plan = self.query_plan(InventoryRepository._distinct_medication_ids_in_stock, {"now": "2026-01-01 00:00:00"})
+
+        self.assertIn(f"USING COVERING INDEX {COVERING}", plan)
+        self.assertNotIn("USE TEMP B-TREE", plan)
+
+    def test_findByMedicationIdInStock_usesCoveringIndexPrefix(self):
+        plan = self.query_plan(
+            PharmacyRepository._by_medication_id_quantity_gt0_exp_gt, {"medication_id": 2, "now": "2026-01-01 00:00:00"}
+        )
+
+        self.assertIn(f"INDEX {COVERING} (medication_id=? AND expiration_date>?)", plan)
+
+    def test_duplicatePair_isRejected(self):
+        expiration_date = datetime.now() + timedelta(days=1)
+        row = {"pharmacy_id": 1, "medication_id": 2, "quantity": 1, "expiration_date": expiration_date}
+
+        with self.engine.begin() as connection:
+            connection.execute(insert(Pharmacy), {"id": 1, "name": "p", "address": "a", "manager_id": 1})
+            connection.execute(insert(Inventory), row)
+
+            with self.assertRaises(IntegrityError):
+                connection.execute(insert(Inventory), row)
+
+    def prepare_unindexed_inventory_with_duplicates(self):
+        """The inventory before 0002, medication 2 registered twice at pharmacy 1"""
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql(f"DROP INDEX {UNIQUE_PAIR}")
+            connection.exec_driver_sql(f"DROP INDEX {COVERING}")
+            connection.exec_driver_sql("CREATE INDEX ix_inventory_medication_id ON inventory (medication_id)")
+            connection.exec_driver_sql(
+                "INSERT INTO inventory (pharmacy_id, medication_id, quantity, expiration_date) VALUES "
+                f"(1, 2, 5, '{EXPIRES_SOON}'), (1, 2, 7, '{EXPIRES_LATER}'), (1, 3, 1, '{EXPIRES_LATER}')"
+            )
+
+    def inventory_and_indexes(self) -> tuple[list[tuple], set[str]]:
+        with self.engine.connect() as connection:
+            rows = connection.exec_driver_sql(
+                "SELECT medication_id, quantity, expiration_date FROM inventory ORDER BY id"
+            ).all()
+            indexes = {row[1] for row in connection.exec_driver_sql("PRAGMA index_list(inventory)")}
+
+        return [tuple(row) for row in rows], indexes
+
+    def test_migration_mergesDuplicatesAndCreatesIndexes(self):
+        self.prepare_unindexed_inventory_with_duplicates()
+
+        with self.engine.connect() as connection:
+            applied = MigrationRunner(MigrationsConfig(directory=MIGRATIONS_DIR)).run(connection, create_tables=True)
+
+        rows, indexes = self.inventory_and_indexes()
+        self.assertEqual(applied, ["0001", "0002", "0003"])
+        self.assertEqual(rows, [(2, 12, EXPIRES_SOON), (3, 1, EXPIRES_LATER)])
+        self.assertIn(UNIQUE_PAIR, indexes)
+        self.assertIn(COVERING, indexes)
+        self.assertNotIn("ix_inventory_medication_id", indexes)
+
+    def test_migration_failedIndexBuild_keepsTheStock_andIsRetried(self):
+        self.prepare_unindexed_inventory_with_duplicates()
+        with self.engine.begin() as connection:
+            # takes the name of the unique index, so building it fails
+            connection.exec_driver_sql(f"CREATE TABLE {UNIQUE_PAIR} (id INTEGER)")
+
+        with self.engine.connect() as connection, self.assertRaises(MigrationException):
+            MigrationRunner(MigrationsConfig(directory=MIGRATIONS_DIR)).run(connection)
+
+        rows, indexes = self.inventory_and_indexes()
+        self.assertEqual(rows, [(2, 12, EXPIRES_SOON), (3, 1, EXPIRES_LATER)])
+        self.assertNotIn(UNIQUE_PAIR, indexes)
+
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql(f"DROP TABLE {UNIQUE_PAIR}")
+        with self.engine.connect() as connection:
+            applied = MigrationRunner(MigrationsConfig(directory=MIGRATIONS_DIR)).run(connection)
+
+        rows, indexes = self.inventory_and_indexes()
+        self.assertEqual(applied, ["0002", "0003"])
+        self.assertEqual(rows, [(2, 12, EXPIRES_SOON), (3, 1, EXPIRES_LATER)])
+        self.assertIn(UNIQUE_PAIR, indexes)
+
+    def test_migration_createsAndFillsSaleAggregates(self):
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql("DROP TABLE sale_daily_rollup")
+            connection.exec_driver_sql("DROP TABLE sale_medication_counter")
+            connection.exec_driver_sql(
+                "INSERT INTO sale (id, total_amount, created_at, employee_id, pharmacy_id) VALUES "
+                "(1, 10, '2026-01-01 09:00:00', 1, 1), (2, 5, '2026-01-01 18:00:00', 1, 1), "
+                "(3, 7, '2026-01-02 10:00:00', 1, 1), (4, 3, '2026-01-01 12:00:00', 1, 2)"
+            )
+            connection.exec_driver_sql(
+                "INSERT INTO sale_item (medication_id, quantity, unit_price, sale_id) VALUES "
+                "(2, 2, 5, 1), (2, 1, 5, 2), (3, 7, 1, 3), (2, 4, 1, 4)"
+            )
+
+        with self.engine.connect() as connection:
+            MigrationRunner(MigrationsConfig(directory=MIGRATIONS_DIR)).run(connection)
+
+        with self.engine.connect() as connection:
+            rollup = connection.exec_driver_sql(
+                "SELECT pharmacy_id, sale_date, number_of_sales, total_sales_amount FROM sale_daily_rollup "
+                "ORDER BY pharmacy_id, sale_date"
+            ).all()
+            counters = connection.exec_driver_sql(
+                "SELECT pharmacy_id, medication_id, quantity FROM sale_medication_counter "
+                "ORDER BY pharmacy_id, medication_id"
+            ).all()
+
+        self.assertEqual(
+            [tuple(row) for row in rollup], [(1, "2026-01-01", 2, 15), (1, "2026-01-02", 1, 7), (2, "2026-01-01", 1, 3)]
+        )
+        self.assertEqual([tuple(row) for row in counters], [(1, 2, 3), (1, 3, 7), (2, 2, 4)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,282 @@
+"""Placing sales on a sqlite database
+
+Run from backend/services/pharmacy, with the same environment as the service (see run.dev.bat and .env):
+
+    set FASTAPI_SETTINGS_MODULE=src.settings
+    python -m unittest discover tests
+"""
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from fastapi import HTTPException
+from fastdbx import Datasource
+from fastdbx.config.schemas import FastDbxConfig, EngineConfig
+from fastdbx.core.pagination import encode_cursor
+from sqlalchemy import select, update
+
+from src.domain.dtos.medication import MedicationDto, MedicationManufacturerDto
+from src.domain.dtos.sale import SaleItemDto
+from src.domain.internal.medication_client import MedicationClient
+from src.domain.models import Inventory, Pharmacy, PharmacyEmployee, Sale, SaleDailyRollup, SaleMedicationCounter
+from src.domain.validations.exceptions import InsufficientInventoryException, UnknownEmployeeException
+from src.domain.internal.clock import SystemClock, FixedClock
+from src.repository.inventory_repo import InventoryRepository
+from src.repository.pharmacy_repo import PharmacyRepository
+from src.repository.sale_counter_repo import SaleMedicationCounterRepository
+from src.repository.sale_repo import SaleRepository
+from src.repository.sale_rollup_repo import SaleDailyRollupRepository
+from src.service.sale_service import SaleService, OFFSET_CURSOR_KEY
+
+PHARMACY_ID = 1
+EMPLOYEE_ID = 7
+
+
+class ConcurrentlyDecrementedInventoryRepository(InventoryRepository):
+    """Sells the whole stock from another transaction right after the inventories were read"""
+
+    def find_by_pharmacy_and_medication_ids_for_update(self, pharmacy_id: int, medication_ids: list[int]):
+        inventories = super().find_by_pharmacy_and_medication_ids_for_update(pharmacy_id, medication_ids)
+        self.session.execute(
+            update(Inventory).values(quantity=0).execution_options(synchronize_session=False)
+        )
+        return inventories
+
+
+class FakeMedicationClient(MedicationClient):
+    """Knows every medication but 404, returns them in reverse order of the ids"""
+
+    def get_medications_by_ids(self, ids: list[int]) -> list[MedicationDto]:
+        manufacturer = MedicationManufacturerDto(id=1, name="m")
+        return [
+            MedicationDto(id=i, name=f"medication {i}", description="", manufacturer=manufacturer, images=[])
+            for i in reversed(ids)
+            if i != 404
+        ]
+
+
+class SaleServiceTestCase(unittest.TestCase):
+    """A pharmacy with one employee and medications 1 and 2 in stock, 5 of each"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        settings = FastDbxConfig(
+            engine=EngineConfig(url=f"sqlite:///{os.path.join(self.tmpdir.name, 'pharmacy.db')}", echo=False),
+            create_tables=True,
+        )
+        Datasource._instance = Datasource(settings)
+        Datasource._instance.startup()
+
+        expiration_date = datetime.now() + timedelta(days=30)
+        with Datasource._instance.session() as session:
+            session.add(Pharmacy(id=PHARMACY_ID, name="p", address="a", manager_id=1))
+            session.add(PharmacyEmployee(employee_id=EMPLOYEE_ID, pharmacy_id=PHARMACY_ID))
+            session.add_all([
+                Inventory(pharmacy_id=PHARMACY_ID, medication_id=m, quantity=5, expiration_date=expiration_date)
+                for m in (1, 2)
+            ])
+            session.commit()
+
+    def tearDown(self):
+        Datasource._instance.shutdown()
+        self.tmpdir.cleanup()
+
+    def sale_service(
+        self, inventory_repo: InventoryRepository = None, clock=None, medication_client: MedicationClient = None
+    ) -> SaleService:
+        clock = clock or SystemClock()
+        return SaleService(
+            inventory_repo=inventory_repo or InventoryRepository(clock),
+            sale_repo=SaleRepository(clock),
+            pharmacy_repo=PharmacyRepository(clock),
+            medication_client=medication_client,
+            sale_rollup_repo=SaleDailyRollupRepository(clock),
+            sale_counter_repo=SaleMedicationCounterRepository(),
+        )
+
+    def quantities(self) -> dict[int, int]:
+        with Datasource._instance.session() as session:
+            return dict(session.execute(select(Inventory.medication_id, Inventory.quantity)).all())
+
+    def sale_count(self) -> int:
+        with Datasource._instance.session() as session:
+            return len(session.scalars(select(Sale)).all())
+
+
+class TestPlaceSale(SaleServiceTestCase):
+
+    def test_placeSale_decrementsEveryMedicationOnce(self):
+        items = [
+            SaleItemDto(medication_id=1, quantity=2, unit_price=3),
+            SaleItemDto(medication_id=1, quantity=1, unit_price=3),
+            SaleItemDto(medication_id=2, quantity=5, unit_price=1),
+        ]
+
+        self.sale_service().place_sale_at_pharmacy(EMPLOYEE_ID, PHARMACY_ID, items)
+
+        self.assertEqual(self.quantities(), {1: 2, 2: 0})
+        self.assertEqual(self.sale_count(), 1)
+
+    def test_placeSale_emptyBasket_isAccepted(self):
+        self.sale_service().place_sale_at_pharmacy(EMPLOYEE_ID, PHARMACY_ID, [])
+
+        self.assertEqual(self.quantities(), {1: 5, 2: 5})
+        self.assertEqual(self.sale_count(), 1)
+
+    def test_placeSale_insufficientStock_isRejected(self):
+        items = [
+            SaleItemDto(medication_id=1, quantity=1, unit_price=3),
+            SaleItemDto(medication_id=2, quantity=6, unit_price=1),
+        ]
+
+        with self.assertRaises(InsufficientInventoryException):
+            self.sale_service().place_sale_at_pharmacy(EMPLOYEE_ID, PHARMACY_ID, items)
+
+        self.assertEqual(self.quantities(), {1: 5, 2: 5})
+        self.assertEqual(self.sale_count(), 0)
+
+    def test_placeSale_stockSoldConcurrently_isRejected(self):
+        service = self.sale_service(inventory_repo=ConcurrentlyDecrementedInventoryRepository(SystemClock()))
+
+        items = [SaleItemDto(medication_id=1, quantity=1, unit_price=3)]
+
+        with self.assertRaises(InsufficientInventoryException) as e:
+            service.place_sale_at_pharmacy(EMPLOYEE_ID, PHARMACY_ID, items)
+
+        self.assertIn("Inventory changed", e.exception.detail)
+        self.assertEqual(self.quantities(), {1: 5, 2: 5})
+        self.assertEqual(self.sale_count(), 0)
+
+    def test_placeSale_missingInventory_isRejected(self):
+        items = [SaleItemDto(medication_id=3, quantity=1, unit_price=3)]
+
+        with self.assertRaises(UnknownEmployeeException) as e:
+            self.sale_service().place_sale_at_pharmacy(EMPLOYEE_ID, PHARMACY_ID, items)
+
+        self.assertEqual(e.exception.detail, "Can't sell medication 3")
+        self.assertEqual(self.sale_count(), 0)
+
+    def test_placeSale_unknownEmployee_isRejected(self):
+        items = [SaleItemDto(medication_id=1, quantity=1, unit_price=3)]
+
+        with self.assertRaises(UnknownEmployeeException):
+            self.sale_service().place_sale_at_pharmacy(8, PHARMACY_ID, items)
+
+        self.assertEqual(self.quantities(), {1: 5, 2: 5})
+
+
+def item(medication_id: int, quantity: int, unit_price: float) -> SaleItemDto:
+    return SaleItemDto(medication_id=medication_id, quantity=quantity, unit_price=unit_price)
+
+
+class TestSaleDailyRollup(SaleServiceTestCase):
+
+    def rollup(self) -> list[tuple]:
+        with Datasource._instance.session() as session:
+            return session.execute(
+                select(SaleDailyRollup.sale_date, SaleDailyRollup.number_of_sales, SaleDailyRollup.total_sales_amount)
+                .order_by(SaleDailyRollup.sale_date)
+            ).all()
+
+    def test_placeSale_incrementsCountAndAmountOfTheDay(self):
+        service = self.sale_service()
+
+        service.place_sale_at_pharmacy(EMPLOYEE_ID, PHARMACY_ID, [item(1, quantity=2, unit_price=3)])
+        service.place_sale_at_pharmacy(EMPLOYEE_ID, PHARMACY_ID, [item(2, quantity=1, unit_price=4)])
+
+        self.assertEqual([tuple(row) for row in self.rollup()], [(datetime.now().date(), 2, Decimal("10.00"))])
+
+    def test_saleTrends_coverTheWholeFirstDayOfTheWindow(self):
+        clock = FixedClock(datetime(2026, 3, 10, 15, 30))
+        with Datasource._instance.session() as session:
+            session.add_all([
+                SaleDailyRollup(pharmacy_id=PHARMACY_ID, sale_date=datetime(2026, 3, day).date(),
+                                number_of_sales=day, total_sales_amount=Decimal(day * 10))
+                for day in (2, 3, 9, 10)
+            ])
+            session.commit()
+
+        trends = self.sale_service(clock=clock).get_sale_trends_past_days(manager_id=1, days=7)
+
+        self.assertEqual(
+            [(trend.sale_date.day, trend.number_of_sales, trend.total_sales_amount) for trend in trends],
+            [(3, 3, Decimal(30)), (9, 9, Decimal(90)), (10, 10, Decimal(100))],
+        )
+
+
+class TestMostSoldMedications(SaleServiceTestCase):
+
+    def counters(self) -> dict[tuple[int, int], int]:
+        with Datasource._instance.session() as session:
+            return {
+                (pharmacy_id, medication_id): quantity
+                for pharmacy_id, medication_id, quantity in session.execute(
+                    select(SaleMedicationCounter.pharmacy_id, SaleMedicationCounter.medication_id,
+                           SaleMedicationCounter.quantity)
+                )
+            }
+
+    def add_counters(self, quantities: dict[tuple[int, int], int]):
+        with Datasource._instance.session() as session:
+            session.add(Pharmacy(id=2, name="p2", address="a", manager_id=1))
+            session.add_all([
+                SaleMedicationCounter(pharmacy_id=pharmacy_id, medication_id=medication_id, quantity=quantity)
+                for (pharmacy_id, medication_id), quantity in quantities.items()
+            ])
+            session.commit()
+
+    def test_placeSale_accumulatesTheCountersAcrossSales(self):
+        service = self.sale_service()
+
+        service.place_sale_at_pharmacy(EMPLOYEE_ID, PHARMACY_ID, [item(1, quantity=1, unit_price=3)])
+        service.place_sale_at_pharmacy(
+            EMPLOYEE_ID, PHARMACY_ID, [item(1, quantity=2, unit_price=3), item(2, quantity=1, unit_price=1)]
+        )
+
+        self.assertEqual(self.counters(), {(PHARMACY_ID, 1): 3, (PHARMACY_ID, 2): 1})
+
+    def test_mostSold_sumsThePharmaciesOfTheManager_inDescendingOrder(self):
+        self.add_counters({(1, 10): 4, (2, 10): 5, (1, 11): 7, (2, 12): 1})
+
+        page = self.sale_service(medication_client=FakeMedicationClient()).get_most_sold_medications(
+            manager_id=1, limit=3
+        )
+
+        self.assertEqual([(m.medication_id, m.quantity) for m in page.items], [(10, 9), (11, 7), (12, 1)])
+        self.assertEqual(page.items[0].name, "medication 10")
+        self.assertIsNone(page.next_cursor)
+
+    def test_mostSold_ties_areRankedByMedicationId_acrossPages(self):
+        self.add_counters({(2, 13): 5, (1, 11): 5, (1, 14): 9, (2, 12): 5})
+        service = self.sale_service(medication_client=FakeMedicationClient())
+
+        first = service.get_most_sold_medications(manager_id=1, limit=2)
+        second = service.get_most_sold_medications(manager_id=1, limit=2, cursor=first.next_cursor)
+
+        self.assertEqual([m.medication_id for m in first.items], [14, 11])
+        self.assertEqual([m.medication_id for m in second.items], [12, 13])
+        self.assertIsNone(second.next_cursor)
+
+    def test_mostSold_medicationUnknownToTheMedicationService_isLeftOut(self):
+        self.add_counters({(1, 404): 9, (1, 10): 1})
+
+        page = self.sale_service(medication_client=FakeMedicationClient()).get_most_sold_medications(
+            manager_id=1, limit=5
+        )
+
+        self.assertEqual([m.medication_id for m in page.items], [10])
+
+    def test_mostSold_negativeOrKeysetCursor_isRejected(self):
+        service = self.sale_service(medication_client=FakeMedicationClient())
+
+        for cursor in (encode_cursor(-1, key=OFFSET_CURSOR_KEY), encode_cursor(3), "not a cursor"):
+            with self.subTest(cursor=cursor), self.assertRaises(HTTPException) as e:
+                service.get_most_sold_medications(manager_id=1, limit=2, cursor=cursor)
+
+            self.assertEqual(e.exception.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
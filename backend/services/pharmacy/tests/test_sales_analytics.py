@@ -0,0 +1,154 @@
+"""The columnar sales analytics over a fixed export, at a fixed time
+
+Run from backend/services/pharmacy, with the same environment as the service (see run.dev.bat and .env):
+
+    set FASTAPI_SETTINGS_MODULE=src.settings
+    python -m unittest discover tests
+"""
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+import numpy as np
+from fastdbx import Datasource
+from fastdbx.config.schemas import FastDbxConfig, EngineConfig
+
+from src.domain.internal.clock import FixedClock
+from src.domain.models import Pharmacy, Sale
+from src.repository.sale_repo import SaleRepository
+from src.service.sales_analytics import SalesAnalytics
+
+NOW = datetime(2026, 3, 10, 12, 0)
+
+# (id, pharmacy_id, employee_id, created_at, total_amount), in id order as the export reads them
+SALES = [
+    (1, 2, 1, datetime(2026, 3, 2, 9, 15), 10.0),
+    (2, 1, 2, datetime(2026, 3, 9, 23, 59), 20.0),
+    (3, 1, 1, datetime(2026, 3, 3, 10, 0), 5.0),
+    (5, 2, 3, NOW, 40.0),
+    (6, 1, 2, datetime(2026, 2, 24, 12, 0), 7.0),
+    (8, 1, 1, datetime(2026, 2, 24, 11, 59), 100.0),
+]
+
+# (sale_id, medication_id, quantity, unit_price), sales 0, 4 and 99 do not exist
+SALE_ITEMS = [
+    (0, 10, 1000, 1.0),
+    (1, 10, 2, 5.0),
+    (2, 11, 1, 20.0),
+    (3, 10, 1, 5.0),
+    (4, 10, 1000, 1.0),
+    (5, 12, 4, 10.0),
+    (6, 11, 1, 7.0),
+    (8, 10, 20, 5.0),
+    (99, 10, 1000, 1.0),
+]
+
+
+def chunks(rows: list[tuple], size: int) -> list[list[tuple]]:
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+
+class ExportedSaleRepository(SaleRepository):
+    """Streams the rows of SALES and SALE_ITEMS instead of reading the tables"""
+
+    def stream_id_pid_eid_created_total(self, batch_size: int):
+        return iter(chunks(SALES, batch_size))
+
+    def stream_sid_mid_quantity_price(self, batch_size: int):
+        return iter(chunks(SALE_ITEMS, batch_size))
+
+
+class SalesAnalyticsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.start_datasource("pharmacy.db")
+
+        clock = FixedClock(NOW)
+        self.analytics = SalesAnalytics(
+            refresh_interval=60, batch_size=4, clock=clock, sale_repo=ExportedSaleRepository(clock)
+        )
+
+    def tearDown(self):
+        Datasource._instance.shutdown()
+        self.tmpdir.cleanup()
+
+    def start_datasource(self, filename: str):
+        settings = FastDbxConfig(
+            engine=EngineConfig(url=f"sqlite:///{os.path.join(self.tmpdir.name, filename)}", echo=False),
+            create_tables=True,
+        )
+        Datasource._instance = Datasource(settings)
+        Datasource._instance.startup()
+
+
+class TestExport(SalesAnalyticsTestCase):
+
+    def test_export_joinsItemsToTheirSale_andDropsOrphans(self):
+        items = self.analytics.snapshot.items
+
+        self.assertEqual(items.size, 6)
+        self.assertEqual(items.partitions, {1: (0, 4), 2: (4, 6)})
+        self.assertEqual(items.columns["medication_id"].tolist(), [10, 11, 10, 11, 10, 12])
+        self.assertEqual(items.columns["revenue"].tolist(), [100.0, 7.0, 5.0, 20.0, 10.0, 40.0])
+
+    def test_export_partitionsSalesByPharmacy_inCreationOrder(self):
+        sales = self.analytics.snapshot.sales
+
+        self.assertEqual(sales.partitions, {1: (0, 4), 2: (4, 6)})
+        self.assertEqual(sales.columns["employee_id"].tolist(), [1, 2, 1, 2, 1, 3])
+        self.assertTrue(np.all(np.diff(sales.columns["created_at"][0:4]) > np.timedelta64(0)))
+        self.assertTrue(np.all(np.diff(sales.columns["created_at"][4:6]) > np.timedelta64(0)))
+        self.assertEqual(self.analytics.snapshot.loaded_at, NOW)
+
+    def test_export_withoutRepository_readsTheCurrentDatasource(self):
+        analytics = SalesAnalytics(refresh_interval=60, batch_size=4, clock=FixedClock(NOW))
+        self.assertEqual(analytics.snapshot.sales.size, 0)
+
+        Datasource._instance.shutdown()
+        self.start_datasource("replaced.db")
+        with Datasource._instance.session() as session:
+            session.add(Pharmacy(id=1, name="p", address="a", manager_id=1))
+            session.add(Sale(total_amount=5, created_at=NOW, employee_id=1, pharmacy_id=1))
+            session.commit()
+
+        analytics.refresh()
+
+        self.assertEqual(analytics.snapshot.sales.size, 1)
+
+
+class TestQueries(SalesAnalyticsTestCase):
+
+    def test_revenueByMedication_sumsThePharmacies_inDescendingOrder(self):
+        medication_ids, revenue, quantity = self.analytics.revenue_by_medication([1, 2])
+
+        self.assertEqual(medication_ids.tolist(), [10, 12, 11])
+        self.assertEqual(revenue.tolist(), [115.0, 40.0, 27.0])
+        self.assertEqual(quantity.tolist(), [23, 4, 2])
+
+    def test_revenueByEmployee_keepsStartAndDropsEnd(self):
+        employee_ids, revenue, number_of_sales = self.analytics.revenue_by_employee(
+            [1], start=datetime(2026, 2, 24, 12, 0), end=datetime(2026, 3, 9, 23, 59)
+        )
+
+        self.assertEqual(employee_ids.tolist(), [2, 1])
+        self.assertEqual(revenue.tolist(), [7.0, 5.0])
+        self.assertEqual(number_of_sales.tolist(), [1, 1])
+
+    def test_revenueByHour_unknownPharmacy_isEmpty(self):
+        revenue, number_of_sales = self.analytics.revenue_by_hour([3])
+
+        self.assertEqual(revenue.tolist(), [0.0] * 24)
+        self.assertEqual(number_of_sales.tolist(), [0] * 24)
+
+    def test_revenueByWeek_bucketsSalesOnTheWindowEdges(self):
+        week_starts, revenue = self.analytics.revenue_by_week([1, 2], weeks=2)
+
+        self.assertEqual(week_starts.tolist(), [datetime(2026, 2, 24, 12, 0), datetime(2026, 3, 3, 12, 0)])
+        # the sale at the start of the window is in the first week, the one at its end (now) in none
+        self.assertEqual(revenue.tolist(), [22.0, 20.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Coalescing of concurrent calls
+
+Run from backend/services/pharmacy, with the same environment as the service (see run.dev.bat and .env):
+
+    set FASTAPI_SETTINGS_MODULE=src.settings
+    python -m unittest discover tests
+"""
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.domain.validations.exceptions import InsufficientInventoryException
+from src.service.single_flight import SingleFlight
+
+WAITERS = 4
+
+
+class BlockingFunction:
+    """Blocks every call until released, counting the calls"""
+
+    def __init__(self, result=None, error: BaseException = None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, *args):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(timeout=5)
+
+        if self.error is not None:
+            raise self.error
+        return self.result, args
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.single_flight = SingleFlight()
+        self.executor = ThreadPoolExecutor(max_workers=WAITERS + 1)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def call_concurrently(self, fn: BlockingFunction, key="key") -> list:
+        leader = self.executor.submit(self.single_flight.do, key, fn, 1)
+        fn.started.wait(timeout=5)
+        waiters = [self.executor.submit(self.single_flight.do, key, fn, 1) for _ in range(WAITERS)]
+        time.sleep(0.1)  # lets the waiters reach the in flight call
+        fn.release.set()
+        return [leader] + waiters
+
+    def test_concurrentCalls_runFunctionOnce(self):
+        fn = BlockingFunction(result="medications")
+
+        results = [future.result(timeout=5) for future in self.call_concurrently(fn)]
+
+        self.assertEqual(fn.calls, 1)
+        self.assertEqual(results, [("medications", (1,))] * (WAITERS + 1))
+
+    def test_callAfterCompletion_runsFunctionAgain(self):
+        fn = BlockingFunction(result="medications")
+        fn.release.set()
+
+        self.single_flight.do("key", fn)
+        self.single_flight.do("key", fn)
+
+        self.assertEqual(fn.calls, 2)
+
+    def test_differentKeys_areNotCoalesced(self):
+        fn = BlockingFunction(result="medications")
+        fn.release.set()
+
+        self.executor.submit(self.single_flight.do, "a", fn).result(timeout=5)
+        self.executor.submit(self.single_flight.do, "b", fn).result(timeout=5)
+
+        self.assertEqual(fn.calls, 2)
+
+    def test_error_isRaisedByEveryCallerAsItsOwnCopy(self):
+        error = InsufficientInventoryException(detail="out of stock")
+        fn = BlockingFunction(error=error)
+
+        futures = self.call_concurrently(fn)
+        errors = [future.exception(timeout=5) for future in futures]
+
+        self.assertEqual(fn.calls, 1)
+        self.assertIs(errors[0], error)
+        for raised in errors[1:]:
+            self.assertIsNot(raised, error)
+            self.assertIsInstance(raised, InsufficientInventoryException)
+            self.assertEqual((raised.status_code, raised.detail), (400, "out of stock"))
+            self.assertIs(raised.__cause__, error)
+        # only the leader's raise is in the original traceback
+        self.assertEqual(_frame_names(error).count("do"), 1)
+
+
+def _frame_names(error: BaseException) -> list[str]:
+    names, tb = [], error.__traceback__
+    while tb is not None:
+        names.append(tb.tb_frame.f_code.co_name)
+        tb = tb.tb_next
+    return names
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,6 +8,7 @@ from fastdbx import Datasource
 from jwt_guard.api.routers import jwt_guard_router
 
 from src.api.routers import user_router
+from src.service.pharmacy_api_client import pharmacy_service_client
 import src.domain.models
 
 
@@ -15,6 +16,7 @@ import src.domain.models
 async def lifespan(fastapi: FastAPI):
     Datasource.instance().startup()
     yield
+    pharmacy_service_client.close()
     Datasource.instance().shutdown()
 
 
@@ -31,6 +33,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -1,7 +1,7 @@
 import logging
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Request, Query, Response
 from jwt_guard.core.jwt import Jwt
 from jwt_guard.security.auth_bearer import JWTBearer
 
@@ -14,7 +14,7 @@ from src.domain.dtos.invite_user import (
 from src.domain.dtos.user import UserOut, UpdateUserRequest, UserProfileDto
 from src.service.notification import NotificationAction
 from src.service.user_service import UserService
-from src.settings import INVITE_VERIFICATION_CALLBACK_URL
+from src.settings import INVITE_VERIFICATION_CALLBACK_URL, MAX_PAGE_SIZE
 
 user_router = APIRouter(prefix="/api/users", tags=["user-management"])
 
@@ -53,11 +53,21 @@ def complete_registration(
     "/",
     response_model=list[UserOut],
     dependencies=[Depends(JWTBearer(authorize=IsUserOfTypeAdmin()))],
+    description="Pass `limit` to page through the users, the next page cursor is returned in the `X-Next-Cursor` header",
 )
 def retrieve_users(
-    role: Optional[str] = None, _ctrl: UserService = Depends(UserService)
+    response: Response,
+    role: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    _ctrl: UserService = Depends(UserService),
 ):
-    return _ctrl.get_users_by_optional_filter(_filter=role)
+    page = _ctrl.get_users_by_optional_filter(_filter=role, limit=limit, cursor=cursor)
+
+    if page.next_cursor is not None:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+
+    return page.items
 
 
 @user_router.delete(
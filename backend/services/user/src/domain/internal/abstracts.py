@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
+from typing import Optional
 
+from fastdbx.core import Page
 from fastdbx.core.repo import AbstractRepository
 
 from src.domain.models import User
@@ -10,3 +12,7 @@ class AbstractUserRepository(AbstractRepository[User], ABC):
     @abstractmethod
     def find_by_role(self, role: str):
         pass
+
+    @abstractmethod
+    def find_page_by_role(self, role: str, limit: int, cursor: Optional[str] = None) -> Page[User]:
+        pass
@@ -1,4 +1,6 @@
-from fastdbx.core import CrudRepository
+from typing import Optional
+
+from fastdbx.core import CrudRepository, Page
 from sqlalchemy import select
 
 from src.domain.internal.abstracts import AbstractUserRepository
@@ -16,3 +18,7 @@ class UserRepository(AbstractUserRepository, CrudRepository):
     def find_by_role(self, role: str) -> list[User]:
         statement = select(self.entity).where(self.entity.role == role)
         return self.session.scalars(statement).all()
+
+    def find_page_by_role(self, role: str, limit: int, cursor: Optional[str] = None) -> Page[User]:
+        statement = select(self.entity).where(self.entity.role == role)
+        return self.paginate(statement, limit, cursor)
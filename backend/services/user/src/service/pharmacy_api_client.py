@@ -1,16 +1,18 @@
 import random
 
-import httpx
+from service_http import ServiceHttpClient
 
 from src.domain.internal.pharmacy_client import PharmacyClient
 from src.domain.models import Role
-from src.settings import PHARMACY_SERVICE_BASE_API_URL, PHARMACY_SERVICE_API_KEY
+from src.settings import PHARMACY_SERVICE_BASE_API_URL, PHARMACY_SERVICE_API_KEY, PHARMACY_SERVICE_HTTP
+
+pharmacy_service_client = ServiceHttpClient(PHARMACY_SERVICE_BASE_API_URL, PHARMACY_SERVICE_HTTP)
 
 
 class PharmacyApiClient(PharmacyClient):
 
     def __init__(self):
-        self.client = httpx.Client(base_url=PHARMACY_SERVICE_BASE_API_URL)
+        self.client = pharmacy_service_client
         self.api_key = PHARMACY_SERVICE_API_KEY
 
     def __call__(self, *args, **kwargs):
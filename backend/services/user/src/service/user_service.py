@@ -3,6 +3,7 @@ from typing import Optional
 import bcrypt
 import jwt
 from fastapi import HTTPException, Depends
+from fastdbx.core import Page, InvalidCursorException
 from fastdbx.transactions.meta import transactional
 from jwt_guard.core.jwt import Jwt
 
@@ -44,18 +45,34 @@ class UserService:
         await notification_strategy.send(to, message)
 
     @transactional()
-    def get_users_by_optional_filter(self, _filter: Optional[str]) -> list[UserOut]:
+    def get_users_by_optional_filter(
+        self, _filter: Optional[str], limit: Optional[int] = None, cursor: Optional[str] = None
+    ) -> Page[UserOut]:
         if _filter is not None and not Role.is_valid(_filter):
             raise HTTPException(
                 status_code=400,
                 detail=f"Given filter is not valid, valid ones are {Role.values()}",
             )
-        elif _filter is not None:
-            users = self.user_repo.find_by_role(role=_filter)
-        else:
-            users = self.user_repo.find_all()
 
-        return [UserOut.model_validate(u) for u in users]
+        try:
+            page = self._find_users(_filter, limit, cursor)
+        except InvalidCursorException as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return Page(
+            items=[UserOut.model_validate(u) for u in page.items],
+            next_cursor=page.next_cursor,
+        )
+
+    def _find_users(self, role: Optional[str], limit: Optional[int], cursor: Optional[str]) -> Page[User]:
+        if limit is None and role is not None:
+            return Page(items=self.user_repo.find_by_role(role=role))
+        elif limit is None:
+            return Page(items=self.user_repo.find_all())
+        elif role is not None:
+            return self.user_repo.find_page_by_role(role, limit=limit, cursor=cursor)
+
+        return self.user_repo.find_page(limit=limit, cursor=cursor)
 
     @transactional()
     def delete_user_by_id(self, id: int) -> UserOut:
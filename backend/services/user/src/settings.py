@@ -10,11 +10,26 @@ PHARMACY_SERVICE_BASE_API_URL = os.getenv(
 
 PHARMACY_SERVICE_API_KEY = os.getenv("PHARMACY_SERVICE_API_KEY")
 
+# shared connection pool to the pharmacy service, timeouts and backoff in seconds
+PHARMACY_SERVICE_HTTP = {
+    "MAX_CONNECTIONS": 50,
+    "MAX_KEEPALIVE_CONNECTIONS": 10,
+    "KEEPALIVE_EXPIRY": 30,
+    "CONNECT_TIMEOUT": 2,
+    "READ_TIMEOUT": 5,
+    "RETRIES": 2,
+    "BACKOFF": 0.1,
+    "CIRCUIT_FAILURE_THRESHOLD": 5,
+    "CIRCUIT_RESET_TIMEOUT": 30,
+}
+
 INVITE_VERIFICATION_CALLBACK_URL = os.getenv("FRONTEND_URL")
 TWILIO_SENDER_NO = os.getenv("TWILIO_SENDER_NO")
 TWILIO_SID = os.getenv("TWILIO_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 
+MAX_PAGE_SIZE = 100
+
 FASTDBX = {"ENGINE": {"URL": "sqlite:///user.db", "ECHO": True}, "CREATE_TABLES": True}
 
 JWT_GUARD = {